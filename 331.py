@@ -1,11 +1,18 @@
+import sys
+
 import pandas as pd
 import xmltodict
 import grequests
 
+from dataset_reader import read_dataset
+
 
 class AnaliticsCurr:
-    def __init__(self, data):
+    def __init__(self, data, daily=False):
         self.data = data[pd.notnull(data['salary_currency'])]
+        # по умолчанию курс на первое число месяца; daily - курс на каждый день (currency_rates.py берет
+        # курс на дату публикации, выходные без курса заполняются предыдущим)
+        self.daily = daily
 
     def get_count_currency(self):
         return self.data['salary_currency'].value_counts().to_dict()
@@ -20,6 +27,8 @@ class AnaliticsCurr:
         return f'{date[8:]}/{date[5:7]}/{date[:4]}'
 
     def change_date(self, date):
+        if self.daily:
+            return f'{date[6:]}-{date[3:5]}-{date[:2]}'
         return f'{date[6:]}-{date[3:5]}'
 
     def get_popular_currency(self):
@@ -32,7 +41,7 @@ class AnaliticsCurr:
     def get_dates(self):
         years_series = pd.to_datetime(self.data['published_at'].apply(lambda x: x[:10]))
         dad, son = self.d_m_y_date(str(years_series.min())[:10]), self.d_m_y_date(str(years_series.max())[:10])
-        return pd.date_range(start=dad, end=son, freq='M').strftime('%d/%m/%Y').tolist()
+        return pd.date_range(start=dad, end=son, freq='D' if self.daily else 'M').strftime('%d/%m/%Y').tolist()
 
 
     def make_res_dict(self):
@@ -56,9 +65,10 @@ class AnaliticsCurr:
         return list_curr
 
     def make_csv(self):
-        pd.DataFrame(self.make_res_dict()).to_csv(path_or_buf='currency_from_2003_to_2022.csv', index=False, encoding='utf-8-sig')
+        file_name = 'currency_daily_from_2003_to_2022.csv' if self.daily else 'currency_from_2003_to_2022.csv'
+        pd.DataFrame(self.make_res_dict()).to_csv(path_or_buf=file_name, index=False, encoding='utf-8-sig')
 
 
 file_name = 'vacancies_dif_currencies.csv'
-currency_count = AnaliticsCurr(pd.read_csv(file_name))
+currency_count = AnaliticsCurr(read_dataset(file_name, '331'), daily='--daily' in sys.argv[1:])
 currency_count.make_csv()
\ No newline at end of file
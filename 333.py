@@ -1,6 +1,8 @@
 import pandas as pd
 import grequests
 
+from dedup import Deduplicator
+
 
 class RequestsHH:
     def __init__(self, head):
@@ -22,10 +24,11 @@ class RequestsHH:
         return requests
 
     def make_csv(self):
-        vac_list = []
-        for req in grequests.map(self.makeRequests()):
-            for vac in req.json()['items']:
-                vac_list.append(self.parse_vac_for_csv(vac))
+        # окна date_from/date_to пересекаются на границах, и одна вакансия приходит несколько раз
+        items = (vac for req in grequests.map(self.makeRequests()) for vac in req.json()['items'])
+        with Deduplicator() as deduplicator:
+            vac_list = [self.parse_vac_for_csv(vac) for vac in deduplicator.filter(items)]
+        print(deduplicator.report())
         pd.DataFrame(data=vac_list, columns=self.head).to_csv('vacancies_from_hh.csv', index=False)
 
     @staticmethod
@@ -2,12 +2,24 @@ import pandas as pd
 from jinja2 import Environment, FileSystemLoader
 import pdfkit
 
+from report_batch import get_pdfkit_configuration
+from dataset_reader import read_dataset
+from result_cache import cached_call, get_cache
+from salary_sketch import SketchGroups
+
 
 class Report:
     def __init__(self, file_name, profession):
-        self.file = pd.read_csv(file_name)
+        # файл читается только при промахе кеша результатов
+        self.file_name = file_name
+        self.file = None
         self.profession = profession
 
+    def read_file(self):
+        if self.file is None:
+            self.file = read_dataset(self.file_name, '342')
+        return self.file
+
     def get_analitic_by_year(self, data: pd.DataFrame):
         prof_data = data[data['name'].str.contains(self.profession, case=False)]
         average_salary = round(data.apply(lambda x: x['salary'], axis=1).mean())
@@ -15,27 +27,42 @@ class Report:
         return data.shape[0], average_salary, prof_data.shape[0], prof_average_salary
 
     def get_file_analytic(self):
-        self.file['year'] = self.file['published_at'].apply(lambda x: x[:4])
-        years_vac = self.file.groupby(['year'])
+        return cached_call('342.Report.get_file_analytic', self.file_name, self.compute_file_analytic,
+                           (self.profession,), (__name__, 'dataset_reader', 'snapshot', 'salary_sketch'))
+
+    def compute_file_analytic(self):
+        data = self.read_file()
+        data['year'] = data['published_at'].apply(lambda x: x[:4])
+        years_vac = data.groupby(['year'])
         dict_salary, dict_count, dict_salary_prof, dict_count_prof = {}, {}, {}, {}
+        # медиана и 90-й перцентиль по годам - скетчами salary_sketch.py, как в lab_2_1_3.py
+        years, names = SketchGroups(), SketchGroups()
         for year, df in years_vac:
             count, average_salary, count_prof, prof_average_salary = self.get_analitic_by_year(df)
             dict_salary[year] = average_salary
             dict_count[year] = count
             dict_salary_prof[year] = prof_average_salary
             dict_count_prof[year] = count_prof
-        return dict_salary, dict_count, dict_salary_prof, dict_count_prof
+            years.get(year).update(df['salary'].dropna().tolist())
+            names.get(year).update(df[df['name'].str.contains(self.profession, case=False)]['salary'].dropna().tolist())
+        return dict_salary, dict_count, dict_salary_prof, dict_count_prof, {'years': years.summary(),
+                                                                          'names': names.summary()}
 
     def make_pdf(self):
-        salary, amount, this_vacancy_salary, this_vacancy_amount = self.get_file_analytic()
+        salary, amount, this_vacancy_salary, this_vacancy_amount, quantiles = self.get_file_analytic()
+        print('Медиана и 90-й перцентиль зарплат по годам: {0}'.format(quantiles['years']))
+        print('Медиана и 90-й перцентиль зарплат по годам для выбранной профессии: {0}'.format(quantiles['names']))
         template = Environment(loader=FileSystemLoader('other')).get_template('pdf_template.html')
         statistic = [[year, salary[year], this_vacancy_salary[year], amount[year], this_vacancy_amount[year]] for year in salary]
-        pdf_template = template.render({'name': self.profession, 'statistic': statistic})
-        config = pdfkit.configuration(wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
+        # строки квантилей: год, медиана и 90-й перцентиль по всем вакансиям, затем по вакансиям профессии
+        quantile_rows = [[year, *quantiles['years'][year], *quantiles['names'][year]] for year in salary]
+        pdf_template = template.render({'name': self.profession, 'statistic': statistic, 'quantiles': quantile_rows})
+        config = get_pdfkit_configuration()
         pdfkit.from_string(pdf_template, 'report.pdf', configuration=config, options={"enable-local-file-access": ""})
 
 
 file_name = input('Введите название файла: ')
 profession = input('Введите название профессии: ').lower()
 result = Report(file_name, profession)
-result.make_pdf()
\ No newline at end of file
+result.make_pdf()
+print(get_cache().report())
\ No newline at end of file
@@ -2,45 +2,65 @@ import pandas as pd
 from jinja2 import Environment, FileSystemLoader
 import pdfkit
 
+from city_statistic import get_frame_city_statistic
+from report_batch import get_pdfkit_configuration
+from dataset_reader import read_dataset
+from result_cache import cached_call, get_cache
+from salary_sketch import SketchGroups
+
+# Модули, от кода которых зависят результаты Report: их правка сбрасывает кеш результатов
+report_modules = (__name__, 'city_statistic', 'dataset_reader', 'snapshot', 'salary_sketch')
+
 
 class Report:
     def __init__(self, file_name, profession, area):
-        self.file = pd.read_csv(file_name)
+        # файл читается только при промахе кеша результатов
+        self.file_name = file_name
+        self.file = None
         self.profession = profession
         self.area = area
 
-    def get_data_for_all_city(self):
-        cities_count = self.file['area_name'].value_counts().to_dict()
-        city_part = dict(filter(lambda x: x[-1] > 0.01, [(k, round(v / self.file.shape[0], 4))
-                                                         for k, v in cities_count.items()]))
-        dict_part_city = dict(list(city_part.items())[:10])
+    def read_file(self):
+        if self.file is None:
+            self.file = read_dataset(self.file_name, '343')
+        return self.file
 
-        city_vac = self.file.groupby(['area_name'])
-        salary_by_city = {city: round(data['salary'].mean()) for city, data in city_vac if city in city_part}
-        dict_sal_city = dict(sorted(salary_by_city.items(), key=lambda x: x[-1], reverse=True)[:10])
-        return dict_sal_city, dict_part_city
+    def get_data_for_all_city(self):
+        return cached_call('343.Report.get_data_for_all_city', self.file_name,
+                           lambda: get_frame_city_statistic(self.read_file()), (), report_modules)
 
     def get_data_for_one(self):
-        data = self.file[
-            (self.file['name'].str.contains(self.profession, case=False)) & (self.file['area_name'] == self.area)]
+        return cached_call('343.Report.get_data_for_one', self.file_name, self.compute_data_for_one,
+                           (self.profession, self.area), report_modules)
+
+    def compute_data_for_one(self):
+        file = self.read_file()
+        data = file[(file['name'].str.contains(self.profession, case=False)) & (file['area_name'] == self.area)]
         data['year'] = data['published_at'].apply(lambda x: x[:4])
         years_vac = data.groupby(['year'])
         salary_prof = {}
         count = {}
+        # медиана и 90-й перцентиль по годам - скетчами salary_sketch.py, как в lab_2_1_3.py
+        quantiles = SketchGroups()
         for year, data in years_vac:
             salary_prof[year] = round(data['salary'].mean())
             count[year] = data.shape[0]
-        return salary_prof, count
+            quantiles.get(year).update(data['salary'].dropna().tolist())
+        return salary_prof, count, quantiles.summary()
 
     def make_pdf(self):
-        salary_prof, count = self.get_data_for_one()
+        salary_prof, count, quantiles = self.get_data_for_one()
+        print('Медиана и 90-й перцентиль зарплат по годам для выбранной профессии и региона: {0}'.format(quantiles))
         dict_sal_city, dict_part_city = self.get_data_for_all_city()
         template = Environment(loader=FileSystemLoader('other')).get_template('template_upd.html')
         years_and_area = [[year, salary_prof[year], count[year]] for year in count]
+        # строки квантилей: год, медиана и 90-й перцентиль
+        quantile_rows = [[year, *quantiles[year]] for year in count]
         pdf_template = template.render({'name': self.profession, 'area': self.area, 'years_and_area': years_and_area,
+                                        'quantiles': quantile_rows,
                                         'salary_by_city': dict_sal_city.items(),
                                         'parts_city': dict_part_city.items()})
-        config = pdfkit.configuration(wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
+        config = get_pdfkit_configuration()
         pdfkit.from_string(pdf_template, 'report_city.pdf', configuration=config, options={"enable-local-file-access": ""})
 
 
@@ -48,4 +68,5 @@ file_name = input('Введите название файла: ')
 profession = input('Введите название профессии: ').lower()
 area = input('Введите название региона: ')
 result = Report(file_name, profession, area)
-result.make_pdf()
\ No newline at end of file
+result.make_pdf()
+print(get_cache().report())
\ No newline at end of file
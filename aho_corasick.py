@@ -0,0 +1,103 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик для поиска сразу нескольких подстрок за один проход по строке
+
+    Attributes:
+        patterns (list): Список искомых подстрок
+        case_sensitive (bool): Учитывать ли регистр при поиске
+        goto (list): Таблица переходов, для каждого состояния словарь символ -> состояние
+        fail (list): Суффиксные ссылки состояний
+        output (list): Индексы подстрок, которые заканчиваются в состоянии
+    """
+    def __init__(self, patterns, case_sensitive=False):
+        """
+        Инициализирует и строит автомат
+
+        Args:
+            patterns (list): Список искомых подстрок
+            case_sensitive (bool): Учитывать ли регистр при поиске
+        """
+        self.patterns = list(patterns)
+        self.case_sensitive = case_sensitive
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for index, pattern in enumerate(self.patterns):
+            self.add_pattern(self.normalize(pattern), index)
+        self.build()
+
+    def normalize(self, string):
+        """
+        Приводит строку к виду, в котором производится сравнение
+
+        Args:
+            string (str): Исходная строка
+
+        Returns:
+            str: Строка в нижнем регистре, если регистр не учитывается
+        """
+        return string if self.case_sensitive else string.lower()
+
+    def add_pattern(self, pattern, index):
+        """
+        Добавляет подстроку в бор
+
+        Args:
+            pattern (str): Нормализованная подстрока
+            index (int): Индекс подстроки в списке patterns
+        """
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        self.output[state] += (index,)
+
+    def build(self):
+        """
+        Проставляет суффиксные ссылки обходом бора в ширину и объединяет выходы состояний
+        """
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail_state = self.fail[state]
+                while fail_state and char not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(char, 0)
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def find_all(self, string):
+        """
+        Находит все подстроки, которые входят в строку
+
+        Args:
+            string (str): Строка, в которой производится поиск
+
+        Returns:
+            set: Индексы найденных подстрок
+
+        >>> sorted(AhoCorasick(['аналитик', 'Программист', 'тик']).find_all('Бизнес-Аналитик'))
+        [0, 2]
+        >>> AhoCorasick(['java']).find_all('Python developer')
+        set()
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set(output[0])
+        state = 0
+        for char in self.normalize(string):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
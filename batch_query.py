@@ -0,0 +1,159 @@
+import argparse
+import csv
+import json
+import os
+
+from categorical import CategoricalEncoder
+from lab_5_2 import InputConnect, cell_matches, get_cleaner, make_vacancy
+from report_batch import make_file_names
+from snapshot import read_rows
+
+# Поля запроса в том же порядке, в каком InputConnect.read_user_input задает вопросы
+query_fields = ['file_name', 'filter', 'sort', 'reversed', 'range', 'columns']
+
+
+def read_queries(file_name):
+    """
+    Читает сохраненные запросы из json или csv файла.
+    json - список объектов (или объект имя -> запрос) с полями query_fields и необязательным name,
+    csv - таблица с заголовками name и query_fields
+
+    Args:
+        file_name (str): Название файла с запросами
+
+    Returns:
+        list: Список запросов-словарей
+    """
+    if file_name.endswith('.json'):
+        with open(file_name, encoding='utf-8-sig') as file:
+            queries = json.load(file)
+        if isinstance(queries, dict):
+            queries = [dict(query, name=name) for name, query in queries.items()]
+        return queries
+    with open(file_name, encoding='utf-8-sig', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def parse_query(text):
+    """
+    Разбирает запрос из командной строки: шесть ответов через ';'
+
+    Args:
+        text (str): Запрос
+
+    Returns:
+        dict: Запрос-словарь
+
+    >>> parse_query('vacancies.csv;Оклад: 100000;Оклад;Нет;1 20;')['range']
+    '1 20'
+    """
+    values = text.split(';')
+    values += [''] * (len(query_fields) - len(values))
+    return dict(zip(query_fields, values))
+
+
+class BatchQuery:
+    """
+    Выполняет множество запросов к вакансиям за один проход по каждому файлу
+
+    Attributes:
+        queries (list): Список запросов-словарей
+        output_dir (str): Директория для результатов, по файлу на запрос
+        file_names (dict): Имя запроса -> имя файла результата, уникальное в пачке
+    """
+    def __init__(self, queries, output_dir='batch_output'):
+        """
+        Инициализирует объект BatchQuery
+
+        Args:
+            queries (list): Список запросов-словарей
+            output_dir (str): Директория для результатов
+        """
+        self.queries = queries
+        self.output_dir = output_dir
+        self.file_names = {}
+
+    def write_result(self, name, text):
+        """
+        Записывает результат запроса в файл
+
+        Args:
+            name (str): Имя запроса
+            text (str): Таблица или сообщение
+        """
+        with open(os.path.join(self.output_dir, self.file_names[name] + '.txt'), 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+
+    def run(self):
+        """
+        Проверяет запросы правилами InputConnect, группирует корректные по файлу
+        и выполняет каждую группу за один проход
+
+        Returns:
+            dict: Имя запроса -> количество найденных вакансий (None, если запрос некорректен)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        groups = {}
+        found = {}
+        names = [query.get('name') or 'query_{0}'.format(index) for index, query in enumerate(self.queries, 1)]
+        self.file_names = make_file_names(names)
+        for name, query in zip(names, self.queries):
+            user_input = InputConnect()
+            user_input.set_user_input(*[query.get(field) or '' for field in query_fields])
+            error = user_input.get_input_error()
+            if error is not None:
+                self.write_result(name, error)
+                found[name] = None
+            else:
+                groups.setdefault(user_input.file_name, []).append((name, user_input))
+
+        for file_name, group in groups.items():
+            for (name, user_input), data in zip(group, self.scan(file_name, [user_input for _, user_input in group])):
+                found[name] = len(data)
+                self.write_result(name, user_input.make_table(data) if data else 'Ничего не найдено')
+        return found
+
+    @staticmethod
+    def scan(file_name, user_inputs):
+        """
+        Читает файл (или его снимок) один раз, очищает каждую строку один раз и отправляет вакансию во все запросы, под которые она подходит
+
+        Args:
+            file_name (str): Название файла в директории work_files
+            user_inputs (list): Запросы InputConnect к этому файлу
+
+        Returns:
+            list: Для каждого запроса список подходящих вакансий
+        """
+        title, values, is_cleaned = read_rows('work_files/' + file_name)
+        filters = [(user_input.dict_for_exact_match, user_input.dict_for_items_match,
+                    user_input.dict_for_substring_match, user_input.salary_req) for user_input in user_inputs]
+        results = [[] for _ in user_inputs]
+        cleaners = [get_cleaner(column) for column in title]
+        categories = CategoricalEncoder(title, transform=dict(zip(title, cleaners))).dictionaries
+        for vac in values:
+            if is_cleaned:
+                dic = dict(zip(title, vac))
+            else:
+                dic = dict([(column, categories[i].intern(cell) if i in categories else cleaners[i](cell))
+                            for i, (column, cell) in enumerate(zip(title, vac))])
+            vacancy = None
+            for result, (exact_match_dict, items_dict, substring_dict, salary_req) in zip(results, filters):
+                if all(cell_matches(column, cell, exact_match_dict, items_dict, substring_dict, salary_req)
+                       for column, cell in dic.items()):
+                    vacancy = vacancy or make_vacancy(dic)
+                    result.append(vacancy)
+        return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Пакетное выполнение запросов к вакансиям')
+    parser.add_argument('queries', nargs='?', help='json или csv файл с запросами')
+    parser.add_argument('--query', action='append', default=[],
+                        help='Запрос: файл;фильтр;сортировка;обратный порядок;диапазон;столбцы')
+    parser.add_argument('--output', default='batch_output', help='Директория для результатов')
+    args = parser.parse_args()
+
+    queries = (read_queries(args.queries) if args.queries else []) + [parse_query(text) for text in args.query]
+    for name, count in BatchQuery(queries, args.output).run().items():
+        print('{0}: {1}'.format(name, 'некорректный запрос' if count is None else count))
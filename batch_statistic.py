@@ -0,0 +1,186 @@
+import concurrent.futures
+import os
+from functools import partial
+
+from aho_corasick import AhoCorasick
+from city_statistic import CityStatistic
+from lab_2_1_3 import DataSet, Vacancy
+from dataset_reader import read_dataset
+from metrics import span
+from salary_sketch import KLLSketch, SketchGroups, collect_quantiles, summarize
+from snapshot import list_sources
+
+
+class MultiDataSet(DataSet):
+    """
+    Считает статистику сразу для нескольких профессий за один проход по csv файлу
+
+    Attributes:
+        file_name (str): Название csv файла
+        vacancy_names (list): Список профессий
+        automaton (AhoCorasick): Автомат для поиска профессий в названии вакансии
+    """
+    def __init__(self, file_name, vacancy_names, case_sensitive=False):
+        """
+        Инициализирует объект MultiDataSet
+
+        Args:
+            file_name (str): Название csv файла
+            vacancy_names (list): Список профессий
+            case_sensitive (bool): Учитывать ли регистр при поиске профессии в названии вакансии
+        """
+        super().__init__(file_name, None)
+        self.vacancy_names = list(vacancy_names)
+        self.automaton = AhoCorasick(self.vacancy_names, case_sensitive)
+
+    def get_statistics(self):
+        """
+        Собирает статистику для всех профессий
+
+        Returns:
+            dict: Профессия -> кортеж статистик в том же формате, что и DataSet.get_statistic,
+                седьмой элемент - медианы и 90-е перцентили зарплат
+        """
+        salary = {}
+        salary_of_vacancy_names = [{} for _ in self.vacancy_names]
+        cities = CityStatistic()
+        year_sketches, city_sketches = SketchGroups(), SketchGroups()
+        name_sketches = [SketchGroups() for _ in self.vacancy_names]
+
+        for vacancy_dictionary in self.csv_reader():
+            vacancy = Vacancy(vacancy_dictionary)
+            self.increment(salary, vacancy.year, [vacancy.salary_average])
+            for index in self.automaton.find_all(vacancy.name):
+                self.increment(salary_of_vacancy_names[index], vacancy.year, [vacancy.salary_average])
+                name_sketches[index].add(vacancy.year, vacancy.salary_average)
+            cities.add(vacancy.area_name, vacancy.salary_average)
+            year_sketches.add(vacancy.year, vacancy.salary_average)
+            city_sketches.add(vacancy.area_name, vacancy.salary_average)
+
+        statistics = {}
+        for vacancy_name, salary_of_vacancy_name, names in zip(self.vacancy_names, salary_of_vacancy_names, name_sketches):
+            stats = self.collect_statistic(salary, salary_of_vacancy_name, cities)
+            statistics[vacancy_name] = stats + (collect_quantiles(year_sketches, names, city_sketches, stats[4]),)
+        return statistics
+
+
+def get_data_from_chunk(file_name, professions):
+    """
+    Возвращает параметры аналитики одного чанка сразу для нескольких профессий
+
+    Args:
+        file_name (str): Путь к csv файлу (чанку)
+        professions (list): Список профессий
+
+    Returns:
+        year (str): Год публикации вакансий чанка
+        average_salary (int): Средняя зарплата
+        count (int): Количество вакансий
+        by_profession (dict): Профессия -> (средняя зарплата, количество вакансий, KLLSketch зарплат)
+        sketch (KLLSketch): Скетч зарплат всех вакансий чанка для слияния в основном процессе
+    """
+    with span('read') as stage:
+        data = read_dataset(file_name, 'chunks')
+        stage.rows_out = data.shape[0]
+    with span('aggregate', data.shape[0]) as stage:
+        salary = (data['salary_from'] + data['salary_to']) * 0.5
+        automaton = AhoCorasick(professions)
+        rows = [[] for _ in professions]
+        for row, name in enumerate(data['name'].astype(str)):
+            for index in automaton.find_all(name):
+                rows[index].append(row)
+
+        by_profession = {}
+        for profession, profession_rows in zip(professions, rows):
+            profession_salary = salary.iloc[profession_rows].mean() if profession_rows else 0
+            profession_sketch = KLLSketch()
+            profession_sketch.update(salary.iloc[profession_rows].dropna().tolist())
+            by_profession[profession] = round(profession_salary), len(profession_rows), profession_sketch
+        sketch = KLLSketch()
+        sketch.update(salary.dropna().tolist())
+        year = data['published_at'].str[:4].unique()[0]
+        stage.rows_out = len(by_profession)
+    return year, round(salary.mean()), data.shape[0], by_profession, sketch
+
+
+class ChunkMultiDataSet:
+    """
+    Считает статистику по чанкам для нескольких профессий, каждый чанк читается один раз
+
+    Attributes:
+        directory (str): Название директории с csv-файлами (чанками)
+        professions (list): Список профессий
+        raw_data (list): Результаты get_data_from_chunk для каждого чанка
+    """
+    def __init__(self, directory, professions):
+        """
+        Инициализирует объект ChunkMultiDataSet
+
+        Args:
+            directory (str): Название директории с csv-файлами (чанками)
+            professions (list): Список профессий
+        """
+        self.directory = directory
+        self.professions = list(professions)
+        self.raw_data = []
+
+    def get_analytics(self):
+        """Обрабатывает все чанки директории в пуле процессов и складывает результат в поле raw_data"""
+        files = [os.path.join(self.directory, file_name) for file_name in sorted(list_sources(self.directory))]
+        with concurrent.futures.ProcessPoolExecutor() as ex:
+            self.raw_data = list(ex.map(partial(get_data_from_chunk, professions=self.professions), files))
+
+    def get_converted_data(self):
+        """
+        Раскладывает сырые данные по словарям, в которых ключ - год
+
+        Returns:
+            dict: Профессия -> (зарплаты по годам, количество по годам,
+                зарплаты профессии по годам, количество вакансий профессии по годам)
+        """
+        dct_years_salary, dct_years_count = {}, {}
+        result = {profession: (dct_years_salary, dct_years_count, {}, {}) for profession in self.professions}
+        for year, average_salary, count_by_year, by_profession, _ in self.raw_data:
+            dct_years_salary[year] = average_salary
+            dct_years_count[year] = count_by_year
+            for profession, (average_salary_filt, count_by_year_filt, _) in by_profession.items():
+                result[profession][2][year] = average_salary_filt
+                result[profession][3][year] = count_by_year_filt
+        return result
+
+    def get_quantiles(self):
+        """
+        Сливает скетчи зарплат, посчитанные воркерами, по годам и по всем чанкам
+
+        Returns:
+            dict: Профессия -> {'years': медиана и 90-й перцентиль по годам, 'names': то же для вакансий профессии,
+                'all': по всем вакансиям, 'profession': по всем вакансиям профессии}
+        """
+        years, total = SketchGroups(), KLLSketch()
+        names = {profession: SketchGroups() for profession in self.professions}
+        profession_totals = {profession: KLLSketch() for profession in self.professions}
+        for year, _, _, by_profession, sketch in self.raw_data:
+            years.get(year).merge(sketch)
+            total.merge(sketch)
+            for profession, (_, _, profession_sketch) in by_profession.items():
+                names[profession].get(year).merge(profession_sketch)
+                profession_totals[profession].merge(profession_sketch)
+        return {profession: {'years': years.summary(), 'names': names[profession].summary(),
+                             'all': summarize(total), 'profession': summarize(profession_totals[profession])}
+                for profession in self.professions}
+
+
+def main_batch_statistic():
+    """
+    Считает и печатает статистику для нескольких профессий, введенных через запятую
+    """
+    file_name = input('Введите название файла: ')
+    vacancy_names = [name.strip() for name in input('Введите названия профессий через запятую: ').split(',')]
+
+    for vacancy_name, stats in MultiDataSet(file_name, vacancy_names).get_statistics().items():
+        print(vacancy_name)
+        DataSet.print_statistic(*stats)
+
+
+if __name__ == '__main__':
+    main_batch_statistic()
@@ -0,0 +1,97 @@
+import argparse
+import csv
+import re
+import statistics
+import time
+
+import lab_5_2
+from compressed_io import open_text
+
+
+def clean_string_before(string, is_skills):
+    """Очистка в том виде, в каком она была до быстрого пути: для сравнения времени и результата"""
+    string = re.sub(r'<[^>]*>', '', string)
+    string = ' '.join(string.split(' ')) if is_skills else ' '.join(string.split())
+    return string
+
+
+def read_columns(file_name):
+    """
+    Читает csv по столбцам
+
+    Args:
+        file_name (str): Название csv файла
+
+    Returns:
+        dict: Название столбца -> список значений
+    """
+    with open_text(file_name, encoding='utf-8-sig', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        columns = {name: [] for name in header}
+        for row in reader:
+            if len(row) == len(header):
+                for name, cell in zip(header, row):
+                    columns[name].append(cell)
+    return columns
+
+
+def run_before(columns):
+    return {name: [clean_string_before(cell, index == 2) for cell in cells]
+            for index, (name, cells) in enumerate(columns.items())}
+
+
+def run_after(columns):
+    result = {}
+    for name, cells in columns.items():
+        cleaner = lab_5_2.get_cleaner(name)
+        result[name] = [cleaner(cell) for cell in cells]
+    return result
+
+
+def measure(function, columns, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(columns)
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 1), result
+
+
+def benchmark(file_name, repeat=5, cache_size=4096):
+    """
+    Сравнивает старую очистку всех ячеек с очисткой по столбцам, с кешем и без
+
+    Args:
+        file_name (str): csv файл с вакансиями (для показательного замера - с описаниями и навыками)
+        repeat (int): Количество запусков
+        cache_size (int): Размер LRU кеша
+
+    Returns:
+        dict: Время каждого варианта в мс и количество ячеек
+    """
+    columns = read_columns(file_name)
+    before_ms, expected = measure(run_before, columns, repeat)
+    lab_5_2.set_clean_cache(0)
+    after_ms, actual = measure(run_after, columns, repeat)
+    lab_5_2.set_clean_cache(cache_size)
+    cached_ms, cached = measure(run_after, columns, repeat)
+    lab_5_2.set_clean_cache(0)
+    for name in columns:
+        if name not in lab_5_2.raw_columns and not expected[name] == actual[name] == cached[name]:
+            raise AssertionError('Очистка столбца {0} изменилась'.format(name))
+    return {'cells': sum(len(cells) for cells in columns.values()),
+            'before_ms': before_ms, 'after_ms': after_ms, 'cached_ms': cached_ms}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Микробенчмарк clean_string')
+    parser.add_argument('file_name', help='csv файл с вакансиями')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cache-size', type=int, default=4096)
+    args = parser.parse_args()
+
+    results = benchmark(args.file_name, args.repeat, args.cache_size)
+    print('Ячеек: {0}'.format(results['cells']))
+    print('Было: {0} мс, по столбцам: {1} мс, по столбцам с кешем: {2} мс'.format(
+        results['before_ms'], results['after_ms'], results['cached_ms']))
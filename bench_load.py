@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+from dataset_reader import get_read_options, read_dataset, schemas
+
+# Файлы, на которых по умолчанию меряется каждая схема
+default_files = {
+    'chunks': 'csv_chunks/2022_year.csv',
+    '331': 'vacancies_from_hh.csv',
+    'convert': 'vacancies_from_hh.csv',
+    '342': 'vacancies_with_converted_currency.csv',
+    '343': 'vacancies_with_converted_currency.csv',
+    'split': 'vacancies_from_hh.csv',
+}
+
+
+def measure(function, repeat):
+    """
+    Меряет загрузку
+
+    Args:
+        function (function): Функция, возвращающая DataFrame
+        repeat (int): Количество запусков
+
+    Returns:
+        dict: Медиана времени в мс, пик памяти по tracemalloc и размер DataFrame в МБ
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    frame = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'ms': round(statistics.median(times), 1), 'peak_mb': round(peak / 2 ** 20, 2),
+            'frame_mb': round(frame.memory_usage(deep=True).sum() / 2 ** 20, 2)}
+
+
+def benchmark(files=None, repeat=5, engine=None):
+    """
+    Сравнивает pd.read_csv без параметров (как было в скриптах) и read_dataset со схемой
+
+    Args:
+        files (dict or None): Схема -> файл, по умолчанию default_files
+        repeat (int): Количество запусков
+        engine (str or None): Движок для read_dataset
+
+    Returns:
+        dict: Схема -> результаты до и после, или причина пропуска
+    """
+    import pandas as pd
+
+    results = {}
+    for schema, file_name in dict(default_files, **(files or {})).items():
+        if not os.path.exists(file_name):
+            results[schema] = {'skipped': 'нет файла {0}'.format(file_name)}
+            continue
+        usecols = schemas[schema]['usecols'] or []
+        missing = set(usecols) - set(pd.read_csv(file_name, nrows=0).columns)
+        if missing:
+            results[schema] = {'skipped': 'в {0} нет столбцов {1}'.format(file_name, ', '.join(sorted(missing)))}
+            continue
+        results[schema] = {
+            'file': file_name,
+            'engine': get_read_options(schema, engine=engine)['engine'],
+            'before': measure(lambda: pd.read_csv(file_name), repeat),
+            'after': measure(lambda: read_dataset(file_name, schema, engine=engine, use_snapshot=False), repeat),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Время и память загрузки данных по схемам dataset_reader')
+    parser.add_argument('--file', action='append', default=[], help='Схема=файл, например chunks=csv_chunks/2010_year.csv')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--engine', help='Движок pandas для read_dataset: c, python или pyarrow')
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    args = parser.parse_args()
+
+    results = benchmark(dict(item.split('=', 1) for item in args.file), args.repeat, args.engine)
+    for schema, result in results.items():
+        if 'skipped' in result:
+            print('{0}: пропущено, {1}'.format(schema, result['skipped']))
+            continue
+        before, after = result['before'], result['after']
+        print('{0} ({1}, {2}): {3} мс -> {4} мс, пик памяти {5} МБ -> {6} МБ, DataFrame {7} МБ -> {8} МБ'.format(
+            schema, result['file'], result['engine'], before['ms'], after['ms'],
+            before['peak_mb'], after['peak_mb'], before['frame_mb'], after['frame_mb']))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from lab_5_2 import DataSet, InputConnect, make_vacancy
+from snapshot import read_rows
+from sqlite_store import VacancyDatabase
+
+# Запросы в виде ответов на вопросы lab_5_2: фильтр, сортировка, обратный порядок
+default_queries = [
+    ('', '', 'Нет'),
+    ('', 'Оклад', 'Да'),
+    ('Название региона: Москва', 'Дата публикации вакансии', 'Нет'),
+    ('Навыки: SQL', 'Навыки', 'Нет'),
+    ('Оклад: 100000', 'Опыт работы', 'Да'),
+]
+
+
+def python_path(user_input):
+    """
+    Фильтрует и сортирует вакансии в памяти, как InputConnect.standard_process
+
+    Args:
+        user_input (InputConnect): Запрос
+
+    Returns:
+        list: Вакансии
+    """
+    title, values, is_cleaned = read_rows('work_files/' + user_input.file_name)
+    data = DataSet(values, is_cleaned).generate_vacs_from_strs(
+        title, user_input.dict_for_exact_match, user_input.dict_for_items_match,
+        user_input.dict_for_substring_match, user_input.salary_req)
+    user_input.sort_vacancies(data)
+    return data
+
+
+def sqlite_path(user_input, database):
+    """
+    Выполняет тот же запрос через базу SQLite
+
+    Args:
+        user_input (InputConnect): Запрос
+        database (VacancyDatabase): База вакансий
+
+    Returns:
+        list: Вакансии
+    """
+    return [make_vacancy(row) for row in database.query(user_input)]
+
+
+def measure(function, repeat):
+    """
+    Возвращает медиану времени выполнения в миллисекундах и результат последнего запуска
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def benchmark(file_name, queries=default_queries, repeat=5, db_name=None):
+    """
+    Сравнивает время запросов в памяти и через SQLite на файле из work_files
+
+    Args:
+        file_name (str): Название файла в директории work_files
+        queries (list): Тройки (фильтр, сортировка, обратный порядок)
+        repeat (int): Количество запусков каждого запроса
+        db_name (str or None): Файл базы, по умолчанию временный
+
+    Returns:
+        dict: Время импорта и для каждого запроса время обоих путей и количество найденных вакансий
+    """
+    db_name = db_name or os.path.join(tempfile.mkdtemp(), 'vacancies.db')
+    database = VacancyDatabase(db_name)
+    start = time.perf_counter()
+    rows = database.import_csv(['work_files/' + file_name])
+    results = {'import_ms': round((time.perf_counter() - start) * 1000, 1), 'rows': rows, 'queries': []}
+
+    for request_param, column_title_for_sort, reversed_sort in queries:
+        user_input = InputConnect()
+        user_input.set_user_input(file_name, request_param, column_title_for_sort, reversed_sort, '', '')
+        error = user_input.get_input_error()
+        if error is not None:
+            raise ValueError('{0}: {1}'.format(request_param, error))
+        python_ms, expected = measure(lambda: python_path(user_input), repeat)
+        sqlite_ms, actual = measure(lambda: sqlite_path(user_input, database), repeat)
+        if [str(vacancy) for vacancy in expected] != [str(vacancy) for vacancy in actual]:
+            raise AssertionError('Результаты различаются: {0}; {1}'.format(request_param, column_title_for_sort))
+        results['queries'].append({'filter': request_param, 'sort': column_title_for_sort, 'found': len(actual),
+                                   'python_ms': round(python_ms, 1), 'sqlite_ms': round(sqlite_ms, 1)})
+    database.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сравнение запросов lab_5_2 в памяти и через SQLite')
+    parser.add_argument('file_name', help='Файл в директории work_files')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', help='Файл базы, по умолчанию временный')
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    args = parser.parse_args()
+
+    results = benchmark(args.file_name, repeat=args.repeat, db_name=args.db)
+    print('Импорт {0} строк: {1} мс'.format(results['rows'], results['import_ms']))
+    for query in results['queries']:
+        print('{0!r} / {1!r}: найдено {2}, в памяти {3} мс, SQLite {4} мс'.format(
+            query['filter'], query['sort'], query['found'], query['python_ms'], query['sqlite_ms']))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
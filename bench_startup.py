@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Сценарии запуска диспетчера 2.2.2.py: ввод, который получает процесс, и подсказка, до которой меряем время.
+# После подсказки stdin заканчивается, input() падает с EOFError, и процесс сразу завершается,
+# поэтому время работы процесса - это время до первой подсказки режима
+scenarios = {
+    'dispatcher': 'Выход\n',
+    'Вакансии': 'Вакансии\n',
+    'Статистика': 'Статистика\n',
+}
+
+dispatcher = os.path.join(os.path.dirname(os.path.abspath(__file__)), '2.2.2.py')
+
+
+def run_once(stdin_text, importtime=False):
+    """
+    Запускает диспетчер один раз
+
+    Args:
+        stdin_text (str): Пользовательский ввод
+        importtime (bool): Запускать ли с -X importtime
+
+    Returns:
+        float: Время работы процесса в миллисекундах
+        str: stderr процесса
+    """
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [dispatcher]
+    start = time.perf_counter()
+    process = subprocess.run(command, input=stdin_text.encode('utf-8'), capture_output=True,
+                             cwd=os.path.dirname(dispatcher))
+    return (time.perf_counter() - start) * 1000, process.stderr.decode('utf-8', 'replace')
+
+
+def parse_importtime(stderr):
+    """
+    Разбирает вывод -X importtime
+
+    Args:
+        stderr (str): stderr процесса
+
+    Returns:
+        float: Суммарное время импортов в миллисекундах
+        list: Пары (модуль верхнего уровня, кумулятивное время в мс) по убыванию времени
+
+    >>> parse_importtime('import time: self [us] | cumulative | imported package\\n'
+    ...                  'import time:       100 |        300 | csv\\n'
+    ...                  'import time:       200 |        200 |   _csv\\n')
+    (0.3, [('csv', 0.3)])
+    """
+    total = 0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, package = line[len('import time:'):].split('|')
+        total += int(self_us)
+        if not package.startswith('  '):
+            top_level.append((package.strip(), int(cumulative_us) / 1000))
+    top_level.sort(key=lambda x: x[-1], reverse=True)
+    return total / 1000, top_level
+
+
+def benchmark(repeat=5, top=5):
+    """
+    Меряет время до первой подсказки для каждого сценария
+
+    Args:
+        repeat (int): Количество запусков каждого сценария
+        top (int): Сколько самых тяжелых импортов показать
+
+    Returns:
+        dict: Сценарий -> медиана времени до подсказки, время импортов и самые тяжелые импорты
+    """
+    results = {}
+    for name, stdin_text in scenarios.items():
+        wall = statistics.median(run_once(stdin_text)[0] for _ in range(repeat))
+        import_ms, heaviest = parse_importtime(run_once(stdin_text, importtime=True)[1])
+        results[name] = {'first_prompt_ms': round(wall, 1), 'import_ms': round(import_ms, 1),
+                         'heaviest_imports': heaviest[:top]}
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Время запуска диспетчера 2.2.2.py до первой подсказки')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target-ms', type=float, default=100)
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    args = parser.parse_args()
+
+    results = benchmark(args.repeat)
+    for name, result in results.items():
+        print('{0}: до подсказки {1} мс, импорты {2} мс'.format(name, result['first_prompt_ms'], result['import_ms']))
+        for module, ms in result['heaviest_imports']:
+            print('    {0}: {1:.1f} мс'.format(module, ms))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+    slow = [name for name, result in results.items() if result['first_prompt_ms'] > args.target_ms]
+    if slow:
+        print('Превышена цель {0} мс: {1}'.format(args.target_ms, ', '.join(slow)))
+        sys.exit(1)
@@ -0,0 +1,348 @@
+import argparse
+import contextlib
+import csv
+import json
+import os
+import pickle
+import platform
+import runpy
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from vacancy_generator import parse_count, write_vacancies
+
+# Сквозные замеры всех конвейеров на синтетических данных vacancy_generator.py, без сети.
+# Каждый запуск идет в отдельном процессе: пик памяти - максимальный RSS процесса и его воркеров,
+# и кеши одного сценария не ускоряют другой
+package_dir = os.path.dirname(os.path.abspath(__file__))
+default_sizes = '10K,100K'
+default_threshold = 0.25
+profession = 'Аналитик'
+
+
+def prepare_data(directory, rows, seed=0):
+    """
+    Готовит данные одного размера, уже сгенерированные файлы переиспользуются
+
+    Args:
+        directory (str): Директория с данными замеров
+        rows (int): Количество строк
+        seed (int): Начальное значение генератора
+
+    Returns:
+        str: Директория с данными этого размера
+    """
+    data_dir = os.path.join(directory, str(rows))
+    full_name = os.path.join(data_dir, 'work_files', 'vacancies.csv')
+    short_name = os.path.join(data_dir, 'vacancies_dif_currencies.csv')
+    if not os.path.exists(full_name):
+        os.makedirs(os.path.dirname(full_name), exist_ok=True)
+        write_vacancies(full_name + '.tmp', rows, 'full', seed)
+        os.replace(full_name + '.tmp', full_name)
+    if not os.path.exists(short_name):
+        write_vacancies(short_name + '.tmp', rows, 'short', seed)
+        split_by_year(short_name + '.tmp', os.path.join(data_dir, 'csv_chunks'))
+        os.replace(short_name + '.tmp', short_name)
+    # 341.py берет курсы из vacancies_by_year.csv
+    shutil.copyfile(os.path.join(package_dir, 'currency_from_2003_to_2022.csv'),
+                    os.path.join(data_dir, 'vacancies_by_year.csv'))
+    return data_dir
+
+
+def split_by_year(file_name, directory):
+    """
+    Разбивает файл по годам, как chunker.py, но без ввода с клавиатуры
+
+    Args:
+        file_name (str): csv файл, строки которого упорядочены по годам
+        directory (str): Директория для чанков
+    """
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    out, writer, year = None, None, None
+    with open(file_name, encoding='utf-8-sig', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        for row in reader:
+            if row[-1][:4] != year:
+                if out is not None:
+                    out.close()
+                year = row[-1][:4]
+                out = open(os.path.join(directory, '{0}_year.csv'.format(year)), 'w', encoding='utf-8-sig', newline='')
+                writer = csv.writer(out, lineterminator='\n')
+                writer.writerow(header)
+            writer.writerow(row)
+    if out is not None:
+        out.close()
+
+
+def run_main_5_2(data_dir):
+    from lab_5_2 import InputConnect
+
+    user_input = InputConnect()
+    user_input.set_user_input('vacancies.csv', 'Опыт работы: От 1 года до 3 лет', 'Оклад', 'Да', '1 100',
+                              'Название, Навыки, Опыт работы, Компания, Оклад')
+    if not user_input.full_check_error_not_found():
+        raise ValueError('Некорректный ввод сценария main_5_2')
+    user_input.standard_process()
+
+
+def run_get_statistic(data_dir):
+    from lab_2_1_3 import DataSet
+
+    DataSet('vacancies_dif_currencies.csv', profession).get_statistic()
+
+
+def run_futures(data_dir):
+    import futures
+
+    futures.DataSet('csv_chunks', profession).get_analytics()
+
+
+def run_multiprocessing(data_dir):
+    import multyprocessing
+
+    multyprocessing.DataSet('csv_chunks', profession).get_analytics()
+
+
+def run_convert_341(data_dir):
+    # 341.py выполняет конвертацию при импорте и пишет con_vac.csv в текущую директорию
+    runpy.run_path(os.path.join(package_dir, '341.py'), run_name='bench')
+
+
+def prepare_report(data_dir):
+    from lab_2_1_3 import DataSet
+
+    stats = list(DataSet('vacancies_dif_currencies.csv', profession).get_statistic())
+    # на малых размерах у профессии бывают годы без вакансий, а графики отчета ждут одинаковые годы
+    for index in (2, 3):
+        stats[index] = {year: stats[index].get(year, 0) for year in stats[0]}
+    return stats
+
+
+def setup_report(data_dir):
+    from report_batch import init_worker
+
+    init_worker(package_dir, 'pdf_template.html', os.path.join(data_dir, 'output'), None)
+    os.makedirs(os.path.join(data_dir, 'output'), exist_ok=True)
+
+
+def run_report(data_dir, stats):
+    from report_batch import render_report
+
+    render_report((profession, stats))
+
+
+# Сценарий -> (подготовка в отдельном процессе или None, настройка в процессе замера без замера времени или None,
+# замеряемая функция). Результат подготовки передается через pickle файл, поэтому ее память не входит в пик замера
+cases = {
+    'main_5_2': (None, None, run_main_5_2),
+    'get_statistic': (None, None, run_get_statistic),
+    'futures': (None, None, run_futures),
+    'multiprocessing': (None, None, run_multiprocessing),
+    'convert_341': (None, None, run_convert_341),
+    'report': (prepare_report, setup_report, run_report),
+}
+
+
+def peak_rss_mb():
+    """
+    Возвращает максимальный RSS процесса и завершившихся воркеров
+
+    Returns:
+        float or None: Пик памяти в МБ или None, если модуль resource недоступен (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # на macOS ru_maxrss в байтах, на Linux - в килобайтах
+    return round(peak_kb / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+def enter_data_dir(data_dir):
+    os.chdir(data_dir)
+    if package_dir not in sys.path:
+        sys.path.insert(0, package_dir)
+
+
+def prepared_name(name, data_dir):
+    return os.path.join(data_dir, '{0}_prepared.pickle'.format(name))
+
+
+def prepare_case(name, data_dir):
+    """
+    Выполняет подготовку сценария в текущем процессе и сохраняет ее результат для замеряемых запусков
+
+    Args:
+        name (str): Название сценария
+        data_dir (str): Директория с данными
+    """
+    enter_data_dir(data_dir)
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        arguments = cases[name][0](data_dir)
+    with open(prepared_name(name, data_dir), 'wb') as file:
+        pickle.dump(arguments, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def run_case(name, data_dir):
+    """
+    Выполняет один сценарий в текущем процессе
+
+    Args:
+        name (str): Название сценария
+        data_dir (str): Директория с данными
+
+    Returns:
+        dict: Время в секундах и пик памяти в МБ
+    """
+    prepare, setup, function = cases[name]
+    enter_data_dir(data_dir)
+    arguments = []
+    if prepare:
+        with open(prepared_name(name, data_dir), 'rb') as file:
+            arguments.append(pickle.load(file))
+    if setup:
+        setup(data_dir)
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        function(data_dir, *arguments)
+        seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}
+
+
+def measure(name, data_dir, rows, repeat):
+    """
+    Запускает сценарий repeat раз, каждый раз в новом процессе
+
+    Args:
+        name (str): Название сценария
+        data_dir (str): Директория с данными
+        rows (int): Количество строк в данных
+        repeat (int): Количество запусков
+
+    Returns:
+        dict: Медиана времени, строк в секунду и наибольший пик памяти
+    """
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_dir, os.environ.get('PYTHONPATH')])))
+    environment.pop('VACANCY_METRICS', None)
+    # кеш результатов вернул бы сохраненную статистику вместо замера
+    environment['VACANCY_RESULT_CACHE'] = '0'
+    if cases[name][0]:
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), '--prepare', name, '--data', data_dir],
+                                 capture_output=True, env=environment)
+        if process.returncode != 0:
+            raise RuntimeError('Подготовка сценария {0} упала:\n{1}'.format(
+                name, process.stderr.decode('utf-8', 'replace')))
+    runs = []
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), '--run', name, '--data', data_dir],
+                                 capture_output=True, env=environment)
+        if process.returncode != 0:
+            raise RuntimeError('Сценарий {0} упал:\n{1}'.format(name, process.stderr.decode('utf-8', 'replace')))
+        runs.append(json.loads(process.stdout.decode('utf-8').splitlines()[-1]))
+    seconds = statistics.median(run['seconds'] for run in runs)
+    peaks = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+    return {'rows': rows, 'seconds': round(seconds, 4), 'rows_per_second': round(rows / seconds, 1) if seconds else None,
+            'peak_rss_mb': max(peaks) if peaks else None}
+
+
+def benchmark(sizes, names=None, directory='bench_data', repeat=3, seed=0):
+    """
+    Меряет все сценарии на всех размерах данных
+
+    Args:
+        sizes (list): Размеры данных в строках
+        names (list or None): Сценарии, по умолчанию все
+        directory (str): Директория для сгенерированных данных
+        repeat (int): Количество запусков каждого замера
+        seed (int): Начальное значение генератора данных
+
+    Returns:
+        dict: Окружение и результаты по ключам '<сценарий>@<строк>'
+    """
+    results = {}
+    for rows in sizes:
+        data_dir = os.path.abspath(prepare_data(directory, rows, seed))
+        for name in names or cases:
+            results['{0}@{1}'.format(name, rows)] = measure(name, data_dir, rows, repeat)
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'seed': seed, 'results': results}
+
+
+def compare(results, baseline, threshold=default_threshold):
+    """
+    Сравнивает замеры с базовыми
+
+    Args:
+        results (dict): Результаты benchmark
+        baseline (dict): Сохраненные результаты benchmark
+        threshold (float): Допустимая доля ухудшения
+
+    Returns:
+        list: Описания регрессий, пустой список - регрессий нет
+
+    >>> base = {'results': {'report@10': {'rows_per_second': 100.0, 'peak_rss_mb': 50.0}}}
+    >>> compare({'results': {'report@10': {'rows_per_second': 70.0, 'peak_rss_mb': 51.0}}}, base, 0.25)
+    ['report@10: строк/с 100.0 -> 70.0 (-30%)']
+    >>> compare({'results': {'report@10': {'rows_per_second': 90.0, 'peak_rss_mb': 70.0}}}, base, 0.25)
+    ['report@10: пик памяти, МБ 50.0 -> 70.0 (+40%)']
+    """
+    regressions = []
+    for key, result in results['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        checks = [('строк/с', 'rows_per_second', -1), ('пик памяти, МБ', 'peak_rss_mb', 1)]
+        for title, field, direction in checks:
+            before, after = base.get(field), result.get(field)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if change * direction > threshold:
+                regressions.append('{0}: {1} {2} -> {3} ({4:+.0%})'.format(key, title, before, after, change))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сквозные замеры конвейеров с базовыми значениями в json')
+    parser.add_argument('--sizes', default=default_sizes, help='размеры данных через запятую, например 10K,100K,1M')
+    parser.add_argument('--case', action='append', choices=sorted(cases), help='сценарий, по умолчанию все')
+    parser.add_argument('--data', default='bench_data', help='директория для сгенерированных данных')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='json с базовыми замерами для сравнения')
+    parser.add_argument('--save-baseline', help='сохранить результаты как базовые в этот json')
+    parser.add_argument('--threshold', type=float, default=default_threshold, help='допустимое ухудшение, доля')
+    # внутренние режимы для measure: подготовка сценария (результат - pickle файл в директории данных)
+    # и один запуск сценария (результат - json в последней строке stdout)
+    parser.add_argument('--run', choices=sorted(cases), help=argparse.SUPPRESS)
+    parser.add_argument('--prepare', choices=sorted(cases), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.prepare:
+        prepare_case(args.prepare, os.path.abspath(args.data))
+        sys.exit(0)
+    if args.run:
+        print(json.dumps(run_case(args.run, os.path.abspath(args.data))))
+        sys.exit(0)
+
+    results = benchmark([parse_count(size) for size in args.sizes.split(',')], args.case, args.data, args.repeat,
+                        args.seed)
+    for key, result in results['results'].items():
+        print('{0}: {1} с, {2} строк/с, пик памяти {3} МБ'.format(
+            key, result['seconds'], result['rows_per_second'], result['peak_rss_mb']))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print('Регрессия: ' + regression)
+        if regressions:
+            sys.exit(1)
+        print('Регрессий нет (порог {0:.0%})'.format(args.threshold))
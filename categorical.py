@@ -0,0 +1,124 @@
+# Столбцы вакансий с малым числом различных значений. Загрузчики хранят их как коды словаря:
+# строки-строки получают общий объект строки из словаря, pandas - тип category
+categorical_columns = ('area_name', 'salary_currency', 'experience_id', 'premium', 'salary_gross', 'employer_name')
+
+
+class Dictionary:
+    """
+    Словарь одного столбца: значение -> небольшой целый код и обратно
+
+    Attributes:
+        values (list): Значения по кодам
+        codes (dict): Значение -> код
+        transform (function or None): Преобразование исходной строки перед добавлением (например, clean_string)
+        raw_codes (dict): Исходная строка -> код, чтобы transform вызывался один раз на различное значение
+    """
+    def __init__(self, transform=None):
+        """
+        Инициализирует объект Dictionary
+
+        Args:
+            transform (function or None): Преобразование исходной строки перед добавлением
+        """
+        self.values = []
+        self.codes = {}
+        self.transform = transform
+        self.raw_codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, raw):
+        """
+        Возвращает код значения, добавляя его в словарь при первой встрече
+
+        Args:
+            raw (str): Исходная строка
+
+        Returns:
+            int: Код
+
+        >>> dictionary = Dictionary(str.strip)
+        >>> [dictionary.encode(value) for value in ['RUR', 'USD ', 'RUR', 'USD']]
+        [0, 1, 0, 1]
+        >>> dictionary.values
+        ['RUR', 'USD']
+        """
+        code = self.raw_codes.get(raw)
+        if code is None:
+            value = self.transform(raw) if self.transform else raw
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.values)
+                self.values.append(value)
+            self.raw_codes[raw] = code
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+    def intern(self, raw):
+        """
+        Возвращает значение из словаря: одинаковые значения во всех строках - один и тот же объект
+
+        Args:
+            raw (str): Исходная строка
+
+        Returns:
+            str: Значение после transform
+        """
+        return self.values[self.encode(raw)]
+
+
+class CategoricalEncoder:
+    """
+    Кодирует категориальные столбцы строк csv
+
+    Attributes:
+        dictionaries (dict): Номер столбца -> Dictionary
+        names (dict): Название столбца -> номер столбца
+    """
+    def __init__(self, header, columns=categorical_columns, transform=None):
+        """
+        Инициализирует объект CategoricalEncoder
+
+        Args:
+            header (list): Заголовки csv
+            columns (iterable): Названия категориальных столбцов
+            transform (function, dict or None): Преобразование исходной строки перед добавлением в словарь,
+                общее или свое для каждого столбца (название -> функция)
+        """
+        self.names = {name: index for index, name in enumerate(header) if name in columns}
+        self.dictionaries = {index: Dictionary(transform.get(name) if isinstance(transform, dict) else transform)
+                             for name, index in self.names.items()}
+
+    def intern_row(self, row):
+        """
+        Заменяет значения категориальных столбцов строки общими объектами словаря
+
+        Args:
+            row (list): Строка csv, изменяется на месте
+
+        Returns:
+            list: Та же строка
+
+        >>> encoder = CategoricalEncoder(['name', 'area_name'])
+        >>> first, second = encoder.intern_row(['a', ''.join(['Моск', 'ва'])]), encoder.intern_row(['b', 'Москва'])
+        >>> first[1] is second[1]
+        True
+        """
+        for index, dictionary in self.dictionaries.items():
+            row[index] = dictionary.intern(row[index])
+        return row
+
+    def dictionary(self, name):
+        """
+        Возвращает словарь столбца по названию
+
+        Args:
+            name (str): Название столбца
+
+        Returns:
+            Dictionary: Словарь столбца
+        """
+        return self.dictionaries[self.names[name]]
@@ -1,16 +1,19 @@
 import csv
 
+from compressed_io import open_output, open_text
 
-def creat_csv_chunks(file_name):
+
+def creat_csv_chunks(file_name, compression=''):
     """
     Разбивает большой csv файл на несколько csv файлов меньшего размера
     Args:
-        file_name (str): Название файла, который нужно разделить
+        file_name (str): Название файла, который нужно разделить (можно сжатый: .gz, .bz2, .xz, .zst)
+        compression (str): Суффикс сжатия частей: '', '.gz', '.bz2', '.xz' или '.zst'
     """
     data = {}
     titles = []
 
-    with open(f'work_files/{file_name}', encoding="utf-8-sig") as File:
+    with open_text(f'work_files/{file_name}', encoding="utf-8-sig") as File:
         reader = csv.reader(File)
         k = 0
         count_years = 2007
@@ -30,7 +33,7 @@ def creat_csv_chunks(file_name):
                 data[str(count_years)] = [row]
 
     for k in data.keys():
-        my_file = open(f'csv_chunks/{k}_year.csv', 'w', encoding="utf-8-sig")
+        my_file = open_output(f'csv_chunks/{k}_year.csv{compression}', encoding="utf-8-sig")
         with my_file:
             writer = csv.writer(my_file, delimiter=",", lineterminator="\r")
             writer.writerow(titles)
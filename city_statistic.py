@@ -0,0 +1,148 @@
+from array import array
+
+
+class CityStatistic:
+    """
+    Накапливает зарплаты по городам в виде кодов городов (словарное кодирование) и считает статистику
+    по городам одним np.bincount
+
+    Attributes:
+        vocabulary (dict): Город -> код, коды выдаются в порядке первого появления города
+        codes (array): Код города для каждой вакансии
+        salaries (array): Зарплата для каждой вакансии
+    """
+    def __init__(self):
+        """
+        Инициализирует пустой объект CityStatistic
+        """
+        self.vocabulary = {}
+        self.codes = array('q')
+        self.salaries = array('d')
+
+    def __len__(self):
+        return len(self.codes)
+
+    def add(self, area_name, salary):
+        """
+        Добавляет вакансию
+
+        Args:
+            area_name (str): Город
+            salary (float): Средняя зарплата вакансии
+        """
+        code = self.vocabulary.get(area_name)
+        if code is None:
+            code = self.vocabulary[area_name] = len(self.vocabulary)
+        self.codes.append(code)
+        self.salaries.append(salary)
+
+    def get_statistic(self, top=10, threshold=0.01):
+        """
+        Считает уровень зарплат и долю вакансий по городам, результат совпадает с DataSet.get_statistic
+
+        Args:
+            top (int): Сколько городов оставить
+            threshold (float): Минимальная доля вакансий города
+
+        Returns:
+            dict: Город -> средняя зарплата, по убыванию зарплаты, только города с долей >= threshold
+            dict: Город -> доля вакансий, по убыванию доли, только города с долей >= threshold
+
+        >>> cities = CityStatistic()
+        >>> for area_name, salary in [('Москва', 100.0), ('Пермь', 50.0), ('Москва', 81.0)]:
+        ...     cities.add(area_name, salary)
+        >>> cities.get_statistic()
+        ({'Москва': 90, 'Пермь': 50}, {'Москва': 0.6667, 'Пермь': 0.3333})
+        """
+        import numpy as np
+
+        if not self.codes:
+            return {}, {}
+        names = list(self.vocabulary)
+        codes = np.frombuffer(self.codes, dtype=np.int64)
+        counts = np.bincount(codes, minlength=len(names))
+        sums = np.bincount(codes, weights=np.frombuffer(self.salaries, dtype=np.float64), minlength=len(names))
+        return select_cities(names, counts.tolist(), (sums / counts).tolist(), len(self.codes), top, threshold)
+
+
+def select_cities(names, counts, means, total, top=10, threshold=0.01):
+    """
+    Отбирает города с долей вакансий не меньше threshold и оставляет top лучших по зарплате и по доле.
+    Порядок городов с равными значениями сохраняется, как при устойчивой сортировке в DataSet.get_statistic
+
+    Args:
+        names (list): Названия городов в порядке первого появления
+        counts (list): Количество вакансий по городам
+        means (list): Средняя зарплата по городам
+        total (int): Общее количество вакансий
+        top (int): Сколько городов оставить
+        threshold (float): Минимальная доля вакансий города
+
+    Returns:
+        dict: Город -> средняя зарплата
+        dict: Город -> доля вакансий
+    """
+    shares = [round(count / total, 4) for count in counts]
+    selected = [i for i, share in enumerate(shares) if share >= threshold]
+    by_share = sorted(selected, key=lambda i: shares[i], reverse=True)[:top]
+    by_salary = sorted(selected, key=lambda i: int(means[i]), reverse=True)[:top]
+    return dict([(names[i], int(means[i])) for i in by_salary]), dict([(names[i], shares[i]) for i in by_share])
+
+
+def get_frame_city_statistic(data, top=10, threshold=0.01):
+    """
+    Считает статистику по городам для DataFrame со столбцами area_name и salary одним проходом
+    np.bincount по кодам pd.factorize, результат совпадает с 343.Report.get_data_for_all_city
+
+    Args:
+        data (DataFrame): Вакансии со сконвертированной зарплатой
+        top (int): Сколько городов оставить
+        threshold (float): Доля вакансий города должна быть строго больше threshold
+
+    Returns:
+        dict: Город -> средняя зарплата, по убыванию зарплаты
+        dict: Город -> доля вакансий, по убыванию количества вакансий
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, names = pd.factorize(data['area_name'])
+    known = codes >= 0
+    codes = codes[known]
+    salary = data['salary'].to_numpy(dtype=np.float64)[known]
+    salary_known = ~np.isnan(salary)
+    counts = np.bincount(codes, minlength=len(names))
+    sums = np.bincount(codes, weights=np.where(salary_known, salary, 0), minlength=len(names))
+    salary_counts = np.bincount(codes, weights=salary_known.astype(np.float64), minlength=len(names))
+    return select_converted_cities(names, counts, sums, salary_counts, data.shape[0], top, threshold)
+
+
+def select_converted_cities(names, counts, sums, salary_counts, total, top=10, threshold=0.01):
+    """
+    Отбирает города по правилам 343.py: доля вакансий строго больше threshold, средняя только по вакансиям
+    со сконвертированной зарплатой
+
+    Args:
+        names (list): Названия городов
+        counts (ndarray): Количество вакансий по городам
+        sums (ndarray): Сумма известных зарплат по городам
+        salary_counts (ndarray): Количество известных зарплат по городам
+        total (int): Общее количество вакансий
+        top (int): Сколько городов оставить
+        threshold (float): Минимальная доля вакансий города (не включая)
+
+    Returns:
+        dict: Город -> средняя зарплата, по убыванию зарплаты
+        dict: Город -> доля вакансий, по убыванию количества вакансий
+    """
+    import numpy as np
+
+    by_count = np.argsort(-counts, kind='stable')
+    city_part = [(i, round(counts[i].item() / total, 4)) for i in by_count]
+    city_part = [(i, share) for i, share in city_part if share > threshold]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / salary_counts
+    salary_by_city = [(names[i], round(means[i].item())) for i, _ in sorted(city_part, key=lambda x: names[x[0]])]
+    salary_by_city.sort(key=lambda x: x[-1], reverse=True)
+    return dict(salary_by_city[:top]), dict([(names[i], share) for i, share in city_part[:top]])
@@ -0,0 +1,198 @@
+import importlib
+import io
+import queue
+import threading
+
+# Суффикс сжатого файла -> модуль. Модули импортируются только при открытии такого файла,
+# zstandard - сторонний модуль и поддерживается, если установлен
+compression_modules = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma', '.zst': 'zstandard'}
+
+block_size = 1 << 20
+queue_blocks = 8
+
+
+def get_compression(file_name):
+    """
+    Определяет сжатие по суффиксу файла
+
+    Args:
+        file_name (str): Название файла
+
+    Returns:
+        str or None: Суффикс сжатия или None для несжатого файла
+
+    >>> get_compression('csv_chunks/2007_year.csv.gz'), get_compression('vacancies.csv')
+    ('.gz', None)
+    """
+    for suffix in compression_modules:
+        if file_name.endswith(suffix):
+            return suffix
+    return None
+
+
+def strip_compression(file_name):
+    """
+    Убирает суффикс сжатия из названия файла
+
+    Args:
+        file_name (str): Название файла
+
+    Returns:
+        str: Название без суффикса сжатия
+
+    >>> strip_compression('vacancies.csv.xz')
+    'vacancies.csv'
+    """
+    suffix = get_compression(file_name)
+    return file_name[:-len(suffix)] if suffix else file_name
+
+
+def zstd_available():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def open_compressed(file_name, mode):
+    """
+    Открывает сжатый файл модулем, соответствующим суффиксу
+
+    Args:
+        file_name (str): Название файла
+        mode (str): 'rb' или 'wb'
+
+    Returns:
+        file: Бинарный поток распакованных (или сжимаемых) данных
+    """
+    suffix = get_compression(file_name)
+    try:
+        module = importlib.import_module(compression_modules[suffix])
+    except ImportError:
+        raise ValueError('Для файлов {0} нужен модуль {1}'.format(suffix, compression_modules[suffix]))
+    if suffix != '.zst':
+        return module.open(file_name, mode)
+    file = open(file_name, mode)
+    if mode == 'rb':
+        return module.ZstdDecompressor().stream_reader(file, closefd=True)
+    return module.ZstdCompressor().stream_writer(file, closefd=True)
+
+
+class ThreadedReader(io.RawIOBase):
+    """
+    Распаковывает поток в фоновом потоке: распаковка следующих блоков идет, пока читатель разбирает текущий.
+    Очередь ограничена queue_blocks блоками, поэтому память не растет, если разбор медленнее распаковки
+
+    Attributes:
+        source (file): Бинарный поток распакованных данных
+        blocks (queue.Queue): Распакованные блоки, b'' - конец потока
+        buffer (bytes): Остаток текущего блока
+    """
+    def __init__(self, source):
+        """
+        Запускает поток распаковки
+
+        Args:
+            source (file): Бинарный поток распакованных данных
+        """
+        super().__init__()
+        self.source = source
+        self.blocks = queue.Queue(queue_blocks)
+        self.buffer = b''
+        self.error = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.decompress, daemon=True)
+        self.thread.start()
+
+    def decompress(self):
+        try:
+            while not self.stopped.is_set():
+                block = self.source.read(block_size)
+                self.put(block)
+                if not block:
+                    break
+        except Exception as error:
+            self.error = error
+            self.put(b'')
+
+    def put(self, block):
+        while not self.stopped.is_set():
+            try:
+                self.blocks.put(block, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.buffer:
+            self.buffer = self.blocks.get()
+            if not self.buffer:
+                # конец потока: пустой блок возвращаем в очередь для следующих вызовов
+                self.blocks.put(b'')
+                if self.error is not None:
+                    raise self.error
+                return 0
+        size = min(len(buffer), len(self.buffer))
+        buffer[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.stopped.set()
+            self.thread.join()
+            self.source.close()
+        super().close()
+
+
+def open_binary(file_name):
+    """
+    Открывает файл на чтение в бинарном режиме. Сжатый файл распаковывается в фоновом потоке
+
+    Args:
+        file_name (str): Название файла, возможно с суффиксом .gz, .bz2, .xz или .zst
+
+    Returns:
+        file: Бинарный поток
+    """
+    if get_compression(file_name) is None:
+        return open(file_name, 'rb')
+    return io.BufferedReader(ThreadedReader(open_compressed(file_name, 'rb')), block_size)
+
+
+def open_text(file_name, encoding='utf-8-sig', newline=None):
+    """
+    Открывает файл на чтение в текстовом режиме, как open, но понимает сжатые файлы
+
+    Args:
+        file_name (str): Название файла
+        encoding (str): Кодировка
+        newline (str or None): Как в open
+
+    Returns:
+        file: Текстовый поток
+    """
+    if get_compression(file_name) is None:
+        return open(file_name, encoding=encoding, newline=newline)
+    return io.TextIOWrapper(open_binary(file_name), encoding=encoding, newline=newline)
+
+
+def open_output(file_name, encoding='utf-8-sig', newline=None):
+    """
+    Открывает файл на запись в текстовом режиме, сжимая его, если у названия есть суффикс сжатия
+
+    Args:
+        file_name (str): Название файла
+        encoding (str): Кодировка
+        newline (str or None): Как в open
+
+    Returns:
+        file: Текстовый поток
+    """
+    if get_compression(file_name) is None:
+        return open(file_name, 'w', encoding=encoding, newline=newline)
+    return io.TextIOWrapper(open_compressed(file_name, 'wb'), encoding=encoding, newline=newline)
@@ -0,0 +1,275 @@
+import bisect
+import csv
+import datetime
+import os
+
+from compressed_io import open_text
+
+# Курсы валют к рублю для конвертации зарплат. Источник выбирает модуль, переменная VACANCY_RATES
+# переопределяет его для всех модулей:
+# 'static' - постоянная таблица, как currency_to_rub в lab_2_1_3.py и lab_5_2.py;
+# путь к csv со столбцом date и столбцами валют - курсы по месяцам (date = YYYY-MM, курс на первое число,
+# как currency_from_2003_to_2022.csv) или по дням (date = YYYY-MM-DD).
+# Курс вакансии - последний известный курс на дату публикации (as-of), весь столбец дат конвертируется
+# одним np.searchsorted. Последний курс файла действует еще один период (месяц или daily_lookahead дней),
+# позже курса нет. Одиночный пропуск или ноль в csv заполняется предыдущим курсом; более длинная серия
+# нулей и нули до конца файла (BYR после деноминации 2016-07) означают, что курса нет
+ENVIRONMENT_VARIABLE = 'VACANCY_RATES'
+
+static_rates = {
+    "AZN": 35.68, "BYR": 23.91, "EUR": 59.90, "GEL": 21.74, "KGS": 0.76,
+    "KZT": 0.13, "RUR": 1, "UAH": 1.64, "USD": 60.66, "UZS": 0.0055,
+}
+
+# сколько дней после последней даты дневного файла действует ее курс: выходные и новогодние каникулы
+daily_lookahead = 10
+
+
+class CurrencyRates:
+    """
+    Ряды курсов валют с поиском курса на дату
+
+    Attributes:
+        resolution (str): 'static', 'monthly' или 'daily'
+        dates (list): Даты курсов YYYY-MM-DD по возрастанию
+        rates (dict): Валюта -> курсы на даты dates, None - курса нет (см. fill_gaps)
+        fallback (dict): Валюта -> курс, если ряда для валюты нет или дата раньше первого курса
+        source (str): Файл курсов или 'static'
+        end (str or None): Первая дата YYYY-MM-DD, на которую курсов файла уже нет
+    """
+    def __init__(self, resolution, dates, rates, fallback=None, source='static'):
+        self.resolution = resolution
+        self.dates = dates
+        self.rates = rates
+        self.fallback = fallback or {}
+        self.source = source
+        self.end = None
+        if dates:
+            last = datetime.date.fromisoformat(dates[-1])
+            if resolution == 'monthly':
+                last = (last.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+            else:
+                last += datetime.timedelta(days=daily_lookahead)
+            self.end = last.isoformat()
+        self.array_cache = None
+
+    @classmethod
+    def static(cls, table=None):
+        return cls('static', [], {}, table or static_rates)
+
+    @classmethod
+    def read(cls, file_name, fallback=None):
+        """
+        Читает курсы из csv
+
+        Args:
+            file_name (str): csv со столбцом date (YYYY-MM или YYYY-MM-DD) и столбцами валют
+            fallback (dict or None): Курсы для валют без ряда и дат раньше первого курса
+
+        Returns:
+            CurrencyRates: Курсы
+        """
+        with open_text(file_name, encoding='utf-8-sig', newline='') as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            rows = sorted((row for row in reader if row and row[0]), key=lambda row: row[0])
+        resolution = 'monthly' if rows and len(rows[0][0]) == 7 else 'daily'
+        dates = [row[0] + '-01' if resolution == 'monthly' else row[0][:10] for row in rows]
+        rates = {}
+        for index, currency in enumerate(header):
+            if currency == 'date':
+                continue
+            # 331.py пишет 0, если курса валюты на дату нет
+            rates[currency] = fill_gaps([float(row[index]) if index < len(row) and row[index] else 0.0
+                                         for row in rows])
+        return cls(resolution, dates, rates, fallback, file_name)
+
+    def key(self):
+        """Часть ключа кеша: от курсов зависят все сконвертированные зарплаты"""
+        from result_cache import file_fingerprint
+
+        if self.resolution == 'static':
+            return ['static', sorted(self.fallback.items())]
+        return [os.path.abspath(self.source), file_fingerprint(self.source)]
+
+    def rate(self, currency, published_at):
+        """
+        Возвращает курс валюты на дату публикации
+
+        Args:
+            currency (str): Код валюты
+            published_at (str): Дата публикации, начинается с YYYY-MM-DD
+
+        Returns:
+            float or None: Курс или None, если он неизвестен
+
+        >>> rates = CurrencyRates('monthly', ['2022-01-01', '2022-02-01'], {'USD': [75.0, 80.0]}, {'KZT': 0.13})
+        >>> rates.rate('USD', '2022-01-31T10:00:00+0300'), rates.rate('USD', '2022-02-28'), rates.rate('USD', '2022-03-15')
+        (75.0, 80.0, None)
+        >>> rates.rate('USD', '2021-12-31')
+        >>> rates.rate('RUR', '2022-01-01'), rates.rate('KZT', '2022-01-01'), rates.rate('GEL', '2022-01-01')
+        (1, 0.13, None)
+        """
+        if currency == 'RUR':
+            return 1
+        series = self.rates.get(currency)
+        if series is not None:
+            position = bisect.bisect_right(self.dates, published_at[:10]) - 1
+            if position >= 0 and published_at[:10] < self.end and series[position] is not None:
+                return series[position]
+        return self.fallback.get(currency)
+
+    def arrays(self):
+        import numpy as np
+
+        if self.array_cache is None:
+            self.array_cache = (np.array(self.dates, dtype='datetime64[D]'),
+                                dict([(currency, np.array(series, dtype=np.float64))
+                                      for currency, series in self.rates.items()]))
+        return self.array_cache
+
+    def rates_for(self, currencies, published_at):
+        """
+        Находит курсы для всех вакансий одним проходом: as-of соединение дат публикации с датами курсов
+        через np.searchsorted и выбор ряда по коду валюты
+
+        Args:
+            currencies (Series): Коды валют
+            published_at (Series): Даты публикации
+
+        Returns:
+            ndarray: Курсы, NaN - курс неизвестен
+
+        >>> import pandas as pd
+        >>> rates = CurrencyRates('daily', ['2022-01-10', '2022-01-12'], {'USD': [75.0, 80.0]})
+        >>> rates.rates_for(pd.Series(['USD', 'USD', 'USD', 'USD', 'RUR', None]),
+        ...                 pd.Series(['2022-01-11T09:00', '2022-01-21T09:00', '2022-01-22', '2022-01-09', '2022-01-01',
+        ...                            '2022-01-11'])).tolist()
+        [75.0, 80.0, nan, nan, 1.0, nan]
+        """
+        import numpy as np
+        import pandas as pd
+
+        dates, rates = self.arrays()
+        days = pd.to_datetime(published_at.astype(str).str[:10], format='%Y-%m-%d', errors='coerce').to_numpy()
+        days = days.astype('datetime64[D]')
+        positions = np.searchsorted(dates, days, side='right') - 1
+        known_date = (positions >= 0) & ~np.isnat(days) & (days < np.datetime64(self.end or 'NaT'))
+        result = np.full(len(days), np.nan)
+        codes, names = pd.factorize(currencies)
+        for code, currency in enumerate(names):
+            selected = codes == code
+            if currency == 'RUR':
+                result[selected] = 1.0
+                continue
+            if currency in rates:
+                with_rate = selected & known_date
+                result[with_rate] = rates[currency][positions[with_rate]]
+            if currency in self.fallback:
+                result[selected & np.isnan(result)] = self.fallback[currency]
+        return result
+
+
+def fill_gaps(values, limit=1):
+    """
+    Заменяет нули на предыдущий курс, если серия нулей не длиннее limit периодов и после нее курс снова есть.
+    Остальные нули, в том числе серия до конца ряда, заменяются на None: курса нет
+
+    Args:
+        values (list): Курсы по датам, 0 - курса нет
+        limit (int): Наибольшая длина заполняемой серии
+
+    Returns:
+        list: Курсы, None - курса нет
+
+    >>> fill_gaps([0.0, 2.0, 0.0, 3.0, 0.0, 0.0, 4.0, 0.0])
+    [None, 2.0, 2.0, 3.0, None, None, 4.0, None]
+    """
+    series, last, gap = [], None, []
+    for value in values:
+        if value > 0:
+            series.extend([last if len(gap) <= limit else None] * len(gap))
+            series.append(value)
+            last, gap = value, []
+        else:
+            gap.append(value)
+    series.extend([None] * len(gap))
+    return series
+
+
+loaded = {}
+
+
+def get_rates(default='static', table=None):
+    """
+    Возвращает курсы, выбранные модулем или переменной VACANCY_RATES
+
+    Args:
+        default (str): Источник по умолчанию для модуля: 'static' или путь к csv
+        table (dict or None): Постоянная таблица модуля, она же курсы для валют без ряда в csv
+
+    Returns:
+        CurrencyRates: Курсы
+    """
+    source = os.environ.get(ENVIRONMENT_VARIABLE) or default
+    key = (source, tuple(sorted((table or {}).items())))
+    if key not in loaded:
+        loaded[key] = CurrencyRates.static(table) if source == 'static' else CurrencyRates.read(source, table)
+    return loaded[key]
+
+
+def convert_salaries(data, rates):
+    """
+    Конвертирует зарплаты DataFrame в рубли одним проходом, как ConvertVacancy в 332.py и 341.py:
+    средняя по вилке или граница, если вторая не указана; без курса или без обеих границ - NaN
+
+    Args:
+        data (DataFrame): Вакансии со столбцами salary_from, salary_to, salary_currency, published_at
+        rates (CurrencyRates): Курсы
+
+    Returns:
+        ndarray: Зарплаты в рублях, округленные до целых
+    """
+    import numpy as np
+
+    salary_from = data['salary_from'].to_numpy(dtype=np.float64)
+    salary_to = data['salary_to'].to_numpy(dtype=np.float64)
+    from_known = ~np.isnan(salary_from) & (salary_from != 0)
+    to_known = ~np.isnan(salary_to) & (salary_to != 0)
+    average = np.where(from_known & to_known, 0.5 * (salary_from + salary_to),
+                       np.fmax(np.nan_to_num(salary_from), np.nan_to_num(salary_to)))
+    average[np.isnan(salary_from) & np.isnan(salary_to)] = np.nan
+    rate = rates.rates_for(data['salary_currency'], data['published_at'])
+    rate[rate == 0] = np.nan
+    return np.round(average * rate, 0)
+
+
+def convert_salary(salary_from, salary_to, currency, published_at, rates):
+    """
+    Конвертирует зарплату одной вакансии по тем же правилам, что и convert_salaries
+
+    Args:
+        salary_from (float or None): Нижняя граница
+        salary_to (float or None): Верхняя граница
+        currency (str or None): Код валюты
+        published_at (str): Дата публикации
+        rates (CurrencyRates): Курсы
+
+    Returns:
+        float or None: Зарплата в рублях, None - без курса или без обеих границ
+
+    >>> rates = CurrencyRates.static()
+    >>> convert_salary(100, None, 'USD', '2022-01-01', rates), convert_salary(10, 35, 'RUR', '2022-01-01', rates)
+    (6066.0, 22.0)
+    >>> convert_salary(None, None, 'RUR', '2022-01-01', rates), convert_salary(100, 200, 'XXX', '2022-01-01', rates)
+    (None, None)
+    """
+    if currency is None or (salary_from is None and salary_to is None):
+        return None
+    rate = rates.rate(currency, published_at)
+    if not rate:
+        return None
+    salary_from = salary_from or 0
+    salary_to = salary_to or 0
+    average = 0.5 * (salary_from + salary_to) if salary_from and salary_to else max(salary_from, salary_to)
+    return float(round(average * rate, 0))
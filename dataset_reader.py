@@ -0,0 +1,158 @@
+import csv
+
+from categorical import categorical_columns
+from compressed_io import get_compression, open_binary, open_text
+from snapshot import open_snapshot
+
+# Схемы чтения для скриптов: какие столбцы нужны и с какими типами. Остальные столбцы pandas не разбирает вовсе
+schemas = {
+    # futures.py, multyprocessing.py, batch_statistic.py: статистика по чанкам
+    'chunks': {'usecols': ['name', 'salary_from', 'salary_to', 'published_at'],
+               'dtype': {'name': str, 'salary_from': 'float64', 'salary_to': 'float64', 'published_at': str}},
+    '331': {'usecols': ['salary_currency', 'published_at'],
+            'dtype': {'salary_currency': 'category', 'published_at': str}},
+    # 332.py и 341.py
+    'convert': {'usecols': ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'],
+                'dtype': {'name': str, 'salary_from': 'float64', 'salary_to': 'float64', 'salary_currency': 'category',
+                          'area_name': 'category', 'published_at': str}},
+    '342': {'usecols': ['name', 'salary', 'published_at'],
+            'dtype': {'name': str, 'salary': 'float64', 'published_at': str}},
+    '343': {'usecols': ['name', 'salary', 'area_name', 'published_at'],
+            'dtype': {'name': str, 'salary': 'float64', 'area_name': 'category', 'published_at': str}},
+    # main.py: разбиение по годам записывает все столбцы, поэтому задаются только типы
+    'split': {'usecols': None,
+              'dtype': dict({name: 'category' for name in categorical_columns},
+                            salary_from='float64', salary_to='float64', published_at=str)},
+}
+
+# Необязательные столбцы схем: читаются, только если они есть в файле
+optional_columns = {
+    # счетчики объема volume_sketch.py в futures.py и multyprocessing.py
+    'chunks': {'area_name': str, 'employer_name': str},
+}
+
+
+def pyarrow_available():
+    """
+    Проверяет, установлен ли pyarrow
+
+    Returns:
+        bool: True, если движок pyarrow доступен
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_read_options(schema, chunksize=None, engine=None):
+    """
+    Собирает аргументы pd.read_csv по схеме
+
+    Args:
+        schema (str or dict): Название схемы из schemas или сама схема
+        chunksize (int or None): Размер чанка в строках
+        engine (str or None): Движок pandas, по умолчанию pyarrow, если он есть и чтение не по чанкам
+
+    Returns:
+        dict: Аргументы pd.read_csv
+
+    >>> get_read_options('331', engine='c')['usecols']
+    ['salary_currency', 'published_at']
+    >>> get_read_options('331', chunksize=1000)['engine']
+    'c'
+    """
+    schema = schemas[schema] if isinstance(schema, str) else schema
+    if engine is None:
+        # pyarrow не умеет читать по чанкам
+        engine = 'pyarrow' if chunksize is None and pyarrow_available() else 'c'
+    options = {'usecols': schema['usecols'], 'dtype': schema['dtype'], 'engine': engine}
+    if chunksize is not None:
+        options['chunksize'] = chunksize
+    return options
+
+
+def read_header(file_name):
+    """
+    Читает заголовки файла или его снимка
+
+    Args:
+        file_name (str): Название csv файла
+
+    Returns:
+        list: Названия столбцов
+    """
+    snapshot = open_snapshot(file_name)
+    if snapshot is not None:
+        return list(snapshot.header)
+    with open_text(file_name, encoding='utf-8-sig', newline='') as file:
+        return next(csv.reader(file), [])
+
+
+def with_optional_columns(file_name, schema):
+    """
+    Дополняет схему необязательными столбцами из optional_columns, которые есть в файле
+
+    Args:
+        file_name (str): Название csv файла
+        schema (str): Название схемы из schemas
+
+    Returns:
+        dict: Схема для read_dataset
+    """
+    header = read_header(file_name)
+    present = dict([(name, dtype) for name, dtype in optional_columns.get(schema, {}).items() if name in header])
+    return {'usecols': schemas[schema]['usecols'] + list(present), 'dtype': dict(schemas[schema]['dtype'], **present)}
+
+
+def read_dataset(file_name, schema, engine=None, use_snapshot=True):
+    """
+    Центральная функция чтения вакансий: только нужные столбцы, с заданными типами.
+    Если для файла построен снимок (snapshot.py), столбцы берутся из него.
+    Сжатый файл распаковывается в фоновом потоке параллельно с разбором
+
+    Args:
+        file_name (str): Название csv файла
+        schema (str or dict): Название схемы из schemas или сама схема
+        engine (str or None): Движок pandas
+        use_snapshot (bool): Использовать ли снимок, если он есть
+
+    Returns:
+        DataFrame: Данные
+    """
+    options = get_read_options(schema, engine=engine)
+    snapshot = open_snapshot(file_name) if use_snapshot else None
+    if snapshot is not None:
+        usecols = options['usecols']
+        return snapshot.to_frame([name for name in snapshot.header if usecols is None or name in usecols])
+
+    import pandas as pd
+
+    if get_compression(file_name) is None:
+        return pd.read_csv(file_name, **options)
+    with open_binary(file_name) as file:
+        return pd.read_csv(file, **options)
+
+
+def iter_dataset(file_name, schema, chunksize=100000):
+    """
+    Читает файл по частям, чтобы обрабатывать файлы больше оперативной памяти
+
+    Args:
+        file_name (str): Название csv файла
+        schema (str or dict): Название схемы из schemas или сама схема
+        chunksize (int): Размер части в строках
+
+    Returns:
+        iterator: DataFrame по chunksize строк
+    """
+    import pandas as pd
+
+    options = get_read_options(schema, chunksize=chunksize)
+    if get_compression(file_name) is None:
+        with pd.read_csv(file_name, **options) as reader:
+            yield from reader
+        return
+    with open_binary(file_name) as file, pd.read_csv(file, **options) as reader:
+        yield from reader
@@ -0,0 +1,326 @@
+import csv
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+from compressed_io import open_output, open_text, strip_compression
+from metrics import span
+
+# Удаление дубликатов вакансий: пересекающиеся окна date_from/date_to и повторные выгрузки 333.py,
+# пересекающиеся чанки. Ключ вакансии - id, если он есть, иначе хеш нормализованных
+# (name, employer_name, area_name, published_at, зарплата). Ключи - 64-битные хеши blake2b;
+# когда их становится больше memory_keys, множество сбрасывается на диск отсортированным массивом,
+# и следующие строки проверяются по нему бинарным поиском, так что память ограничена и для файлов больше RAM.
+# Включается для DataSet.get_statistic переменной VACANCY_DEDUP=1
+ENVIRONMENT_VARIABLE = 'VACANCY_DEDUP'
+
+# Около 60 МБ на множество в памяти
+default_memory_keys = 1000000
+batch_size = 10000
+content_fields = ('name', 'employer_name', 'area_name', 'published_at')
+salary_fields = ('salary', 'salary_from', 'salary_to', 'salary_currency')
+number_fields = {'salary', 'salary_from', 'salary_to'}
+
+
+def enabled():
+    return os.environ.get(ENVIRONMENT_VARIABLE, '') not in ('', '0')
+
+
+def normalize_text(value):
+    """
+    Приводит текст к виду, в котором совпадают одинаковые вакансии разных выгрузок
+
+    >>> normalize_text('  Python   Developer '), normalize_text(None)
+    ('python developer', '')
+    """
+    if value is None:
+        return ''
+    return ' '.join(str(value).split()).casefold()
+
+
+def normalize_number(value):
+    """
+    >>> normalize_number('100'), normalize_number('100.0'), normalize_number(' 99.5'), normalize_number('')
+    ('100', '100', '99.5', '')
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return normalize_text(value)
+    return repr(int(number)) if number.is_integer() else repr(number)
+
+
+def get_normalizer(field):
+    return normalize_number if field in number_fields else normalize_text
+
+
+def hash_key(parts):
+    digest = hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class SpillingKeySet:
+    """
+    Множество 64-битных ключей, которое при переполнении сбрасывается на диск
+
+    Attributes:
+        memory_keys (int): Сколько ключей держать в памяти до сброса
+        memory (set): Ключи в памяти
+        runs (list): Сброшенные на диск отсортированные массивы ключей (numpy.memmap)
+        directory (str or None): Временная директория для сброшенных массивов
+    """
+    def __init__(self, memory_keys=default_memory_keys, directory=None):
+        self.memory_keys = memory_keys
+        self.memory = set()
+        self.runs = []
+        self.parent = directory
+        self.directory = None
+
+    def __len__(self):
+        return len(self.memory) + sum(len(run) for run in self.runs)
+
+    def add_new(self, keys):
+        """
+        Добавляет ключи по порядку
+
+        Args:
+            keys (list): Ключи
+
+        Returns:
+            list: Для каждого ключа True, если его еще не было (в том числе среди предыдущих ключей списка)
+
+        >>> keys = SpillingKeySet(memory_keys=2)
+        >>> keys.add_new([1, 2, 1]), keys.add_new([3, 2, 4]), len(keys.runs), len(keys)
+        ([True, True, False], [True, False, True], 2, 4)
+        >>> keys.add_new([4, 1, 5])
+        [False, False, True]
+        >>> keys.close()
+        """
+        on_disk = self.find_on_disk(keys) if self.runs else None
+        memory = self.memory
+        result = []
+        for index, key in enumerate(keys):
+            is_new = key not in memory and not (on_disk is not None and on_disk[index])
+            if is_new:
+                memory.add(key)
+            result.append(is_new)
+        if len(memory) >= self.memory_keys:
+            self.spill()
+        return result
+
+    def find_on_disk(self, keys):
+        import numpy as np
+
+        keys = np.fromiter(keys, dtype=np.uint64, count=len(keys))
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            found |= run[positions] == keys
+        return found
+
+    def spill(self):
+        import numpy as np
+
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='dedup_', dir=self.parent)
+        keys = np.fromiter(self.memory, dtype=np.uint64, count=len(self.memory))
+        keys.sort()
+        file_name = os.path.join(self.directory, '{0}.keys'.format(len(self.runs)))
+        keys.tofile(file_name)
+        self.runs.append(np.memmap(file_name, dtype=np.uint64, mode='r'))
+        self.memory = set()
+
+    def close(self):
+        self.runs = []
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+
+class Deduplicator:
+    """
+    Потоковый фильтр дубликатов строк csv
+
+    Attributes:
+        keys (SpillingKeySet): Ключи уже пропущенных вакансий
+        rows (int): Сколько строк проверено
+        duplicates (int): Сколько строк отброшено как дубликаты
+    """
+    def __init__(self, memory_keys=default_memory_keys, directory=None):
+        self.keys = SpillingKeySet(memory_keys, directory)
+        self.rows = 0
+        self.duplicates = 0
+
+    @staticmethod
+    def key_function(header):
+        """
+        Строит функцию ключа строки для заголовков файла
+
+        Args:
+            header (list or None): Заголовки для строк-списков, None - строки-словари
+
+        Returns:
+            function: Строка -> 64-битный ключ
+
+        >>> key = Deduplicator.key_function(['name', 'salary_from', 'area_name'])
+        >>> key(['Python  developer', '100.0', 'Москва']) == key(['python developer', '100', 'Москва'])
+        True
+        >>> key = Deduplicator.key_function(None)
+        >>> key({'id': '7', 'name': 'a'}) == key({'id': '7', 'name': 'b'}), key({'id': '', 'name': 'a'}) == key({'name': 'a'})
+        (True, True)
+        """
+        fields = [field for field in content_fields + salary_fields if header is None or field in header]
+        if header is None:
+            normalizers = [(field, get_normalizer(field)) for field in fields]
+
+            def key(row):
+                vacancy_id = row.get('id')
+                if vacancy_id:
+                    return hash_key(['id', vacancy_id])
+                return hash_key([normalizer(row.get(field)) for field, normalizer in normalizers])
+            return key
+        normalizers = [(header.index(field), get_normalizer(field)) for field in fields]
+        id_index = header.index('id') if 'id' in header else None
+
+        def key(row):
+            if id_index is not None and row[id_index]:
+                return hash_key(['id', row[id_index]])
+            return hash_key([normalizer(row[index]) for index, normalizer in normalizers])
+        return key
+
+    def filter(self, rows, header=None):
+        """
+        Пропускает только первые вхождения вакансий, сохраняя порядок
+
+        Args:
+            rows (iterable): Строки-списки с заголовками header или строки-словари
+            header (list or None): Заголовки, None - строки-словари
+
+        Returns:
+            iterator: Строки без дубликатов
+        """
+        key = self.key_function(header)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield from self.filter_batch(batch, key)
+                batch = []
+        if batch:
+            yield from self.filter_batch(batch, key)
+
+    def filter_batch(self, batch, key):
+        is_new = self.keys.add_new([key(row) for row in batch])
+        self.rows += len(batch)
+        unique = [row for row, new in zip(batch, is_new) if new]
+        self.duplicates += len(batch) - len(unique)
+        return unique
+
+    def report(self):
+        return 'Удалено дубликатов: {0} из {1} строк'.format(self.duplicates, self.rows)
+
+    def close(self):
+        self.keys.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+
+def make_output_names(file_names):
+    """
+    Подбирает имена выходных файлов: имя входного файла, а если оно совпадает с именем файла из другой
+    директории (h1/2007.csv и h2/2007.csv) - с префиксом директории, при новом совпадении - с номером файла
+
+    Args:
+        file_names (list): Названия входных файлов
+
+    Returns:
+        list: Имена выходных файлов в том же порядке
+
+    >>> make_output_names(['h1/2007.csv', 'h2/2007.csv', 'h2/2008.csv', 'a/x/2009.csv', 'b/x/2009.csv'])
+    ['h1_2007.csv', 'h2_2007.csv', '2008.csv', 'x_2009.csv', '4_x_2009.csv']
+    """
+    names = [os.path.basename(file_name) for file_name in file_names]
+    counts = {}
+    for name in names:
+        counts[name] = counts.get(name, 0) + 1
+    result = []
+    used = set()
+    for index, (file_name, name) in enumerate(zip(file_names, names)):
+        if counts[name] > 1:
+            name = '{0}_{1}'.format(os.path.basename(os.path.dirname(os.path.abspath(file_name))), name)
+        if name in used:
+            name = '{0}_{1}'.format(index, name)
+        used.add(name)
+        result.append(name)
+    return result
+
+
+def deduplicate_files(file_names, output_directory, memory_keys=default_memory_keys):
+    """
+    Удаляет дубликаты в наборе файлов, например в пересекающихся чанках: вакансия остается в первом файле,
+    где встретилась. Файлы записываются в output_directory с теми же именами (см. make_output_names)
+
+    Args:
+        file_names (list): Названия csv файлов (можно сжатых)
+        output_directory (str): Директория для файлов без дубликатов
+        memory_keys (int): Ключей в памяти до сброса на диск
+
+    Returns:
+        Deduplicator: Фильтр со счетчиками строк и дубликатов
+
+    Raises:
+        ValueError: Выходной файл совпадает с входным или с уже записанным в этом запуске
+    """
+    output_names = [os.path.join(output_directory, name) for name in make_output_names(file_names)]
+    paths = [os.path.abspath(name) for name in output_names]
+    if len(set(paths)) < len(paths) or set(paths) & set(os.path.abspath(name) for name in file_names):
+        raise ValueError('Файлы без дубликатов перезаписали бы входные или друг друга: ' + output_directory)
+    os.makedirs(output_directory, exist_ok=True)
+    with Deduplicator(memory_keys, output_directory) as deduplicator:
+        for file_name, output_name in zip(file_names, output_names):
+            with span('filter') as stage:
+                rows_before = deduplicator.rows
+                duplicates_before = deduplicator.duplicates
+                with open_text(file_name, encoding='utf-8-sig', newline='') as file:
+                    reader = csv.reader(file)
+                    header = next(reader, [])
+                    with open_output(output_name, encoding='utf-8-sig', newline='') as output:
+                        writer = csv.writer(output)
+                        writer.writerow(header)
+                        writer.writerows(deduplicator.filter(
+                            (row for row in reader if len(row) == len(header)), header))
+                stage.rows_in = deduplicator.rows - rows_before
+                stage.rows_out = stage.rows_in - (deduplicator.duplicates - duplicates_before)
+    return deduplicator
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Удаление дубликатов вакансий в csv файлах или директории чанков')
+    parser.add_argument('paths', nargs='+', help='csv файлы или директории с ними')
+    parser.add_argument('-o', '--output', required=True, help='директория для файлов без дубликатов')
+    parser.add_argument('--memory-keys', type=int, default=default_memory_keys,
+                        help='ключей в памяти до сброса на диск')
+    args = parser.parse_args()
+
+    names = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            names += sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if strip_compression(name).endswith('.csv'))
+        else:
+            names.append(path)
+    if not names:
+        sys.exit('Нет csv файлов')
+    try:
+        print(deduplicate_files(names, args.output, args.memory_keys).report())
+    except ValueError as error:
+        sys.exit(str(error))
@@ -0,0 +1,135 @@
+from itertools import chain, islice
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Font, NamedStyle, Side
+from openpyxl.utils import get_column_letter
+
+
+def create_named_styles():
+    """
+    Создает общие именованные стили отчета, один объект стиля на всю книгу
+
+    Returns:
+        list: Стили 'header', 'cell' и 'percent'
+    """
+    thin = Side(border_style='thin', color='00000000')
+    border = Border(left=thin, bottom=thin, right=thin, top=thin)
+
+    header = NamedStyle(name='header', font=Font(bold=True), border=border)
+    cell = NamedStyle(name='cell', border=border)
+    percent = NamedStyle(name='percent', border=border, number_format='0.00%')
+    return [header, cell, percent]
+
+
+class StreamingExcelReport:
+    """
+    Формирует xlsx отчет в потоковом режиме (write-only книга openpyxl): строки сразу уходят в файл,
+    поэтому память не растет с количеством строк
+
+    Attributes:
+        wb (Workbook): Книга в режиме write-only
+        max_width (int): Максимальная ширина столбца
+        sample_size (int): Сколько первых строк детального листа учитывается при расчете ширины
+    """
+    def __init__(self, max_width=60, sample_size=1000):
+        """
+        Инициализирует объект StreamingExcelReport
+
+        Args:
+            max_width (int): Максимальная ширина столбца
+            sample_size (int): Сколько первых строк детального листа учитывается при расчете ширины
+        """
+        self.wb = Workbook(write_only=True)
+        self.max_width = max_width
+        self.sample_size = sample_size
+        for style in create_named_styles():
+            self.wb.add_named_style(style)
+
+    def make_row(self, ws, row, styles, column_widths):
+        """
+        Создает ячейки строки с общими стилями и за тот же проход обновляет ширины столбцов
+
+        Args:
+            ws (WriteOnlyWorksheet): Лист
+            row (list): Значения строки
+            styles (list): Имя стиля для каждого столбца, None - без стиля
+            column_widths (list): Текущие ширины столбцов
+
+        Returns:
+            list: Ячейки строки
+        """
+        cells = []
+        for i, value in enumerate(row):
+            cell = WriteOnlyCell(ws, value)
+            if i < len(styles) and styles[i] is not None:
+                cell.style = styles[i]
+            cells.append(cell)
+            width = len(str(value))
+            if len(column_widths) > i:
+                if width > column_widths[i]:
+                    column_widths[i] = width
+            else:
+                column_widths.append(width)
+        return cells
+
+    def set_widths(self, ws, column_widths):
+        """
+        Устанавливает ширины столбцов, в write-only режиме это нужно сделать до первой строки
+
+        Args:
+            ws (WriteOnlyWorksheet): Лист
+            column_widths (list): Ширины столбцов
+        """
+        for i, column_width in enumerate(column_widths, 1):
+            ws.column_dimensions[get_column_letter(i)].width = min(column_width, self.max_width) + 2
+
+    def add_sheet(self, title, header, rows, styles=None):
+        """
+        Добавляет лист, строки которого целиком помещаются в память (сводные таблицы)
+
+        Args:
+            title (str): Название листа
+            header (list): Заголовки столбцов
+            rows (list): Строки листа
+            styles (list or None): Имя стиля для каждого столбца, по умолчанию 'cell'
+        """
+        ws = self.wb.create_sheet(title)
+        styles = styles or ['cell'] * len(header)
+        header_styles = ['header' if style is not None else None for style in styles]
+        column_widths = []
+        cells = [self.make_row(ws, header, header_styles, column_widths)]
+        cells += [self.make_row(ws, row, styles, column_widths) for row in rows]
+        self.set_widths(ws, column_widths)
+        for row in cells:
+            ws.append(row)
+
+    def add_detail_sheet(self, title, header, rows, styles=None):
+        """
+        Добавляет детальный лист с произвольным количеством строк. Ширины считаются по заголовку
+        и первым sample_size строкам, остальные строки записываются по одной
+
+        Args:
+            title (str): Название листа
+            header (list): Заголовки столбцов
+            rows (iterable): Строки листа, может быть генератором
+            styles (list or None): Имя стиля для каждого столбца, по умолчанию 'cell'
+        """
+        ws = self.wb.create_sheet(title)
+        styles = styles or ['cell'] * len(header)
+        rows = iter(rows)
+        column_widths = []
+        sample = [self.make_row(ws, header, ['header'] * len(header), column_widths)]
+        sample += [self.make_row(ws, row, styles, column_widths) for row in islice(rows, self.sample_size)]
+        self.set_widths(ws, column_widths)
+        for row in chain(sample, (self.make_row(ws, row, styles, []) for row in rows)):
+            ws.append(row)
+
+    def save(self, file_name):
+        """
+        Сохраняет книгу. Книгу в режиме write-only можно сохранить только один раз
+
+        Args:
+            file_name (str): Имя xlsx файла
+        """
+        self.wb.save(filename=file_name)
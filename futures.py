@@ -1,7 +1,13 @@
-import cProfile
 import concurrent.futures
-import pandas as pd
-import os
+import math
+import sys
+
+from dataset_reader import read_dataset, with_optional_columns
+from incremental import get_chunk_analytics, state_directory
+from metrics import span
+from salary_sketch import KLLSketch, collect_chunk_quantiles
+from snapshot import list_sources
+from volume_sketch import VolumeStatistic, collect_chunk_volumes, print_volume_statistic
 
 
 class DataSet:
@@ -10,38 +16,46 @@ class DataSet:
 		directory (str): Название директории с csv-файлами (чанками)
 		profession (str): Название выбранной профессии
 		raw_data list[tuple]: Список кортежей с необработанными данными
+		with_volume (bool): Считать ли работодателей и самые частые города (volume_sketch.py)
 	"""
 
-    def __init__(self, directory, profession):
+    def __init__(self, directory, profession, with_volume=False):
         """Инициализирует объект DataSet
 		Attributes:
 			directory (str): Название директории с csv-файлами (чанками)
 			profession (str): Название выбранной профессии
+			with_volume (bool): Считать ли работодателей и самые частые города
 		"""
         self.directory = directory
         self.profession = profession
         self.raw_data = []
+        self.with_volume = with_volume
 
     def get_analytics(self):
         """Достает все файлы из директории, анализирует и складывает в поле raw_data"""
         with concurrent.futures.ProcessPoolExecutor() as ex:
-            for res_chunk in ex.map(self.get_data_from_chunk, os.listdir(self.directory)):
+            for res_chunk in ex.map(self.get_data_from_chunk, list_sources(self.directory)):
                 self.raw_data.append(res_chunk)
 
-        def get_converted_data(self):
-            """Берет сырые данные из поля analyzed_data и разбивает их на словари, выводит их на экран
-    		В словаре ключ - год, значение параметр аналитики (средняя зарплата, количество вакансий и т.д.)"""
-            dct_years_salary, dct_years_count, dct_years_salary_filt, dct_years_count_filt = {}, {}, {}, {}
-            for year, average_salary, count_by_year, average_salary_filt, count_by_year_filt in self.raw_data:
-                dct_years_salary[year] = average_salary
-                dct_years_count[year] = count_by_year
-                dct_years_salary_filt[year] = average_salary_filt
-                dct_years_count_filt[year] = count_by_year_filt
-            print(f'Динамика уровня зарплат по годам: {dct_years_salary}')
-            print(f'Динамика количества вакансий по годам: {dct_years_count}')
-            print(f'Динамика уровня зарплат по годам для выбранной профессии: {dct_years_salary_filt}')
-            print(f'Динамика количества вакансий по годам для выбранной профессии: {dct_years_count_filt}')
-
+    def get_converted_data(self):
+        """Берет сырые данные из поля analyzed_data и разбивает их на словари, выводит их на экран
+		В словаре ключ - год, значение параметр аналитики (средняя зарплата, количество вакансий и т.д.)"""
+        dct_years_salary, dct_years_count, dct_years_salary_filt, dct_years_count_filt = {}, {}, {}, {}
+        for year, average_salary, count_by_year, average_salary_filt, count_by_year_filt, *_ in self.raw_data:
+            dct_years_salary[year] = average_salary
+            dct_years_count[year] = count_by_year
+            dct_years_salary_filt[year] = average_salary_filt
+            dct_years_count_filt[year] = count_by_year_filt
+        print(f'Динамика уровня зарплат по годам: {dct_years_salary}')
+        print(f'Динамика количества вакансий по годам: {dct_years_count}')
+        print(f'Динамика уровня зарплат по годам для выбранной профессии: {dct_years_salary_filt}')
+        print(f'Динамика количества вакансий по годам для выбранной профессии: {dct_years_count_filt}')
+        # медианы и 90-е перцентили - из скетчей чанков, слитых в основном процессе
+        quantiles = collect_chunk_quantiles(self.raw_data)
+        print(f'Медиана и 90-й перцентиль зарплат по годам: {quantiles["years"]}')
+        print(f'Медиана и 90-й перцентиль зарплат по годам для выбранной профессии: {quantiles["names"]}')
+        if self.with_volume:
+            print_volume_statistic(collect_chunk_volumes(self.raw_data))
 
     def get_data_from_chunk(self, file_name):
         """Возвращает параметры аналитики одного файла
@@ -53,28 +67,48 @@ class DataSet:
 			count (int): Количество вакансий
 			average_salary_profession (int): Cредняя зарплата для выбранной профессии
 			count_profession (int): Количество вакансий для выбранной профессии
+			sketch (KLLSketch): Скетч зарплат чанка для медиан и 90-х перцентилей
+			sketch_profession (KLLSketch): Скетч зарплат вакансий профессии
+			volume (VolumeStatistic): Только при with_volume - счетчики объема чанка для слияния
 		"""
-        data = pd.read_csv(f'{self.directory}/{file_name}')
-        vac = data['name'].str.contains(self.profession)
-        vacancy_data = data[vac]
-        average_salary = round(self.get_average(data))
-        average_salary_profession = round(self.get_average(vacancy_data))
-        count = data.shape[0]
-        count_profession = vacancy_data.shape[0]
-        year = data['published_at'].apply(lambda x: x[:4]).unique()[0]
-        return year, average_salary, count, average_salary_profession, count_profession
+        path = f'{self.directory}/{file_name}'
+        directory = state_directory(path)
+        if directory is not None:
+            return get_chunk_analytics(path, self.profession, directory, self.with_volume)
+        with span('read') as stage:
+            data = read_dataset(path, with_optional_columns(path, 'chunks') if self.with_volume else 'chunks')
+            stage.rows_out = data.shape[0]
+        with span('aggregate', data.shape[0]) as stage:
+            vac = data['name'].str.contains(self.profession)
+            vacancy_data = data[vac]
+            average_salary = round(self.get_average(data))
+            average_salary_profession = round(self.get_average(vacancy_data))
+            count = data.shape[0]
+            count_profession = vacancy_data.shape[0]
+            year = data['published_at'].apply(lambda x: x[:4]).unique()[0]
+            salary = (data['salary_from'] + data['salary_to']) * 0.5
+            sketch, sketch_profession = KLLSketch(), KLLSketch()
+            sketch.update(salary.dropna().tolist())
+            sketch_profession.update(salary[vac].dropna().tolist())
+            if self.with_volume:
+                volume = VolumeStatistic()
+                volume.add_frame(data)
+            stage.rows_out = 1
+        result = year, average_salary, count, average_salary_profession, count_profession, sketch, sketch_profession
+        return result + (volume,) if self.with_volume else result
 
     def get_average(self, data):
-        return data.apply(lambda x: (x['salary_from'] + x['salary_to']) * 0.5, axis=1).mean()
+        # чанк без вакансий профессии или без зарплат дает 0, как в batch_statistic.py
+        if data.empty:
+            return 0
+        average = data.apply(lambda x: (x['salary_from'] + x['salary_to']) * 0.5, axis=1).mean()
+        return 0 if math.isnan(average) else average
 
 
 if __name__ == '__main__':
     directory = 'split_files'
     profession = 'Аналитик'
-    profile = cProfile.Profile()
-    profile.enable()
-    data_analitics = DataSet(directory, profession)
+    # --volume: работодатели и города счетчиками volume_sketch.py (нужен столбец employer_name в чанках)
+    data_analitics = DataSet(directory, profession, with_volume='--volume' in sys.argv[1:])
     data_analitics.get_analytics()
-    data_analitics.get_converted_data()
-    profile.disable()
-    profile.print_stats(1)
\ No newline at end of file
+    data_analitics.get_converted_data()
\ No newline at end of file
@@ -0,0 +1,474 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+
+from compressed_io import get_compression
+from metrics import span
+from salary_sketch import KLLSketch, SalaryQuantiles
+from volume_sketch import VolumeStatistic
+
+# Инкрементальная статистика для csv файлов, в которые только дописывают новые вакансии.
+# Рядом с агрегатами хранится смещение конца последней обработанной строки и хеши начала файла
+# и блока перед смещением. Следующий запуск разбирает только дописанный хвост и добавляет его к агрегатам.
+# Если начало файла изменилось или файл стал короче смещения, статистика пересчитывается с нуля.
+# Суммы накапливаются в том же порядке, что и при полном проходе, поэтому результат совпадает с полным пересчетом
+ENVIRONMENT_VARIABLE = 'VACANCY_INCREMENTAL'
+
+state_version = 4
+head_size = 1 << 16
+tail_size = 1 << 12
+line_endings = (b'\n', b'\r')
+
+
+class ByteRange(io.RawIOBase):
+    """
+    Бинарный поток части файла [start, end)
+
+    Attributes:
+        file (file): Открытый бинарный файл
+        remaining (int): Сколько байт осталось прочитать
+    """
+    def __init__(self, file_name, start, end):
+        super().__init__()
+        self.file = open(file_name, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        read = self.file.readinto(memoryview(buffer)[:size])
+        self.remaining -= read
+        return read
+
+    def close(self):
+        if not self.closed:
+            self.file.close()
+        super().close()
+
+
+def digest_range(file_name, start, end):
+    """
+    Считает хеш части файла
+
+    Args:
+        file_name (str): Название файла
+        start (int): Начало
+        end (int): Конец, не включительно
+
+    Returns:
+        str: blake2b хеш
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with ByteRange(file_name, start, end) as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_records_end(file_name, start=0):
+    """
+    Находит конец последней полной записи после start: недописанная последняя запись останется
+    до следующего запуска. Перевод строки внутри поля в кавычках концом записи не считается:
+    до конца записи число кавычек от start четное
+
+    Args:
+        file_name (str): Название файла
+        start (int): Начало записи, с которого разбирается хвост
+
+    Returns:
+        int: Смещение после последней полной записи
+
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile('wb', suffix='.csv', delete=False) as file:
+    ...     _ = file.write(b'a,b|1,"x|y"|2,3'.replace(b'|', bytes([10])))
+    >>> find_records_end(file.name), find_tail_end(file.name, 12)
+    (12, 15)
+    >>> with open(file.name, 'ab') as file:
+    ...     _ = file.write(b'|4,"z'.replace(b'|', bytes([10])))
+    >>> find_records_end(file.name), find_records_end(file.name, 12), find_tail_end(file.name, 16)
+    (16, 16, 16)
+    >>> os.remove(file.name)
+    """
+    size = os.path.getsize(file_name)
+    quotes = 0
+    with ByteRange(file_name, start, size) as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            quotes += block.count(b'"')
+    with open(file_name, 'rb') as file:
+        position, quotes_after = size, 0
+        while position > start:
+            block_start = max(start, position - tail_size)
+            file.seek(block_start)
+            block = file.read(position - block_start)
+            index = len(block)
+            while True:
+                index = max(block.rfind(ending, 0, index) for ending in line_endings)
+                if index < 0:
+                    break
+                if (quotes - quotes_after - block.count(b'"', index)) % 2 == 0:
+                    return block_start + index + 1
+            quotes_after += block.count(b'"')
+            position = block_start
+    return start
+
+
+def find_tail_end(file_name, end):
+    """
+    Проверяет хвост файла после последнего перевода строки: с четным числом кавычек он читается csv.reader
+    как полная запись (например, в файле без перевода строки в конце), но может быть и недописанной строкой,
+    поэтому учитывается только в результате текущего запуска и в сохраненное смещение не входит
+
+    Args:
+        file_name (str): Название файла
+        end (int): Конец последней полной записи из find_records_end
+
+    Returns:
+        int: Конец файла, если хвост можно разобрать, иначе end
+    """
+    size = os.path.getsize(file_name)
+    quotes = 0
+    with ByteRange(file_name, end, size) as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            quotes += block.count(b'"')
+    return size if size > end and quotes % 2 == 0 else end
+
+
+class StatisticState:
+    """
+    Агрегаты DataSet.get_statistic одной профессии: суммы и количества по годам и городам
+
+    Attributes:
+        vacancy_name (str): Профессия
+        years (dict): Год -> [сумма зарплат, количество]
+        names (dict): Год -> [сумма зарплат, количество] для вакансий профессии
+        cities (dict): Город -> [сумма зарплат, количество] в порядке первого появления
+        quantiles (SalaryQuantiles): Скетчи зарплат для медиан и 90-х перцентилей
+    """
+    kind = 'statistic'
+    # DataSet.csv_reader пропускает строки с пустыми ячейками
+    skip_incomplete = True
+
+    def __init__(self, vacancy_name, aggregates=None):
+        self.vacancy_name = vacancy_name
+        aggregates = aggregates or {}
+        self.years = {int(year): value for year, value in aggregates.get('years', [])}
+        self.names = {int(year): value for year, value in aggregates.get('names', [])}
+        self.cities = dict(aggregates.get('cities', []))
+        self.quantiles = SalaryQuantiles.from_dict(aggregates['quantiles']) if 'quantiles' in aggregates else SalaryQuantiles()
+
+    def params(self):
+        return [self.vacancy_name]
+
+    def key(self):
+        # зарплаты конвертируются по курсам get_vacancy_rates: другие курсы - другое состояние
+        from lab_2_1_3 import get_vacancy_rates
+
+        return self.params() + [get_vacancy_rates().key()]
+
+    def add(self, row):
+        from lab_2_1_3 import Vacancy
+
+        vacancy = Vacancy(row)
+        add_value(self.years, vacancy.year, vacancy.salary_average)
+        is_profession = vacancy.name.find(self.vacancy_name) != -1
+        if is_profession:
+            add_value(self.names, vacancy.year, vacancy.salary_average)
+        add_value(self.cities, vacancy.area_name, vacancy.salary_average)
+        self.quantiles.add(vacancy.year, vacancy.area_name, vacancy.salary_average, is_profession)
+
+    def aggregates(self):
+        return {'years': list(self.years.items()), 'names': list(self.names.items()),
+                'cities': list(self.cities.items()), 'quantiles': self.quantiles.to_dict()}
+
+    def result(self):
+        """
+        Собирает статистику в формате DataSet.get_statistic_with_quantiles
+
+        Returns:
+            tuple: Шесть словарей статистики
+            dict: Медианы и 90-е перцентили зарплат
+        """
+        from city_statistic import select_cities
+
+        salary = {year: int(total / count) for year, (total, count) in self.years.items()}
+        vacancies_number = {year: count for year, (_, count) in self.years.items()}
+        if self.names:
+            salary_by_name = {year: int(total / count) for year, (total, count) in self.names.items()}
+            number_by_name = {year: count for year, (_, count) in self.names.items()}
+        else:
+            salary_by_name = {year: 0 for year in self.years}
+            number_by_name = {year: 0 for year in self.years}
+        if self.cities:
+            counts = [count for _, count in self.cities.values()]
+            means = [total / count for total, count in self.cities.values()]
+            salary_by_city, share_by_city = select_cities(list(self.cities), counts, means, sum(counts))
+        else:
+            salary_by_city, share_by_city = {}, {}
+        stats = salary, vacancies_number, salary_by_name, number_by_name, salary_by_city, share_by_city
+        return stats, self.quantiles.result(salary_by_city)
+
+
+class ChunkState:
+    """
+    Агрегаты get_data_from_chunk из futures.py и multyprocessing.py для одного чанка
+
+    Attributes:
+        profession (str): Профессия, регулярное выражение как в str.contains
+        year (str or None): Год первой вакансии чанка
+        rows (int): Количество вакансий
+        salary (list): [сумма, количество] средних зарплат вакансий с обеими границами
+        profession_salary (list): То же для вакансий профессии
+        profession_rows (int): Количество вакансий профессии
+        sketch (KLLSketch): Скетч средних зарплат для медиан и 90-х перцентилей
+        profession_sketch (KLLSketch): То же для вакансий профессии
+        volume (VolumeStatistic or None): Счетчики объема, если они включены
+    """
+    kind = 'chunk'
+    # pandas оставляет строки с пустыми ячейками, зарплаты в них - NaN
+    skip_incomplete = False
+
+    def __init__(self, profession, with_volume=False, aggregates=None):
+        self.profession = profession
+        self.with_volume = with_volume
+        self.pattern = re.compile(profession)
+        aggregates = aggregates or {}
+        self.year = aggregates.get('year')
+        self.rows = aggregates.get('rows', 0)
+        self.salary = aggregates.get('salary', [0.0, 0])
+        self.profession_salary = aggregates.get('profession_salary', [0.0, 0])
+        self.profession_rows = aggregates.get('profession_rows', 0)
+        self.sketch = KLLSketch.from_dict(aggregates['sketch']) if 'sketch' in aggregates else KLLSketch()
+        self.profession_sketch = (KLLSketch.from_dict(aggregates['profession_sketch'])
+                                  if 'profession_sketch' in aggregates else KLLSketch())
+        self.volume = None
+        if with_volume:
+            self.volume = VolumeStatistic.from_dict(aggregates['volume']) if 'volume' in aggregates else VolumeStatistic()
+
+    def params(self):
+        return [self.profession, self.with_volume]
+
+    def key(self):
+        return self.params()
+
+    def add(self, row):
+        if self.year is None:
+            self.year = row['published_at'][:4]
+        self.rows += 1
+        is_profession = self.pattern.search(row['name']) is not None
+        self.profession_rows += is_profession
+        if row['salary_from'] and row['salary_to']:
+            salary = (float(row['salary_from']) + float(row['salary_to'])) * 0.5
+            add_total(self.salary, salary)
+            self.sketch.add(salary)
+            if is_profession:
+                add_total(self.profession_salary, salary)
+                self.profession_sketch.add(salary)
+        if self.volume is not None:
+            self.volume.add(row['area_name'], row.get('employer_name'))
+
+    def aggregates(self):
+        aggregates = {'year': self.year, 'rows': self.rows, 'salary': self.salary,
+                      'profession_salary': self.profession_salary, 'profession_rows': self.profession_rows,
+                      'sketch': self.sketch.to_dict(), 'profession_sketch': self.profession_sketch.to_dict()}
+        if self.volume is not None:
+            aggregates['volume'] = self.volume.to_dict()
+        return aggregates
+
+    def result(self):
+        """
+        Собирает результат в формате get_data_from_chunk
+
+        Returns:
+            tuple: Год, средняя зарплата, количество, средняя зарплата профессии, количество профессии,
+                скетчи зарплат и счетчики объема, если они включены
+        """
+        result = (self.year, round(mean(self.salary)), self.rows, round(mean(self.profession_salary)),
+                  self.profession_rows, self.sketch, self.profession_sketch)
+        return result + (self.volume,) if self.volume is not None else result
+
+
+def add_value(totals, key, value):
+    total = totals.get(key)
+    if total is None:
+        totals[key] = [value, 1]
+    else:
+        total[0] += value
+        total[1] += 1
+
+
+def add_total(total, value):
+    total[0] += value
+    total[1] += 1
+
+
+def mean(total):
+    return total[0] / total[1] if total[1] else 0
+
+
+def iter_rows(file_name, start, end, header=None, skip_incomplete=True):
+    """
+    Разбирает строки csv в диапазоне байт [start, end)
+
+    Args:
+        file_name (str): Название файла
+        start (int): Начало первой строки
+        end (int): Конец последней полной строки
+        header (list or None): Заголовки, None - первая строка диапазона (start == 0)
+        skip_incomplete (bool): Пропускать ли строки с пустыми ячейками
+
+    Returns:
+        list: Заголовки
+        iterator: Словари строк
+    """
+    file = io.TextIOWrapper(io.BufferedReader(ByteRange(file_name, start, end)),
+                            encoding='utf-8-sig' if start == 0 else 'utf-8', newline='')
+    reader = csv.reader(file)
+    if header is None:
+        header = next(reader, [])
+
+    def rows():
+        with file:
+            for row in reader:
+                if len(row) == len(header) and not (skip_incomplete and '' in row):
+                    yield dict(zip(header, row))
+    return header, rows()
+
+
+def state_path(directory, file_name, state):
+    key = json.dumps([os.path.abspath(file_name), state.kind, state.key()], ensure_ascii=False)
+    return os.path.join(directory, hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest() + '.json')
+
+
+def prefix_unchanged(file_name, saved):
+    """
+    Проверяет, что уже обработанная часть файла не менялась
+
+    Args:
+        file_name (str): Название файла
+        saved (dict): Сохраненное состояние
+
+    Returns:
+        bool: True, если файл не короче смещения и хеши начала и блока перед смещением совпали
+    """
+    offset = saved['offset']
+    if os.path.getsize(file_name) < offset:
+        return False
+    head_end = min(head_size, offset)
+    tail_start = max(head_end, offset - tail_size)
+    return (digest_range(file_name, 0, head_end) == saved['head_hash'] and
+            digest_range(file_name, tail_start, offset) == saved['tail_hash'])
+
+
+def update(file_name, state, directory):
+    """
+    Добавляет к сохраненным агрегатам дописанный хвост файла и сохраняет их
+
+    Args:
+        file_name (str): Несжатый csv файл, в который только дописывают
+        state (StatisticState or ChunkState): Пустые агрегаты нужного вида
+        directory (str): Директория для сохраненных состояний
+
+    Returns:
+        StatisticState or ChunkState: Агрегаты по всему файлу
+        int: Сколько байт разобрано в этом запуске
+    """
+    path = state_path(directory, file_name, state)
+    saved = None
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as file:
+            saved = json.load(file)
+    start, header = 0, None
+    if saved is not None and saved['version'] == state_version and prefix_unchanged(file_name, saved):
+        state = type(state)(*state.params(), saved['aggregates'])
+        start, header = saved['offset'], saved['header']
+
+    end = find_records_end(file_name, start)
+    if end > start:
+        with span('aggregate') as stage:
+            header, rows = iter_rows(file_name, start, end, header, state.skip_incomplete)
+            count = 0
+            for row in rows:
+                state.add(row)
+                count += 1
+            stage.rows_in = count
+
+    head_end = min(head_size, end)
+    os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump({'version': state_version, 'offset': end, 'header': header,
+                   'head_hash': digest_range(file_name, 0, head_end),
+                   'tail_hash': digest_range(file_name, max(head_end, end - tail_size), end),
+                   'aggregates': state.aggregates()}, file, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+    tail_end = find_tail_end(file_name, end)
+    if tail_end > end:
+        # хвост без перевода строки добавляется уже после сохранения: если строку еще дописывают,
+        # следующий запуск разберет ее целиком
+        with span('aggregate') as stage:
+            header, rows = iter_rows(file_name, end, tail_end, header, state.skip_incomplete)
+            count = 0
+            for row in rows:
+                state.add(row)
+                count += 1
+            stage.rows_in = count
+    return state, max(0, tail_end - start)
+
+
+def state_directory(file_name):
+    """
+    Возвращает директорию состояний, если инкрементальный режим включен переменной VACANCY_INCREMENTAL
+    и файл не сжат (смещения в сжатом потоке не позволяют дочитать хвост)
+
+    Args:
+        file_name (str): Название файла
+
+    Returns:
+        str or None: Директория или None
+    """
+    directory = os.environ.get(ENVIRONMENT_VARIABLE)
+    if not directory or get_compression(file_name) is not None:
+        return None
+    return directory
+
+
+def get_statistic(file_name, vacancy_name, directory):
+    """
+    Инкрементальный DataSet.get_statistic_with_quantiles. Скетчи квантилей продолжают заполняться
+    хвостом файла, поэтому медианы могут немного отличаться от полного пересчета в пределах точности скетча
+
+    Args:
+        file_name (str): Название csv файла
+        vacancy_name (str): Профессия
+        directory (str): Директория состояний
+
+    Returns:
+        tuple: Шесть словарей статистики
+        dict: Медианы и 90-е перцентили зарплат
+    """
+    return update(file_name, StatisticState(vacancy_name), directory)[0].result()
+
+
+def get_chunk_analytics(file_name, profession, directory, with_volume=False):
+    """
+    Инкрементальный get_data_from_chunk для futures.py и multyprocessing.py
+
+    Args:
+        file_name (str): Название csv файла (чанка)
+        profession (str): Профессия
+        directory (str): Директория состояний
+        with_volume (bool): Считать ли работодателей и самые частые города
+
+    Returns:
+        tuple: Год, средняя зарплата, количество, средняя зарплата профессии, количество профессии,
+            скетчи зарплат и счетчики объема при with_volume
+    """
+    return update(file_name, ChunkState(profession, with_volume), directory)[0].result()
@@ -1,13 +1,28 @@
 import csv
+import functools
 import pathlib
 
-import matplotlib.pyplot as plt
-import numpy as np
-import pdfkit
-from jinja2 import Environment, FileSystemLoader
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.utils import get_column_letter
+from categorical import CategoricalEncoder
+from city_statistic import CityStatistic
+from compressed_io import open_text
+from metrics import span
+
+# matplotlib, numpy, pdfkit, jinja2 и openpyxl импортируются внутри методов Report, а кеш результатов -
+# внутри get_statistic_with_quantiles, чтобы режим статистики не платил за их загрузку до первой подсказки
+
+# Модули, от кода которых зависит результат get_statistic: их правка сбрасывает кеш результатов
+statistic_modules = (__name__, 'city_statistic', 'categorical', 'snapshot', 'incremental', 'salary_sketch',
+                     'currency_rates', 'dedup')
+
+
+@functools.lru_cache(maxsize=None)
+def get_vacancy_rates():
+    # По умолчанию курсы постоянные; VACANCY_RATES задает csv курсов по месяцам или дням, тогда берется курс
+    # на дату публикации, а currency_to_rub остается для валют, которых в файле нет.
+    # Курсы загружаются при первой вакансии, а не при импорте, чтобы не задерживать первую подсказку
+    from currency_rates import get_rates
+
+    return get_rates('static', Vacancy.currency_to_rub)
 
 
 class Vacancy:
@@ -21,7 +36,8 @@ class Vacancy:
         self.salary_from = int(float(vacancy['salary_from']))
         self.salary_to = int(float(vacancy['salary_to']))
         self.salary_currency = vacancy['salary_currency']
-        self.salary_average = self.currency_to_rub[self.salary_currency] * (self.salary_from + self.salary_to) / 2
+        self.salary_average = get_vacancy_rates().rate(self.salary_currency, vacancy['published_at']) * \
+            (self.salary_from + self.salary_to) / 2
         self.area_name = vacancy['area_name']
         self.year = int(vacancy['published_at'][:4])
 
@@ -46,28 +62,116 @@ class DataSet:
         return new_dictionary
 
     def csv_reader(self):
-        with open(self.file_name, mode='r', encoding='utf-8-sig') as file:
+        from snapshot import open_snapshot
+
+        snapshot = open_snapshot(self.file_name)
+        if snapshot is not None:
+            yield from snapshot.iter_dicts()
+            return
+        with open_text(self.file_name, encoding='utf-8-sig') as file:
             reader = csv.reader(file)
             header = next(reader)
             header_length = len(header)
+            encoder = CategoricalEncoder(header)
             for row in reader:
                 if '' not in row and len(row) == header_length:
-                    yield dict(zip(header, row))
+                    yield dict(zip(header, encoder.intern_row(row)))
 
     def get_statistic(self):
+        return self.get_statistic_with_quantiles()[0]
+
+    def get_statistic_with_quantiles(self):
+        # медианы и 90-е перцентили считаются в том же проходе скетчами salary_sketch.py
+        from dedup import enabled
+        from result_cache import cached_call
+
+        if enabled():
+            # отчет о дубликатах хранится в кеше вместе со статистикой, чтобы печататься и при попадании в кеш
+            stats, quantiles, report = cached_call(
+                'lab_2_1_3.DataSet.get_deduplicated_statistic', self.file_name, self.compute_deduplicated_statistic,
+                (self.vacancy_name, get_vacancy_rates().key()), statistic_modules)
+            print(report)
+            return stats, quantiles
+        return cached_call('lab_2_1_3.DataSet.get_statistic', self.file_name, self.compute_statistic,
+                           (self.vacancy_name, get_vacancy_rates().key()), statistic_modules)
+
+    def compute_statistic(self):
+        from incremental import get_statistic, state_directory
+
+        directory = state_directory(self.file_name)
+        if directory is not None:
+            return get_statistic(self.file_name, self.vacancy_name, directory)
+        return self.aggregate(self.csv_reader())
+
+    def compute_deduplicated_statistic(self):
+        from dedup import Deduplicator
+
+        # состояние incremental.py не хранит ключи вакансий, поэтому с VACANCY_DEDUP файл читается целиком;
+        # with удаляет сброшенные на диск ключи и при исключении
+        with Deduplicator() as deduplicator:
+            stats, quantiles = self.aggregate(deduplicator.filter(self.csv_reader()))
+        return stats, quantiles, deduplicator.report()
+
+    def aggregate(self, vacancies):
+        # скетчи квантилей импортируются здесь, чтобы не задерживать первую подсказку
+        from salary_sketch import SalaryQuantiles
+
         salary = {}
         salary_of_vacancy_name = {}
-        salary_city = {}
-        count_of_vacancies = 0
-
-        for vacancy_dictionary in self.csv_reader():
-            vacancy = Vacancy(vacancy_dictionary)
-            self.increment(salary, vacancy.year, [vacancy.salary_average])
+        cities = CityStatistic()
+        quantiles = SalaryQuantiles()
+
+        # строки читаются потоком, поэтому чтение входит в этап aggregate
+        with span('aggregate') as stage:
+            rows = 0
+            for vacancy_dictionary in vacancies:
+                vacancy = Vacancy(vacancy_dictionary)
+                self.increment(salary, vacancy.year, [vacancy.salary_average])
+                is_profession = vacancy.name.find(self.vacancy_name) != -1
+                if is_profession:
+                    self.increment(salary_of_vacancy_name, vacancy.year, [vacancy.salary_average])
+                cities.add(vacancy.area_name, vacancy.salary_average)
+                quantiles.add(vacancy.year, vacancy.area_name, vacancy.salary_average, is_profession)
+                rows += 1
+            stage.rows_in = rows
+            stage.rows_out = len(salary)
+
+        stats = self.collect_statistic(salary, salary_of_vacancy_name, cities)
+        return stats, quantiles.result(stats[4])
+
+    def get_sample_statistic(self, mode='stratified', size=None, top=10, threshold=0.01):
+        # оценка статистики по сохраненной выборке vacancy_sample.py: словари те же, значения - Estimate
+        from vacancy_sample import Estimate, add_matched, describe, estimate_groups, get_sample
+
+        sample, reused = get_sample(self.file_name, mode, size)
+        years, names, cities = {}, {}, {}
+        for stratum, row in sample.rows():
+            vacancy = Vacancy(dict(zip(sample.header, row)))
+            add_matched(years, vacancy.year, stratum, vacancy.salary_average)
             if vacancy.name.find(self.vacancy_name) != -1:
-                self.increment(salary_of_vacancy_name, vacancy.year, [vacancy.salary_average])
-            self.increment(salary_city, vacancy.area_name, [vacancy.salary_average])
-            count_of_vacancies += 1
+                add_matched(names, vacancy.year, stratum, vacancy.salary_average)
+            add_matched(cities, vacancy.area_name, stratum, vacancy.salary_average)
+
+        years = dict(sorted(estimate_groups(sample, years).items()))
+        names = estimate_groups(sample, names)
+        no_vacancies = (Estimate(0, 0), Estimate(0, 0))
+        names = dict([(year, names.get(year, no_vacancies)) for year in years])
+        population = sample.population()
+        cities = [(city, count, mean, Estimate(count.value / population, count.margin / population, 4))
+                  for city, (count, mean) in estimate_groups(sample, cities).items()]
+        cities = [city for city in cities if city[3].value >= threshold]
+        by_salary = sorted(cities, key=lambda city: city[2].value, reverse=True)[:top]
+        by_share = sorted(cities, key=lambda city: city[3].value, reverse=True)[:top]
+        stats = (dict([(year, mean) for year, (_, mean) in years.items()]),
+                 dict([(year, count) for year, (count, _) in years.items()]),
+                 dict([(year, mean) for year, (_, mean) in names.items()]),
+                 dict([(year, count) for year, (count, _) in names.items()]),
+                 dict([(city, mean) for city, _, mean, _ in by_salary]),
+                 dict([(city, share) for city, _, _, share in by_share]))
+        return describe(sample, reused), stats
 
+    @staticmethod
+    def collect_statistic(salary, salary_of_vacancy_name, cities):
         vacancies_number = dict([(key, len(value)) for key, value in salary.items()])
         vacancies_number_by_name = dict([(key, len(value)) for key, value in salary_of_vacancy_name.items()])
 
@@ -75,51 +179,51 @@ class DataSet:
             salary_of_vacancy_name = dict([(key, [0]) for key, value in salary.items()])
             vacancies_number_by_name = dict([(key, 0) for key, value in vacancies_number.items()])
 
-        stats = self.average(salary)
-        stats2 = self.average(salary_of_vacancy_name)
-        stats3 = self.average(salary_city)
-
-        stats4 = {}
-        for year, salaries in salary_city.items():
-            stats4[year] = round(len(salaries) / count_of_vacancies, 4)
-        stats4 = list(filter(lambda a: a[-1] >= 0.01, [(key, value) for key, value in stats4.items()]))
-        stats4.sort(key=lambda a: a[-1], reverse=True)
-        stats5 = stats4.copy()
-        stats4 = dict(stats4)
-        stats3 = list(filter(lambda a: a[0] in list(stats4.keys()), [(key, value) for key, value in stats3.items()]))
-        stats3.sort(key=lambda a: a[-1], reverse=True)
-        stats3 = dict(stats3[:10])
-        stats5 = dict(stats5[:10])
+        stats = DataSet.average(salary)
+        stats2 = DataSet.average(salary_of_vacancy_name)
+        stats3, stats5 = cities.get_statistic()
 
         return stats, vacancies_number, stats2, vacancies_number_by_name, stats3, stats5
 
     @staticmethod
-    def print_statistic(stats1, stats2, stats3, stats4, stats5, stats6):
+    def print_statistic(stats1, stats2, stats3, stats4, stats5, stats6, quantiles=None):
         print('Динамика уровня зарплат по годам: {0}'.format(stats1))
         print('Динамика количества вакансий по годам: {0}'.format(stats2))
         print('Динамика уровня зарплат по годам для выбранной профессии: {0}'.format(stats3))
         print('Динамика количества вакансий по годам для выбранной профессии: {0}'.format(stats4))
         print('Уровень зарплат по городам (в порядке убывания): {0}'.format(stats5))
         print('Доля вакансий по городам (в порядке убывания): {0}'.format(stats6))
+        if quantiles is not None:
+            print('Медиана и 90-й перцентиль зарплат по годам: {0}'.format(quantiles['years']))
+            print('Медиана и 90-й перцентиль зарплат по годам для выбранной профессии: {0}'.format(quantiles['names']))
+            print('Медиана и 90-й перцентиль зарплат по городам: {0}'.format(quantiles['cities']))
 
 
 class InputConnect:
-    def __init__(self):
+    def __init__(self, sample=None, sample_size=None):
         self.file_name = input('Введите название файла: ')
         self.vacancy_name = input('Введите название профессии: ')
 
         dataset = DataSet(self.file_name, self.vacancy_name)
-        stats1, stats2, stats3, stats4, stats5, stats6 = dataset.get_statistic()
-        dataset.print_statistic(stats1, stats2, stats3, stats4, stats5, stats6)
-
-        report = Report(self.vacancy_name, stats1, stats2, stats3, stats4, stats5, stats6)
-        report.generate_image()
-        report.generate_pdf()
+        if sample is not None:
+            description, stats = dataset.get_sample_statistic(sample, sample_size)
+            print(description)
+            dataset.print_statistic(*stats)
+            return
+        (stats1, stats2, stats3, stats4, stats5, stats6), quantiles = dataset.get_statistic_with_quantiles()
+        dataset.print_statistic(stats1, stats2, stats3, stats4, stats5, stats6, quantiles)
+        from result_cache import get_cache
+        print(get_cache().report())
+
+        report = Report(self.vacancy_name, stats1, stats2, stats3, stats4, stats5, stats6, quantiles)
+        with span('report', len(stats1)):
+            report.generate_image()
+            report.generate_pdf()
 
 
 class Report:
-    def __init__(self, vacancy_name, stats1, stats2, stats3, stats4, stats5, stats6):
-        self.wb = Workbook()
+    def __init__(self, vacancy_name, stats1, stats2, stats3, stats4, stats5, stats6, quantiles=None):
+        self.wb = None
         self.vacancy_name = vacancy_name
         self.stats1 = stats1
         self.stats2 = stats2
@@ -127,8 +231,14 @@ class Report:
         self.stats4 = stats4
         self.stats5 = stats5
         self.stats6 = stats6
+        self.quantiles = quantiles
 
     def generate_excel(self):
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Border, Side
+        from openpyxl.utils import get_column_letter
+
+        self.wb = Workbook()
         ws1 = self.wb.active
         ws1.title = 'Статистика по годам'
         ws1.append(['Год', 'Средняя зарплата', 'Средняя зарплата - ' + self.vacancy_name, 'Количество вакансий', 'Количество вакансий - ' + self.vacancy_name])
@@ -189,8 +299,35 @@ class Report:
 
         self.wb.save(filename='report.xlsx')
 
+    def generate_excel_streaming(self, file_name='report.xlsx', dataset=None):
+        from excel_export import StreamingExcelReport
+
+        excel = StreamingExcelReport()
+        excel.add_sheet('Статистика по годам',
+                        ['Год', 'Средняя зарплата', 'Средняя зарплата - ' + self.vacancy_name, 'Количество вакансий', 'Количество вакансий - ' + self.vacancy_name],
+                        [[year, self.stats1[year], self.stats3[year], self.stats2[year], self.stats4[year]] for year in self.stats1.keys()])
+        excel.add_sheet('Статистика по городам',
+                        ['Город', 'Уровень зарплат', '', 'Город', 'Доля вакансий'],
+                        [[city1, value1, '', city2, value2] for (city1, value1), (city2, value2) in zip(self.stats5.items(), self.stats6.items())],
+                        ['cell', 'cell', None, 'cell', 'percent'])
+        if dataset is not None:
+            excel.add_detail_sheet('Вакансии', ['Название', 'Нижняя граница вилки оклада', 'Верхняя граница вилки оклада', 'Идентификатор валюты оклада', 'Название региона', 'Дата публикации вакансии'],
+                                   ([vacancy['name'], float(vacancy['salary_from']), float(vacancy['salary_to']), vacancy['salary_currency'], vacancy['area_name'], vacancy['published_at']]
+                                    for vacancy in dataset.csv_reader()))
+        excel.save(file_name)
+
     def generate_image(self):
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(nrows=2, ncols=2)
+        import matplotlib.pyplot as plt
+
+        fig, axes = plt.subplots(nrows=2, ncols=2)
+        self.draw_image(axes)
+        plt.tight_layout()
+        plt.savefig('graph.png')
+
+    def draw_image(self, axes):
+        import numpy as np
+
+        (ax1, ax2), (ax3, ax4) = axes
 
         bar1 = ax1.bar(np.array(list(self.stats1.keys())) - 0.4, self.stats1.values(), width=0.4)
         bar2 = ax1.bar(np.array(list(self.stats1.keys())), self.stats3.values(), width=0.4)
@@ -220,22 +357,44 @@ class Report:
         other = 1 - sum([value for value in self.stats6.values()])
         ax4.pie(list(self.stats6.values()) + [other], labels=list(self.stats6.keys()) + ['Другие'], textprops={'fontsize': 6})
 
-        plt.tight_layout()
-        plt.savefig('graph.png')
-
     def generate_pdf(self):
+        import pdfkit
+        from jinja2 import Environment, FileSystemLoader
+
         env = Environment(loader=FileSystemLoader('.'))
         template = env.get_template("pdf_template.html")
+        pdf_template = self.render_html(template, '{0}/{1}'.format(pathlib.Path(__file__).parent.resolve(), 'graph.png'))
+        pdfkit.from_string(pdf_template, 'report.pdf', options={"enable-local-file-access": ""})
+
+    def get_year_rows(self):
         stats = []
         for year in self.stats1.keys():
             stats.append([year, self.stats1[year], self.stats2[year], self.stats3[year], self.stats4[year]])
+        return stats
 
-        for key in self.stats6:
-            self.stats6[key] = round(self.stats6[key] * 100, 2)
+    def get_quantile_rows(self):
+        if self.quantiles is None:
+            return []
+        return [[year, *self.quantiles['years'][year], *self.quantiles['names'].get(year, (0, 0))]
+                for year in self.quantiles['years']]
 
-        pdf_template = template.render({'name': self.vacancy_name, 'path': '{0}/{1}'.format(pathlib.Path(__file__).parent.resolve(), 'graph.png'), 'stats': stats, 'stats5': self.stats5, 'stats6': self.stats6})
-        pdfkit.from_string(pdf_template, 'report.pdf', options={"enable-local-file-access": ""})
+    def render_html(self, template, image_path):
+        stats6 = dict([(key, round(value * 100, 2)) for key, value in self.stats6.items()])
+        return template.render({'name': self.vacancy_name, 'path': image_path, 'stats': self.get_year_rows(), 'stats5': self.stats5, 'stats6': stats6,
+                                'quantiles': self.get_quantile_rows(),
+                                'city_quantiles': self.quantiles['cities'] if self.quantiles else {}})
+
+
+def main_2_1_3(sample=None, sample_size=None):
+    InputConnect(sample, sample_size)
 
 
 if __name__ == '__main__':
-    InputConnect()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Статистика по годам и городам для профессии')
+    parser.add_argument('--sample', nargs='?', const='stratified', choices=['uniform', 'stratified'],
+                        help='оценить статистику по сохраненной выборке вместо полного прохода')
+    parser.add_argument('--sample-size', type=int, help='размер выборки (на год для stratified)')
+    args = parser.parse_args()
+    main_2_1_3(args.sample, args.sample_size)
\ No newline at end of file
@@ -1,11 +1,12 @@
 import datetime
-from prettytable import PrettyTable
-from functools import cmp_to_key
+from functools import cmp_to_key, lru_cache
 import csv
 import re
 import os.path
-import cProfile
-import pstats
+
+from categorical import CategoricalEncoder
+from compressed_io import open_text, strip_compression
+from metrics import span
 
 
 
@@ -96,8 +97,9 @@ class DataSet:
     Attributes:
 
     """
-    def __init__(self, list_of_vac_str):
+    def __init__(self, list_of_vac_str, is_cleaned=False):
         self.list_of_vac_str = list_of_vac_str
+        self.is_cleaned = is_cleaned
 
     def refresh(self, new_list_of_vac_str):
         self.list_of_vac_str = new_list_of_vac_str
@@ -117,56 +119,80 @@ class DataSet:
             list: Список отфильтрованных вакансий
         """
         list_of_vac = []
+        cleaners = [keep_string if self.is_cleaned else get_cleaner(name) for name in list_naming]
+        # категориальные столбцы очищаются один раз на различное значение, вакансии делят объекты строк
+        categories = CategoricalEncoder(list_naming, transform=dict(zip(list_naming, cleaners))).dictionaries
         for vac in self.list_of_vac_str:
             dic = {}
             row_ok = True
             for i in range(0, len(list_naming)):
-                cell = clean_string(vac[i], True if i == 2 else False)
-                if list_naming[i] == 'salary_from' and salary_req is not None:
-                    if salary_req < float(cell):
-                        row_ok = False
-                        break
-                if list_naming[i] == 'salary_to' and salary_req is not None:
-                    if salary_req > float(cell):
-                        row_ok = False
-                        break
-                if list_naming[i] in exact_match_dict.keys():
-                    if exact_match_dict[list_naming[i]] != cell:
-                        row_ok = False
-                        break
-                if list_naming[i] in items_dict:
-                    my_items = items_dict[list_naming[i]]
-                    vac_items = cell.split('\n')
-                    good_match = True
-                    for m_i in my_items:
-                        if m_i not in vac_items:
-                            good_match = False
-                            break
-                    if not good_match:
-                        row_ok = False
-                        break
-                if list_naming[i] in substring_dict:
-                    if substring_dict[list_naming[i]] not in cell:
-                        row_ok = False
-                        break
+                if i in categories:
+                    cell = categories[i].intern(vac[i])
+                else:
+                    cell = cleaners[i](vac[i])
+                if not cell_matches(list_naming[i], cell, exact_match_dict, items_dict, substring_dict, salary_req):
+                    row_ok = False
+                    break
                 dic[list_naming[i]] = cell
             if row_ok:
-                sal = Salary(dic['salary_from'], dic['salary_to'], dic['salary_gross'], dic['salary_currency'])
-                list_of_vac.append(Vacancy(dic['name'], dic['description'], dic['key_skills'], dic['experience_id'],
-                                           dic['premium'], dic['employer_name'], sal, dic['area_name'],
-                                           datetime.datetime.strptime(dic['published_at'], '%Y-%m-%dT%H:%M:%S%z')))
+                list_of_vac.append(make_vacancy(dic))
         return list_of_vac
 
 
-def profile(func):
-    """Decorator for run function profile"""
-    def wrapper(*args, **kwargs):
-        profile_filename = func.__name__ + '.prof'
-        profiler = cProfile.Profile()
-        result = profiler.runcall(func, *args, **kwargs)
-        profiler.dump_stats(profile_filename)
-        return result
-    return wrapper
+def cell_matches(column, cell, exact_match_dict, items_dict, substring_dict, salary_req):
+    """
+    Проверяет одно очищенное значение вакансии по условиям фильтрации
+
+    Args:
+        column (str): Название столбца
+        cell (str): Очищенное значение
+        exact_match_dict (dict): Словарь, чтобы сравнивать вакансии значения по строке
+        items_dict (dict): Словарь, чтобы обрабатывать список навыков
+        substring_dict (dict): Словарь, чтобы обрабатывать дату
+        salary_req (float or None): Отвечает за обработку параметра зарплаты
+
+    Returns:
+        bool: True, если значение подходит под условия
+
+    >>> cell_matches('salary_from', '10000', {}, {}, {}, 50000.0)
+    True
+    >>> cell_matches('key_skills', 'SQL', {}, {'key_skills': ['SQL', 'Linux']}, {}, None)
+    False
+    """
+    if column == 'salary_from' and salary_req is not None:
+        if salary_req < float(cell):
+            return False
+    if column == 'salary_to' and salary_req is not None:
+        if salary_req > float(cell):
+            return False
+    if column in exact_match_dict.keys():
+        if exact_match_dict[column] != cell:
+            return False
+    if column in items_dict:
+        vac_items = cell.split('\n')
+        for m_i in items_dict[column]:
+            if m_i not in vac_items:
+                return False
+    if column in substring_dict:
+        if substring_dict[column] not in cell:
+            return False
+    return True
+
+
+def make_vacancy(dic):
+    """
+    Создает вакансию из словаря очищенных значений
+
+    Args:
+        dic (dict): Заголовок -> очищенное значение
+
+    Returns:
+        Vacancy: Вакансия
+    """
+    sal = Salary(dic['salary_from'], dic['salary_to'], dic['salary_gross'], dic['salary_currency'])
+    return Vacancy(dic['name'], dic['description'], dic['key_skills'], dic['experience_id'],
+                   dic['premium'], dic['employer_name'], sal, dic['area_name'],
+                   datetime.datetime.strptime(dic['published_at'], '%Y-%m-%dT%H:%M:%S%z'))
 
 
 class InputConnect:
@@ -195,10 +221,6 @@ class InputConnect:
     columns_for_items_match = {'Навыки'}
     columns_for_substring_match = {'Дата публикации вакансии'}
 
-    dict_for_exact_match = {}
-    dict_for_items_match = {}
-    dict_for_substring_match = {}
-
     def __init__(self):
         """
         Инициализирует объект InputConnect
@@ -218,6 +240,9 @@ class InputConnect:
         self.indexes_ok = True
         self.bad_param_found = False
         self.file_name_ok = True
+        self.dict_for_exact_match = {}
+        self.dict_for_items_match = {}
+        self.dict_for_substring_match = {}
 
         if len(rus_eng_title) == 0:
             for key, value in eng_rus_title.items():
@@ -233,14 +258,33 @@ class InputConnect:
         """
         Осуществляет считывание пользовательского ввода и уставку значений атрибутам
         """
-        self.file_name = input('Введите название файла: ')
-        self.request_param = input('Введите параметр фильтрации: ')
-        self.column_title_for_sort = input('Введите параметр сортировки: ')
-        self.reversed_sort = input('Обратный порядок сортировки (Да / Нет): ')
-        self.index_parts = input('Введите диапазон вывода: ').split()
-        self.params_input = input('Введите требуемые столбцы: ')
+        self.set_user_input(input('Введите название файла: '),
+                            input('Введите параметр фильтрации: '),
+                            input('Введите параметр сортировки: '),
+                            input('Обратный порядок сортировки (Да / Нет): '),
+                            input('Введите диапазон вывода: '),
+                            input('Введите требуемые столбцы: '))
+
+    def set_user_input(self, file_name, request_param, column_title_for_sort, reversed_sort, index_parts, params_input):
+        """
+        Уставливает значения атрибутам по ответам на шесть вопросов, не обращаясь к input()
 
-        if not (len(self.file_name) > 4 and self.file_name.endswith('.csv') and os.path.exists('work_files/' + self.file_name)):
+        Args:
+            file_name (str): Название файла
+            request_param (str): Параметр фильтрации
+            column_title_for_sort (str): Параметр сортировки
+            reversed_sort (str): Обратный порядок сортировки (Да / Нет)
+            index_parts (str): Диапазон вывода
+            params_input (str): Требуемые столбцы
+        """
+        self.file_name = file_name
+        self.request_param = request_param
+        self.column_title_for_sort = column_title_for_sort
+        self.reversed_sort = reversed_sort
+        self.index_parts = index_parts.split()
+        self.params_input = params_input
+
+        if not (len(self.file_name) > 4 and strip_compression(self.file_name).endswith('.csv') and os.path.exists('work_files/' + self.file_name)):
             self.file_name_ok = False
 
         if len(self.column_title_for_sort) > 0 and self.column_title_for_sort not in rus_eng_title:
@@ -294,16 +338,16 @@ class InputConnect:
                         req_value = rus_eng_currency[request_data[1]] if request_data[1] in rus_eng_currency else request_data[1]
                         req_value = rus_eng_work_experience[request_data[1]] if request_data[1] in rus_eng_work_experience else req_value
                         req_value = rus_eng_prem_vac[request_data[1]] if request_data[1] in rus_eng_prem_vac else req_value
-                        InputConnect.dict_for_exact_match[rus_eng_title[request_data[0]]] = req_value
+                        self.dict_for_exact_match[rus_eng_title[request_data[0]]] = req_value
                     elif request_data[0] in InputConnect.columns_for_items_match:
-                        InputConnect.dict_for_items_match[rus_eng_title[request_data[0]]] = request_data[1].split(', ')
+                        self.dict_for_items_match[rus_eng_title[request_data[0]]] = request_data[1].split(', ')
                     elif request_data[0] in InputConnect.columns_for_substring_match:
                         date_parts = request_data[1].split('.')
                         if len(date_parts) != 3:
                             print('Некорректный формат даты')
                         else:
                             date_str = date_parts[2] + '-' + date_parts[1] + '-' + date_parts[0] + 'T'
-                            InputConnect.dict_for_substring_match[rus_eng_title[request_data[0]]] = date_str
+                            self.dict_for_substring_match[rus_eng_title[request_data[0]]] = date_str
                     elif request_data[0] in columns_for_range_match:
                         self.salary_req = float(request_data[1])
 
@@ -313,29 +357,33 @@ class InputConnect:
         Returns:
             bool: успех/неудача проверки
         """
-        if not self.file_name_ok:
-            print('Название файла некорректно или файл не найден')
+        error = self.get_input_error()
+        if error is not None:
+            print(error)
             return False
+        return True
+
+    def get_input_error(self):
+        """
+        Находит первую ошибку ввода
+        Returns:
+            str or None: Сообщение об ошибке или None, если ошибок нет
+        """
+        if not self.file_name_ok:
+            return 'Название файла некорректно или файл не найден'
         elif not self.request_param_ok[0]:
-            print("Формат ввода некорректен")
-            return False
+            return "Формат ввода некорректен"
         elif not self.request_param_ok[1]:
-            print("Параметр поиска некорректен")
-            return False
+            return "Параметр поиска некорректен"
         elif self.column_title_for_sort is None:
-            print('Параметр сортировки некорректен')
-            return False
+            return 'Параметр сортировки некорректен'
         elif self.reversed_flag is None:
-            print('Порядок сортировки задан некорректно')
-            return False
+            return 'Порядок сортировки задан некорректно'
         elif not self.indexes_ok:
-            print('некорректеные индексы')
-            return False
+            return 'некорректеные индексы'
         elif len(self.params_input) > 0 and self.bad_param_found:
-            print('Параметры демонстрации некорректны')
-            return False
-        else:
-            return True
+            return 'Параметры демонстрации некорректны'
+        return None
 
     @staticmethod
     def compare_by_exp(x, y):
@@ -360,38 +408,93 @@ class InputConnect:
         Returns:
             int: -1 если зарплата первой меньше, 1 если зарплата первой больше, 0 если зарплата первой равен зарплате второй
         """
-        currency_to_rub = {
-            "AZN": 35.68,
-            "BYR": 23.91,
-            "EUR": 59.90,
-            "GEL": 21.74,
-            "KGS": 0.76,
-            "KZT": 0.13,
-            "RUR": 1,
-            "UAH": 1.64,
-            "USD": 60.66,
-            "UZS": 0.0055,
-        }
-        x_nom = x.salary.salary_currency
-        y_nom = y.salary.salary_currency
-        x_factor = currency_to_rub[x_nom]
-        y_factor = currency_to_rub[y_nom]
-        x_rub = (float(x.salary.salary_from) + float(x.salary.salary_to)) * x_factor / 2
-        y_rub = (float(y.salary.salary_from) + float(y.salary.salary_to)) * y_factor / 2
+        x_rub = salary_in_rub(x)
+        y_rub = salary_in_rub(y)
 
         return -1 if x_rub < y_rub else 1 if x_rub > y_rub else 0
 
-    @profile
     def standard_process(self):
         """
         Осуществляет формирование списка вакансий и их отправку на печать
         """
-        title, value = csv_reader('work_files/' + self.file_name)
-        data_set = DataSet(value)
-        data = data_set.generate_vacs_from_strs(title, InputConnect.dict_for_exact_match, InputConnect.dict_for_items_match, InputConnect.dict_for_substring_match, self.salary_req)
+        from record_store import open_record_store
+        from snapshot import read_rows
+
+        if self.request_param == '' and self.column_title_for_sort == '':
+            store = open_record_store('work_files/' + self.file_name)
+            if store is not None and self.paginated_process(store):
+                return
+        with span('read') as stage:
+            title, value, is_cleaned = read_rows('work_files/' + self.file_name)
+            stage.rows_out = len(value)
+        data_set = DataSet(value, is_cleaned)
+        # без снимка ячейки очищаются лениво, по ходу фильтрации, поэтому очистка входит в этап filter
+        with span('filter', len(value)) as stage:
+            data = data_set.generate_vacs_from_strs(title, self.dict_for_exact_match, self.dict_for_items_match, self.dict_for_substring_match, self.salary_req)
+            stage.rows_out = len(data)
         if len(data) == 0:
             print('Ничего не найдено')
             exit()
+        print(self.make_table(data))
+
+    def sample_process(self, mode='stratified', size=None):
+        """
+        Отвечает на запрос по сохраненной выборке файла (vacancy_sample.py): оценивает, сколько вакансий файла
+        подходит под фильтр и их средний оклад, и печатает подходящие вакансии выборки
+
+        Args:
+            mode (str): 'uniform' или 'stratified' - выборка по всему файлу или по каждому году
+            size (int or None): Размер выборки
+        """
+        from vacancy_sample import describe, get_sample
+
+        with span('read') as stage:
+            sample, reused = get_sample('work_files/' + self.file_name, mode, size)
+            stage.rows_out = len(sample)
+        data_set = DataSet([row for _, row in sample.rows()])
+        with span('filter', len(sample)) as stage:
+            data = data_set.generate_vacs_from_strs(sample.header, self.dict_for_exact_match, self.dict_for_items_match, self.dict_for_substring_match, self.salary_req)
+            stage.rows_out = len(data)
+        matched = {}
+        for vacancy in data:
+            matched.setdefault(sample.stratum_of(vacancy.published_at.isoformat()), []).append(salary_in_rub(vacancy))
+        count, mean = sample.estimate(matched)
+        print(describe(sample, reused))
+        print('Подходящих вакансий в файле: {0}, средний оклад в рублях: {1}'.format(count, mean if mean is not None else '-'))
+        if len(data) == 0:
+            print('Ничего не найдено')
+            return
+        print(self.make_table(data))
+
+    def paginated_process(self, store):
+        """
+        Печатает диапазон вывода без фильтрации и сортировки, читая из хранилища записей только строки диапазона
+
+        Args:
+            store (RecordStore): Хранилище записей файла
+
+        Returns:
+            bool: False, если в диапазон не попало ни одной строки и нужен обычный путь
+        """
+        with span('read') as stage:
+            complete = store.complete_indexes()
+            start, end = make_range(self.indexes, complete)
+            page = [make_vacancy(dict(zip(store.header, row))) for row in store.rows(complete[start:end])]
+            stage.rows_out = len(page)
+        if len(page) == 0:
+            return False
+        with span('format', len(page)):
+            form_data = [formatter(d, eng_rus_work_experience) for d in page]
+        with span('render', len(form_data)):
+            print(get_page_table(form_data, start + 1, self.params))
+        return True
+
+    def sort_vacancies(self, data):
+        """
+        Сортирует список вакансий по параметру сортировки
+        Args:
+            data (list): Список вакансий
+        """
         if self.column_title_for_sort == '':
             pass  # пустой параметр сортировки = отсутствие сортировки
         else:
@@ -417,9 +520,22 @@ class InputConnect:
             else:
                 pass
 
-        form_data = [formatter(d, eng_rus_work_experience) for d in data]
-
-        print_vacancies_table(form_data, self.indexes, self.params)
+    def make_table(self, data):
+        """
+        Сортирует вакансии и формирует таблицу для вывода
+        Args:
+            data (list): Список отфильтрованных вакансий
+        Returns:
+            str: Таблица в текстовом виде
+        """
+        with span('sort', len(data)) as stage:
+            self.sort_vacancies(data)
+            stage.rows_out = len(data)
+        with span('format', len(data)) as stage:
+            form_data = [formatter(d, eng_rus_work_experience) for d in data]
+            stage.rows_out = len(form_data)
+        with span('render', len(form_data)):
+            return get_vacancies_table(form_data, self.indexes, self.params)
 
 
 def csv_reader(file_name):
@@ -432,11 +548,12 @@ def csv_reader(file_name):
         list: Заголовки таблицы с вакансиями
         list: Список вакансий
     """
-    file_csv = csv.reader(open(file_name, encoding='utf_8_sig'))
+    file_csv = csv.reader(open_text(file_name, encoding='utf_8_sig'))
     list_data = [x for x in file_csv]
     check_valid_file(list_data)
     titles = list_data[0]
-    values = [x for x in list_data[1:] if x.count('') == 0 and len(x) == len(titles)]
+    encoder = CategoricalEncoder(titles)
+    values = [encoder.intern_row(x) for x in list_data[1:] if x.count('') == 0 and len(x) == len(titles)]
     return titles, values
 
 
@@ -462,11 +579,50 @@ def print_vacancies_table(data_vacancies, indexes, parameters):
         indexes (list): Диапозон вывода
         parameters (list): Требуемые столбцы
     """
+    print(get_vacancies_table(data_vacancies, indexes, parameters))
+
+
+def get_vacancies_table(data_vacancies, indexes, parameters):
+    """
+    Формирует информацию о вакансиях в виде таблицы
+    Args:
+        data_vacancies (list): Информация о вакансиях
+        indexes (list): Диапозон вывода
+        parameters (list): Требуемые столбцы
+    Returns:
+        str: Таблица в текстовом виде
+    """
     table = create_table(data_vacancies)
     actual_range = make_range(indexes, data_vacancies)
-    print(table.get_string(fields=['№', *parameters] if parameters.count('') == 0 else table.field_names,
-                           start=actual_range[0],
-                           end=actual_range[1]))
+    return table.get_string(fields=['№', *parameters] if parameters.count('') == 0 else table.field_names,
+                            start=actual_range[0],
+                            end=actual_range[1])
+
+
+def get_page_table(data_vacancies, first_number, parameters):
+    """
+    Формирует таблицу из уже выбранной страницы вакансий
+    Args:
+        data_vacancies (list): Информация о вакансиях страницы
+        first_number (int): Номер первой вакансии страницы
+        parameters (list): Требуемые столбцы
+    Returns:
+        str: Таблица в текстовом виде
+    """
+    table = create_table(data_vacancies, first_number)
+    return table.get_string(fields=['№', *parameters] if parameters.count('') == 0 else table.field_names)
+
+
+def get_header_table(parameters):
+    """
+    Формирует таблицу только из шапки, как get_vacancies_table для диапазона за пределами найденных вакансий
+    Args:
+        parameters (list): Требуемые столбцы
+    Returns:
+        str: Таблица в текстовом виде
+    """
+    table = create_table([], field_names=[eng_rus_title[column] for column in table_columns])
+    return table.get_string(fields=['№', *parameters] if parameters.count('') == 0 else table.field_names)
 
 
 def make_range(indexes, data_vacancies):
@@ -504,11 +660,82 @@ def clean_string(string, is_skills):
     >>> clean_string('<li>Запуск в работу и ПГР для нового производственного оборудования;</li>', False)
     'Запуск в работу и ПГР для нового производственного оборудования;'
     """
-    string = re.sub(r'<[^>]*>', '', string)
-    string = ' '.join(string.split(' ')) if is_skills else ' '.join(string.split())
+    if '<' in string:
+        string = html_tag.sub('', string)
+    # у навыков сохраняются переводы строк, разделяющие навыки
+    return string if is_skills else ' '.join(string.split())
+
+
+def keep_string(string):
     return string
 
 
+def clean_text(string):
+    return clean_string(string, False)
+
+
+def clean_skills(string):
+    return clean_string(string, True)
+
+
+def set_clean_cache(maxsize):
+    """
+    Включает LRU кеш очистки в текущем процессе (maxsize > 0) или выключает его (maxsize = 0).
+    Кеш полезен, когда значения повторяются, например, одинаковые блоки навыков или описания одного работодателя
+
+    Args:
+        maxsize (int): Размер кеша
+    """
+    global clean_cache
+    clean_cache = lru_cache(maxsize)(clean_string) if maxsize > 0 else None
+
+
+def get_cleaner(column):
+    """
+    Возвращает функцию очистки значений столбца
+
+    Args:
+        column (str): Название столбца
+
+    Returns:
+        function: Функция str -> str
+
+    >>> get_cleaner('salary_from')(' 100.0')
+    ' 100.0'
+    >>> get_cleaner('name')('<b>Python</b>  developer')
+    'Python developer'
+    """
+    if column in raw_columns:
+        return keep_string
+    is_skills = column == 'key_skills'
+    if clean_cache is not None:
+        cache = clean_cache
+        return lambda string: cache(string, is_skills)
+    return clean_skills if is_skills else clean_text
+
+
+def salary_in_rub(vacancy):
+    """
+    Переводит среднюю зарплату вакансии в рубли по курсу get_vacancy_rates на дату публикации
+
+    Args:
+        vacancy (Vacancy): Вакансия
+
+    Returns:
+        float: Средняя зарплата в рублях
+    """
+    salary = vacancy.salary
+    rate = get_vacancy_rates().rate(salary.salary_currency, vacancy.published_at.isoformat())
+    return (float(salary.salary_from) + float(salary.salary_to)) * rate / 2
+
+
+html_tag = re.compile(r'<[^>]*>')
+# Машинные значения (числа, коды, флаги, дата) не содержат html и лишних пробелов, поэтому не очищаются
+raw_columns = {'salary_from', 'salary_to', 'salary_gross', 'salary_currency', 'experience_id', 'premium', 'published_at'}
+clean_cache = None
+set_clean_cache(int(os.environ.get('CLEAN_CACHE_SIZE', 0)))
+
+
 # def convert_datetime_to_dmy(dt):
 #     return dt.strftime('%d.%m.%Y')
 
@@ -527,6 +754,11 @@ def convert_datetime_to_dmy_v2(dt: datetime.datetime):
 #     return days[dt.day] + '.' + months[dt.month] + '.' + str(dt.year)
 
 
+# Столбцы таблицы вакансий в порядке formatter
+table_columns = ('name', 'description', 'key_skills', 'experience_id', 'premium', 'employer_name', 'salary',
+                 'area_name', 'published_at')
+
+
 def formatter(vac, eng_rus_work_experience):
     """
     Форматирует информацию о вакансии, переводит все значения на русский язык
@@ -569,19 +801,23 @@ def format_for_table(vacancy):
     return result_list
 
 
-def create_table(data):
+def create_table(data, first_number=1, field_names=None):
     """
     Создает таблицу для печати
     Args:
         data (list): Список словарей с информацией о вакансиях
+        first_number (int): Номер первой вакансии в столбце №
+        field_names (list or None): Названия столбцов, None - ключи первой вакансии
 
     Returns:
        PrettyTable: результирующая таблица
     """
+    from prettytable import PrettyTable
+
     result_table = PrettyTable()
-    result_table.field_names = ['№', *data[0].keys()]
+    result_table.field_names = ['№', *(data[0].keys() if field_names is None else field_names)]
     for i in range(len(data)):
-        result_table.add_row([str(i + 1), *format_for_table(data[i])])
+        result_table.add_row([str(i + first_number), *format_for_table(data[i])])
     result_table.align = 'l'
     result_table.hrules = 1
     result_table.max_width = 20
@@ -644,6 +880,34 @@ eng_rus_work_experience = {
         "moreThan6": "Более 6 лет"
     }
 
+currency_to_rub = {
+    "AZN": 35.68,
+    "BYR": 23.91,
+    "EUR": 59.90,
+    "GEL": 21.74,
+    "KGS": 0.76,
+    "KZT": 0.13,
+    "RUR": 1,
+    "UAH": 1.64,
+    "USD": 60.66,
+    "UZS": 0.0055,
+}
+
+
+@lru_cache(maxsize=None)
+def get_vacancy_rates():
+    """
+    Возвращает курсы для сравнения зарплат: постоянные или на дату публикации, если VACANCY_RATES задает csv курсов.
+    Курсы загружаются при первом сравнении, а не при импорте, чтобы не задерживать первую подсказку
+
+    Returns:
+        CurrencyRates: Курсы
+    """
+    from currency_rates import get_rates
+
+    return get_rates('static', currency_to_rub)
+
+
 rus_eng_prem_vac = {
     'Да': 'True',
     'Нет': 'False'
@@ -671,23 +935,34 @@ rus_eng_work_experience = {}
 
 
 
-def main_5_2():
+def main_5_2(sample=None, sample_size=None):
     """
     Запускает работу программы, если в пользовательском вводе не обнаружено ошибок
+
+    Args:
+        sample (str or None): 'uniform' или 'stratified' - ответить по выборке, None - по всему файлу
+        sample_size (int or None): Размер выборки
     """
     user_input = InputConnect()
     user_input.read_user_input()
 
     if not user_input.full_check_error_not_found():
         exit()
+    elif sample is not None:
+        user_input.sample_process(sample, sample_size)
     else:
         user_input.standard_process()
 
 
 if __name__ == '__main__':
-    main_5_2()
-    p = pstats.Stats('standard_process.prof')
-    p.sort_stats('calls').print_stats()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Таблица вакансий с фильтрацией и сортировкой')
+    parser.add_argument('--sample', nargs='?', const='stratified', choices=['uniform', 'stratified'],
+                        help='ответить по сохраненной выборке вместо полного прохода')
+    parser.add_argument('--sample-size', type=int, help='размер выборки (на год для stratified)')
+    args = parser.parse_args()
+    main_5_2(args.sample, args.sample_size)
 
 
 # test input
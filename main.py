@@ -1,22 +1,43 @@
+import concurrent.futures
+import os
+import sys
+
 import pandas as pd
-import threading
+
+from dataset_reader import read_dataset
+
+
+compression_suffixes = {None: '', 'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz', 'zstd': '.zst'}
 
 
 class DataSet:
     def __init__(self, file_name):
-        self.data = pd.read_csv(file_name)
+        self.data = read_dataset(file_name, 'split')
 
-    def makePartsCsv(data: pd.DataFrame, file_name):
-        data.to_csv(path_or_buf=file_name, index=False, encoding='utf-8-sig')
+    @staticmethod
+    def makePartsCsv(data: pd.DataFrame, file_name, compression=None):
+        data.to_csv(path_or_buf=file_name, index=False, encoding='utf-8-sig', compression=compression)
 
-    def makeResult(self):
-        for year in self.data['published_at'].apply(lambda x: x[:4]).unique():
-            filter_parametr = self.data['published_at'].str.contains(year)
-            filtered_data = self.data[filter_parametr]
-            t = threading.Thread(target=makePartsCsv, args=(filtered_data, f'split_files/vacancies_by_{year}.csv'))
-            t.start()
+    def makeResult(self, directory='split_files', max_workers=4, compression=None):
+        """
+        Разбивает данные по годам одним groupby по первым четырем символам published_at
+        и записывает части в пуле из max_workers потоков
 
+        Args:
+            directory (str): Директория для частей
+            max_workers (int): Максимальное количество потоков записи
+            compression (str or None): Сжатие частей: 'gzip', 'bz2', 'xz', 'zstd' или None
+        """
+        os.makedirs(directory, exist_ok=True)
+        suffix = compression_suffixes[compression]
+        years = self.data['published_at'].str[:4].rename('year')
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = [ex.submit(self.makePartsCsv, filtered_data, f'{directory}/vacancies_by_{year}.csv{suffix}', compression)
+                       for year, filtered_data in self.data.groupby(years)]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
 
 
-data = DataSet('vacancies_by_year.csv')
-data.makeResult()
\ No newline at end of file
+if __name__ == '__main__':
+    data = DataSet('vacancies_by_year.csv')
+    data.makeResult(compression=sys.argv[1] if len(sys.argv) > 1 else None)
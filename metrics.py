@@ -0,0 +1,226 @@
+import glob
+import json
+import os
+import time
+
+# Метрики этапов: read, clean, filter, sort, format, render, aggregate, report.
+# Включаются переменной окружения VACANCY_METRICS=<директория>. Без нее span() возвращает один общий
+# пустой объект, и инструментирование стоит одного вызова функции на этап.
+# Рабочие процессы пулов переписывают свои метрики в <директория>/partial после каждого внешнего этапа:
+# multiprocessing.Pool завершает воркеры сигналом, и обработчики выхода в них не срабатывают.
+# Основной процесс при выходе сливает их со своими в metrics.json и metrics.prom
+ENVIRONMENT_VARIABLE = 'VACANCY_METRICS'
+RUN_VARIABLE = 'VACANCY_METRICS_RUN'
+
+stages = ('read', 'clean', 'filter', 'sort', 'format', 'render', 'aggregate', 'report')
+
+
+class NoSpan:
+    """Пустой этап для выключенных метрик"""
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+no_span = NoSpan()
+
+
+class Span:
+    """
+    Один замер этапа
+
+    Attributes:
+        name (str): Название этапа
+        rows_in (int or None): Строк на входе
+        rows_out (int or None): Строк на выходе, можно задать внутри with
+    """
+    def __init__(self, registry, name, rows_in):
+        self.registry = registry
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def __enter__(self):
+        self.start_memory = self.registry.enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        wall = time.perf_counter() - self.start
+        self.registry.exit(self, wall)
+        return False
+
+
+class Registry:
+    """
+    Метрики текущего процесса
+
+    Attributes:
+        directory (str): Директория для результатов
+        stats (dict): Этап -> накопленные значения
+        peaks (list): Стек пиков памяти открытых этапов
+    """
+    def __init__(self, directory):
+        import tracemalloc
+
+        self.tracemalloc = tracemalloc
+        self.directory = directory
+        self.stats = {}
+        self.peaks = []
+        self.pid = os.getpid()
+        self.run = os.environ.setdefault(RUN_VARIABLE, str(self.pid))
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.is_main():
+            import atexit
+
+            atexit.register(self.write_report)
+
+    def is_main(self):
+        return self.run == str(self.pid)
+
+    def enter(self):
+        # пик родительского этапа запоминается до сброса, чтобы вложенный этап его не потерял
+        current, peak = self.tracemalloc.get_traced_memory()
+        if self.peaks:
+            self.peaks[-1] = max(self.peaks[-1], peak)
+        self.tracemalloc.reset_peak()
+        self.peaks.append(current)
+        return current
+
+    def exit(self, span, wall):
+        peak = max(self.peaks.pop(), self.tracemalloc.get_traced_memory()[1])
+        if self.peaks:
+            self.peaks[-1] = max(self.peaks[-1], peak)
+        record(self.stats, span.name, {'count': 1, 'seconds_total': wall, 'seconds_max': wall,
+                                       'rows_in': span.rows_in or 0, 'rows_out': span.rows_out or 0,
+                                       'peak_memory_bytes': peak - span.start_memory})
+        if not self.peaks and not self.is_main():
+            self.write_partial()
+
+    def write_partial(self):
+        directory = os.path.join(self.directory, 'partial')
+        os.makedirs(directory, exist_ok=True)
+        file_name = os.path.join(directory, '{0}-{1}.json'.format(self.run, self.pid))
+        with open(file_name + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(self.stats, file)
+        os.replace(file_name + '.tmp', file_name)
+
+    def write_report(self):
+        """Сливает метрики рабочих процессов с метриками основного и записывает metrics.json и metrics.prom"""
+        stats = {}
+        merge(stats, self.stats)
+        for file_name in glob.glob(os.path.join(self.directory, 'partial', '{0}-*.json'.format(self.run))):
+            with open(file_name, encoding='utf-8') as file:
+                merge(stats, json.load(file))
+            os.remove(file_name)
+        if not stats:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'metrics.json'), 'w', encoding='utf-8') as file:
+            json.dump(stats, file, ensure_ascii=False, indent=2)
+        with open(os.path.join(self.directory, 'metrics.prom'), 'w', encoding='utf-8') as file:
+            file.write(to_prometheus(stats))
+
+
+def record(stats, name, values):
+    """
+    Добавляет замер этапа к накопленным значениям
+
+    Args:
+        stats (dict): Этап -> накопленные значения
+        name (str): Название этапа
+        values (dict): Замер или накопленные значения другого процесса
+
+    >>> stats = {}
+    >>> record(stats, 'read', {'count': 1, 'seconds_total': 2.0, 'seconds_max': 2.0, 'rows_in': 0, 'rows_out': 10,
+    ...                        'peak_memory_bytes': 100})
+    >>> record(stats, 'read', {'count': 2, 'seconds_total': 1.0, 'seconds_max': 0.5, 'rows_in': 0, 'rows_out': 5,
+    ...                        'peak_memory_bytes': 300})
+    >>> stats['read']['count'], stats['read']['seconds_total'], stats['read']['seconds_max'], stats['read']['peak_memory_bytes']
+    (3, 3.0, 2.0, 300)
+    """
+    if name not in stats:
+        stats[name] = dict(values)
+        return
+    total = stats[name]
+    for key in ('count', 'seconds_total', 'rows_in', 'rows_out'):
+        total[key] += values[key]
+    for key in ('seconds_max', 'peak_memory_bytes'):
+        total[key] = max(total[key], values[key])
+
+
+def merge(stats, other):
+    for name, values in other.items():
+        record(stats, name, values)
+
+
+def to_prometheus(stats):
+    """
+    Переводит метрики в текстовый формат Prometheus
+
+    Args:
+        stats (dict): Этап -> накопленные значения
+
+    Returns:
+        str: Текст для node_exporter textfile collector или pushgateway
+
+    >>> print(to_prometheus({'sort': {'count': 1, 'seconds_total': 0.5, 'seconds_max': 0.5, 'rows_in': 3,
+    ...                               'rows_out': 3, 'peak_memory_bytes': 64}}).splitlines()[2])
+    vacancy_stage_calls_total{stage="sort"} 1
+    """
+    metrics = [
+        ('vacancy_stage_calls_total', 'counter', 'Количество выполнений этапа', 'count'),
+        ('vacancy_stage_seconds_total', 'counter', 'Суммарное время этапа, с', 'seconds_total'),
+        ('vacancy_stage_seconds_max', 'gauge', 'Самое долгое выполнение этапа, с', 'seconds_max'),
+        ('vacancy_stage_rows_in_total', 'counter', 'Строк на входе этапа', 'rows_in'),
+        ('vacancy_stage_rows_out_total', 'counter', 'Строк на выходе этапа', 'rows_out'),
+        ('vacancy_stage_peak_memory_bytes', 'gauge', 'Пик памяти этапа по tracemalloc, байт', 'peak_memory_bytes'),
+    ]
+    lines = []
+    for metric, metric_type, description, key in metrics:
+        lines += ['# HELP {0} {1}'.format(metric, description), '# TYPE {0} {1}'.format(metric, metric_type)]
+        lines += ['{0}{{stage="{1}"}} {2}'.format(metric, name, values[key]) for name, values in sorted(stats.items())]
+    return '\n'.join(lines) + '\n'
+
+
+registry = None
+
+
+def span(name, rows_in=None):
+    """
+    Открывает замер этапа: with span('read') as stage: ...; stage.rows_out = len(rows)
+
+    Args:
+        name (str): Название этапа, одно из stages
+        rows_in (int or None): Строк на входе
+
+    Returns:
+        Span or NoSpan: Замер или пустой объект, если метрики выключены
+    """
+    if registry is None:
+        return no_span
+    if registry.pid != os.getpid():
+        # рабочий процесс, созданный через fork, получил копию реестра основного процесса
+        enable(registry.directory)
+    return Span(registry, name, rows_in)
+
+
+def enable(directory):
+    """
+    Включает метрики в текущем процессе
+
+    Args:
+        directory (str): Директория для metrics.json и metrics.prom
+    """
+    global registry
+    if registry is None or registry.pid != os.getpid():
+        registry = Registry(directory)
+
+
+if os.environ.get(ENVIRONMENT_VARIABLE):
+    enable(os.environ[ENVIRONMENT_VARIABLE])
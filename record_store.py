@@ -0,0 +1,299 @@
+import csv
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+
+from compressed_io import open_text
+from lab_5_2 import get_cleaner, work_experience_enum
+from snapshot import ALIGNMENT, format_datetime, missing_offset, source_fingerprint, source_is_fresh
+
+# Хранилище из двух файлов рядом с csv:
+#   <csv>.records - MAGIC, длина json заголовка, заголовок и выровненный массив записей фиксированной длины;
+#   <csv>.heap - куча utf-8 строк, запись хранит смещение и длину каждого текстового поля.
+# Оба файла открываются через mmap, поэтому процессы-читатели делят страницы через кеш ОС
+MAGIC = b'VACREC01'
+RECORDS_SUFFIX = '.records'
+HEAP_SUFFIX = '.heap'
+
+float_columns = ('salary_from', 'salary_to')
+timestamp_columns = ('published_at',)
+# Перечисления хранятся одним байтом. Словари опыта и булевых полей заданы заранее,
+# чтобы код совпадал с рангом опыта (work_experience_enum) и со значением флага
+enum_columns = {
+    'salary_currency': [],
+    'experience_id': list(work_experience_enum),
+    'premium': ['False', 'True'],
+    'salary_gross': ['False', 'True'],
+}
+missing_code = 255
+struct_formats = {'|u1': 'B', '<u4': 'I', '<u8': 'Q', '<i2': 'h', '<i8': 'q', '<f8': 'd'}
+# Значения этих текстовых столбцов часто повторяются, поэтому в кучу они пишутся один раз
+interned_columns = {'area_name', 'employer_name'}
+
+
+def record_fields(header):
+    """
+    Составляет описание полей записи по заголовку csv
+
+    Args:
+        header (list): Заголовки csv
+
+    Returns:
+        list: Пары (поле, формат numpy), порядок полей - порядок в записи
+
+    >>> record_fields(['name', 'salary_from', 'premium', 'published_at'])[:3]
+    [('complete', '|u1'), ('name_offset', '<u8'), ('name_length', '<u4')]
+    """
+    fields = [('complete', '|u1')]
+    for name in header:
+        if name in float_columns:
+            fields.append((name, '<f8'))
+        elif name in timestamp_columns:
+            fields += [(name, '<i8'), (name + '_tz', '<i2')]
+        elif name in enum_columns:
+            fields.append((name, '|u1'))
+        else:
+            fields += [(name + '_offset', '<u8'), (name + '_length', '<u4')]
+    return fields
+
+
+class HeapWriter:
+    """
+    Пишет строки в кучу и возвращает их адреса
+
+    Attributes:
+        file (file): Файл кучи
+        position (int): Текущий размер кучи
+        interned (dict): Уже записанные повторяющиеся строки -> (смещение, длина)
+    """
+    def __init__(self, file):
+        self.file = file
+        self.position = 0
+        self.interned = {}
+
+    def write(self, string, intern=False):
+        """
+        Записывает строку
+
+        Args:
+            string (str): Строка
+            intern (bool): Переиспользовать ли ранее записанную такую же строку
+
+        Returns:
+            tuple: Смещение и длина в байтах
+        """
+        if intern and string in self.interned:
+            return self.interned[string]
+        data = string.encode('utf-8')
+        address = self.position, len(data)
+        self.file.write(data)
+        self.position += len(data)
+        if intern:
+            self.interned[string] = address
+        return address
+
+
+def build_record_store(file_name):
+    """
+    Разбирает csv файл и записывает хранилище записей фиксированной длины и кучу строк
+
+    Args:
+        file_name (str): Название csv файла
+
+    Returns:
+        str: Название файла записей
+    """
+    fingerprint = source_fingerprint(file_name)
+    records_name, heap_name = file_name + RECORDS_SUFFIX, file_name + HEAP_SUFFIX
+    vocabularies = {name: list(values) for name, values in enum_columns.items()}
+    codes = {name: {value: code for code, value in enumerate(values)} for name, values in vocabularies.items()}
+
+    with open_text(file_name, encoding='utf-8-sig', newline='') as file, \
+            open(heap_name + '.tmp', 'wb') as heap_file, open(records_name + '.tmp', 'wb') as records_file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        fields = record_fields(header)
+        cleaners = {name: get_cleaner(name) for name in header}
+        record = struct.Struct('<' + ''.join(struct_formats[field_format] for _, field_format in fields))
+        header_bytes = json.dumps({'version': 1, 'source': fingerprint, 'header': header, 'fields': fields,
+                                   'vocabularies': vocabularies}, ensure_ascii=False).encode('utf-8')
+        # Словари перечислений дописываются при разборе, поэтому место под заголовок резервируется с запасом:
+        # 64 КБ хватает на четыре словаря по 254 значения
+        reserved = len(header_bytes) + 65536
+        reserved += -(len(MAGIC) + 8 + reserved) % ALIGNMENT
+        records_file.write(b'\0' * (len(MAGIC) + 8 + reserved))
+
+        heap = HeapWriter(heap_file)
+        rows = 0
+        for row in reader:
+            if len(row) != len(header):
+                continue
+            values = ['' not in row]
+            for name, cell in zip(header, row):
+                if name in float_columns:
+                    values.append(float(cell) if cell != '' else float('nan'))
+                elif name in timestamp_columns:
+                    if cell == '':
+                        values += [0, missing_offset]
+                    else:
+                        value = datetime.datetime.fromisoformat(cell)
+                        values += [int(value.timestamp()), int(value.utcoffset().total_seconds()) // 60]
+                elif name in enum_columns:
+                    cell = cleaners[name](cell)
+                    if cell == '':
+                        values.append(missing_code)
+                        continue
+                    if cell not in codes[name]:
+                        if len(vocabularies[name]) == missing_code:
+                            raise ValueError('Слишком много значений в столбце {0}'.format(name))
+                        codes[name][cell] = len(vocabularies[name])
+                        vocabularies[name].append(cell)
+                    values.append(codes[name][cell])
+                else:
+                    values += heap.write(cleaners[name](cell), name in interned_columns)
+            records_file.write(record.pack(*values))
+            rows += 1
+
+        header_bytes = json.dumps({'version': 1, 'source': fingerprint, 'header': header, 'fields': fields,
+                                   'vocabularies': vocabularies, 'rows': rows}, ensure_ascii=False).encode('utf-8')
+        if len(header_bytes) > reserved:
+            raise ValueError('Заголовок хранилища не поместился в зарезервированное место')
+        records_file.seek(0)
+        records_file.write(MAGIC + struct.pack('<Q', reserved) + header_bytes.ljust(reserved))
+
+    os.replace(heap_name + '.tmp', heap_name)
+    os.replace(records_name + '.tmp', records_name)
+    return records_name
+
+
+class RecordStore:
+    """
+    Произвольный доступ к вакансиям по номеру строки без загрузки всего набора
+
+    Attributes:
+        header (list): Заголовки исходного csv
+        vocabularies (dict): Значения перечислений по кодам
+        records (ndarray): Структурированный массив записей поверх mmap
+        heap (mmap): Куча строк
+    """
+    def __init__(self, records_name, heap_name):
+        """
+        Открывает хранилище
+
+        Args:
+            records_name (str): Название файла записей
+            heap_name (str): Название файла кучи
+        """
+        import numpy as np
+
+        with open(records_name, 'rb') as file:
+            self.records_mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.records_mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError('{0} не является хранилищем вакансий'.format(records_name))
+        reserved = struct.unpack_from('<Q', self.records_mmap, len(MAGIC))[0]
+        meta = json.loads(self.records_mmap[len(MAGIC) + 8:len(MAGIC) + 8 + reserved].decode('utf-8'))
+        self.source = meta['source']
+        self.header = meta['header']
+        self.vocabularies = meta['vocabularies']
+        self.dtype = np.dtype([tuple(field) for field in meta['fields']])
+        self.records = np.frombuffer(self.records_mmap, dtype=self.dtype, count=meta['rows'],
+                                     offset=len(MAGIC) + 8 + reserved)
+        with open(heap_name, 'rb') as file:
+            # mmap не умеет отображать пустой файл
+            self.heap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b''
+
+    def __len__(self):
+        return len(self.records)
+
+    def complete_indexes(self):
+        """
+        Возвращает номера строк, в которых в исходном csv не было пустых ячеек, как после csv_reader
+
+        Returns:
+            ndarray: Номера строк
+        """
+        import numpy as np
+
+        return np.flatnonzero(self.records['complete'])
+
+    def value(self, record, name):
+        """
+        Восстанавливает значение поля записи в виде очищенной строки
+
+        Args:
+            record (np.void): Запись
+            name (str): Название столбца
+
+        Returns:
+            str: Значение, пустая строка для пропуска
+        """
+        if name in float_columns:
+            value = float(record[name])
+            return '' if value != value else str(value)
+        if name in timestamp_columns:
+            return format_datetime(int(record[name]), int(record[name + '_tz']))
+        if name in enum_columns:
+            code = int(record[name])
+            return '' if code == missing_code else self.vocabularies[name][code]
+        offset = int(record[name + '_offset'])
+        return self.heap[offset:offset + int(record[name + '_length'])].decode('utf-8')
+
+    def row(self, index):
+        """
+        Возвращает строку по номеру
+
+        Args:
+            index (int): Номер строки
+
+        Returns:
+            list: Очищенные значения в порядке заголовка
+        """
+        record = self.records[index]
+        return [self.value(record, name) for name in self.header]
+
+    def rows(self, indexes):
+        """
+        Возвращает строки по номерам, например, по результатам поиска в индексе
+
+        Args:
+            indexes (iterable): Номера строк
+
+        Returns:
+            list: Строки в порядке номеров
+        """
+        return [self.row(index) for index in indexes]
+
+    def close(self):
+        self.records = None
+        self.records_mmap.close()
+        if self.heap:
+            self.heap.close()
+
+
+def open_record_store(file_name):
+    """
+    Открывает хранилище записей csv файла, если оно строилось, и пересобирает его, если исходный файл изменился
+
+    Args:
+        file_name (str): Название исходного csv файла
+
+    Returns:
+        RecordStore or None: Хранилище или None
+    """
+    records_name, heap_name = file_name + RECORDS_SUFFIX, file_name + HEAP_SUFFIX
+    if not (os.path.exists(records_name) and os.path.exists(heap_name)):
+        return None
+    store = RecordStore(records_name, heap_name)
+    if not source_is_fresh(store.source, file_name, records_name):
+        store.close()
+        build_record_store(file_name)
+        store = RecordStore(records_name, heap_name)
+    return store
+
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or [input('Введите название файла: ')]:
+        print('Хранилище сохранено: {0}'.format(build_record_store(name)))
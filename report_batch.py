@@ -0,0 +1,286 @@
+import concurrent.futures
+import hashlib
+import os
+import re
+import shutil
+import time
+
+from lab_2_1_3 import Report
+from metrics import span
+
+# Ресурсы одного процесса-воркера: шаблон компилируется и фигуры создаются один раз,
+# затем переиспользуются для всех отчетов, которые обработает процесс
+worker_resources = {}
+
+windows_wkhtmltopdf = r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
+
+
+def find_wkhtmltopdf(path=None):
+    """
+    Ищет исполняемый файл wkhtmltopdf
+
+    Args:
+        path (str or None): Явно заданный путь
+
+    Returns:
+        str or None: Путь к wkhtmltopdf или None, если он не установлен
+    """
+    for candidate in (path, os.environ.get('WKHTMLTOPDF')):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    found = shutil.which('wkhtmltopdf')
+    if found is None and os.path.exists(windows_wkhtmltopdf):
+        found = windows_wkhtmltopdf
+    return found
+
+
+def get_pdfkit_configuration(path=None):
+    """
+    Создает конфигурацию pdfkit для найденного wkhtmltopdf
+
+    Args:
+        path (str or None): Явно заданный путь к wkhtmltopdf
+
+    Returns:
+        pdfkit.configuration or None: Конфигурация или None, если wkhtmltopdf не установлен
+    """
+    import pdfkit
+
+    path = find_wkhtmltopdf(path)
+    return pdfkit.configuration(wkhtmltopdf=path) if path else None
+
+
+def make_file_name(name):
+    """
+    Превращает название профессии или региона в безопасное имя файла
+
+    Args:
+        name (str): Название
+
+    Returns:
+        str: Имя файла без расширения
+
+    >>> make_file_name('Аналитик / Data scientist')
+    'Аналитик_Data_scientist'
+    """
+    return re.sub(r'[^\w-]+', '_', name).strip('_') or 'report'
+
+
+def make_file_names(names):
+    """
+    Подбирает имена файлов для пачки названий так, чтобы они не совпадали: при совпадении
+    (без учета регистра) к имени добавляется короткий хеш исходного названия
+
+    Args:
+        names (iterable): Названия
+
+    Returns:
+        dict: Название -> имя файла без расширения
+
+    >>> make_file_names(['C++', 'C#', 'Python'])
+    {'C++': 'C_62420a', 'C#': 'C_0f1572', 'Python': 'Python'}
+    """
+    names = list(names)
+    stems = dict([(name, make_file_name(name)) for name in names])
+    counts = {}
+    for stem in stems.values():
+        counts[stem.casefold()] = counts.get(stem.casefold(), 0) + 1
+    result = {}
+    used = set()
+    for name in names:
+        stem = stems[name]
+        if counts[stem.casefold()] > 1:
+            stem = '{0}_{1}'.format(stem, hashlib.blake2b(name.encode('utf-8'), digest_size=3).hexdigest())
+        while stem.casefold() in used:
+            stem += '_'
+        used.add(stem.casefold())
+        result[name] = stem
+    return result
+
+
+def init_worker(template_dir, template_name, output_dir, wkhtmltopdf):
+    """
+    Готовит общие ресурсы процесса: шаблон, фигуры с бэкендом Agg и конфигурацию pdfkit
+
+    Args:
+        template_dir (str): Директория с шаблонами
+        template_name (str): Имя html шаблона
+        output_dir (str): Директория для готовых отчетов
+        wkhtmltopdf (str or None): Путь к wkhtmltopdf
+    """
+    from jinja2 import Environment, FileSystemLoader
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    table_figure = Figure(figsize=(8.27, 11.69))
+    FigureCanvasAgg(table_figure)
+
+    worker_resources.update({
+        'template': Environment(loader=FileSystemLoader(template_dir)).get_template(template_name),
+        'figure': figure,
+        'axes': figure.subplots(nrows=2, ncols=2),
+        'table_figure': table_figure,
+        'output_dir': output_dir,
+        'pdfkit_configuration': get_pdfkit_configuration(wkhtmltopdf),
+    })
+
+
+def draw_figure(report):
+    """
+    Рисует графики отчета на переиспользуемой фигуре процесса
+
+    Args:
+        report (Report): Отчет со статистикой
+
+    Returns:
+        Figure: Фигура с графиками
+    """
+    figure = worker_resources['figure']
+    for ax in worker_resources['axes'].flat:
+        ax.clear()
+    report.draw_image(worker_resources['axes'])
+    figure.tight_layout()
+    return figure
+
+
+def render_fallback_pdf(report, figure, pdf_path):
+    """
+    Формирует pdf средствами matplotlib, когда wkhtmltopdf не установлен.
+    Первая страница - графики, вторая - таблицы статистики, третья - медианы и 90-е перцентили, если они есть
+
+    Args:
+        report (Report): Отчет со статистикой
+        figure (Figure): Фигура с графиками
+        pdf_path (str): Путь к pdf файлу
+    """
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    table_figure = worker_resources['table_figure']
+    table_figure.clear()
+    table_figure.suptitle('Аналитика по зарплатам и городам для профессии ' + report.vacancy_name, fontsize=10)
+    year_ax, city_ax = table_figure.subplots(nrows=2, ncols=1)
+    year_ax.axis('off')
+    city_ax.axis('off')
+
+    year_rows = report.get_year_rows()
+    if year_rows:
+        year_ax.table(cellText=year_rows, loc='upper center', colLabels=[
+            'Год', 'Средняя зарплата', 'Количество вакансий',
+            'Средняя зарплата - ' + report.vacancy_name, 'Количество вакансий - ' + report.vacancy_name])
+    city_rows = [[city1, value1, city2, '{0}%'.format(round(value2 * 100, 2))]
+                 for (city1, value1), (city2, value2) in zip(report.stats5.items(), report.stats6.items())]
+    if city_rows:
+        city_ax.table(cellText=city_rows, loc='upper center',
+                      colLabels=['Город', 'Уровень зарплат', 'Город', 'Доля вакансий'])
+
+    with PdfPages(pdf_path) as pdf:
+        pdf.savefig(figure)
+        pdf.savefig(table_figure)
+        quantile_rows = report.get_quantile_rows()
+        if quantile_rows:
+            table_figure.clear()
+            quantile_ax = table_figure.subplots()
+            quantile_ax.axis('off')
+            quantile_ax.set_title('Медиана и 90-й перцентиль зарплат по годам', fontsize=10)
+            quantile_ax.table(cellText=quantile_rows, loc='upper center', colLabels=[
+                'Год', 'Медиана', '90-й перцентиль',
+                'Медиана - ' + report.vacancy_name, '90-й перцентиль - ' + report.vacancy_name])
+            pdf.savefig(table_figure)
+
+
+def render_report(job):
+    """
+    Формирует график и pdf для одного отчета внутри процесса-воркера
+
+    Args:
+        job (tuple): Название профессии (или региона), кортеж статистик DataSet.get_statistic
+            (в конце кортежа могут быть медианы и 90-е перцентили, как в MultiDataSet.get_statistics)
+            и, необязательно, имя файла из make_file_names
+
+    Returns:
+        str: Путь к сформированному pdf
+    """
+    import pdfkit
+
+    name, stats = job[:2]
+    report = Report(name, *stats)
+    file_name = os.path.join(worker_resources['output_dir'], job[2] if len(job) > 2 else make_file_name(name))
+    image_path = os.path.abspath(file_name + '.png')
+    pdf_path = file_name + '.pdf'
+
+    with span('report', len(report.stats1)):
+        figure = draw_figure(report)
+        figure.savefig(image_path)
+
+        configuration = worker_resources['pdfkit_configuration']
+        if configuration is None:
+            render_fallback_pdf(report, figure, pdf_path)
+        else:
+            html = report.render_html(worker_resources['template'], image_path)
+            pdfkit.from_string(html, pdf_path, configuration=configuration,
+                               options={'enable-local-file-access': '', 'quiet': ''})
+    return pdf_path
+
+
+class ReportBatch:
+    """
+    Формирует пачку отчетов в нескольких процессах с общими ресурсами отрисовки
+
+    Attributes:
+        output_dir (str): Директория для готовых отчетов
+        template_dir (str): Директория с шаблонами
+        template_name (str): Имя html шаблона
+        processes (int or None): Количество процессов, None - по числу ядер
+        wkhtmltopdf (str or None): Путь к wkhtmltopdf, None - искать в PATH и переменной WKHTMLTOPDF
+    """
+    def __init__(self, output_dir='output', template_dir='.', template_name='pdf_template.html',
+                 processes=None, wkhtmltopdf=None):
+        """
+        Инициализирует объект ReportBatch
+
+        Args:
+            output_dir (str): Директория для готовых отчетов
+            template_dir (str): Директория с шаблонами
+            template_name (str): Имя html шаблона
+            processes (int or None): Количество процессов
+            wkhtmltopdf (str or None): Путь к wkhtmltopdf
+        """
+        self.output_dir = output_dir
+        self.template_dir = template_dir
+        self.template_name = template_name
+        self.processes = processes
+        self.wkhtmltopdf = wkhtmltopdf
+
+    def generate(self, statistics):
+        """
+        Формирует отчеты и печатает пропускную способность
+
+        Args:
+            statistics (dict): Название профессии (или региона) -> кортеж статистик DataSet.get_statistic
+
+        Returns:
+            list: Пути к сформированным pdf
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        start = time.perf_counter()
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.processes, initializer=init_worker,
+                initargs=(self.template_dir, self.template_name, self.output_dir, self.wkhtmltopdf)) as ex:
+            # разные названия с одинаковым безопасным именем (C++ и C#) иначе писали бы в один файл
+            file_names = make_file_names(statistics)
+            pdf_paths = list(ex.map(render_report, [(name, stats, file_names[name]) for name, stats in statistics.items()]))
+        elapsed = time.perf_counter() - start
+        print('Сформировано отчетов: {0} за {1:.2f} с ({2:.1f} отчетов в минуту)'.format(
+            len(pdf_paths), elapsed, len(pdf_paths) * 60 / elapsed if elapsed else 0))
+        return pdf_paths
+
+
+if __name__ == '__main__':
+    from batch_statistic import MultiDataSet
+
+    file_name = input('Введите название файла: ')
+    vacancy_names = [name.strip() for name in input('Введите названия профессий через запятую: ').split(',')]
+    output_dir = input('Введите директорию для отчетов: ') or 'output'
+    ReportBatch(output_dir).generate(MultiDataSet(file_name, vacancy_names).get_statistics())
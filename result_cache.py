@@ -0,0 +1,253 @@
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import sys
+
+# Постоянный кеш результатов статистики: повторный запрос с тем же файлом и параметрами не сканирует файл.
+# Ключ - название вычисления, отпечаток файла (размер и время изменения или хеш содержимого),
+# параметры запроса и версия кода (хеш исходников модулей, которые считают результат).
+# Записи - pickle файлы в директории кеша; при попадании время изменения записи обновляется,
+# и при превышении размера удаляются давно не использованные записи
+ENVIRONMENT_VARIABLE = 'VACANCY_RESULT_CACHE'
+SIZE_VARIABLE = 'VACANCY_RESULT_CACHE_SIZE'
+
+default_directory = '.result_cache'
+default_max_bytes = 256 * 2 ** 20
+entry_suffix = '.pickle'
+
+
+def file_fingerprint(file_name, with_hash=False):
+    """
+    Снимает отпечаток файла для ключа кеша
+
+    Args:
+        file_name (str): Название файла
+        with_hash (bool): Считать ли хеш содержимого вместо времени изменения
+
+    Returns:
+        list: Размер и время изменения в нс или размер и blake2b хеш содержимого
+    """
+    stat = os.stat(file_name)
+    if not with_hash:
+        return [stat.st_size, stat.st_mtime_ns]
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return [stat.st_size, digest.hexdigest()]
+
+
+code_versions = {}
+
+
+def code_version(modules):
+    """
+    Возвращает хеш исходников модулей: после правки кода старые записи кеша перестают совпадать
+
+    Args:
+        modules (iterable): Названия модулей
+
+    Returns:
+        str: Хеш
+    """
+    key = tuple(modules)
+    if key not in code_versions:
+        digest = hashlib.blake2b(digest_size=8)
+        for name in key:
+            source = getattr(sys.modules.get(name) or importlib.import_module(name), '__file__', None)
+            if source and os.path.exists(source):
+                with open(source, 'rb') as file:
+                    digest.update(file.read())
+        code_versions[key] = digest.hexdigest()
+    return code_versions[key]
+
+
+class ResultCache:
+    """
+    Кеш результатов на диске с вытеснением давно не использованных записей
+
+    Attributes:
+        directory (str): Директория кеша
+        max_bytes (int): Наибольший суммарный размер записей
+        with_hash (bool): Ключ по хешу содержимого файла, а не по размеру и времени изменения
+        hits (int): Попадания в этом процессе
+        misses (int): Промахи в этом процессе
+    """
+    def __init__(self, directory=default_directory, max_bytes=default_max_bytes, with_hash=False):
+        """
+        Инициализирует объект ResultCache
+
+        Args:
+            directory (str): Директория кеша
+            max_bytes (int): Наибольший суммарный размер записей
+            with_hash (bool): Ключ по хешу содержимого файла
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.with_hash = with_hash
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, name, file_name, arguments=(), modules=()):
+        """
+        Собирает ключ записи
+
+        Args:
+            name (str): Название вычисления
+            file_name (str): Файл с данными
+            arguments (tuple): Параметры запроса в том виде, в каком их видит вычисление
+            modules (iterable): Модули, от кода которых зависит результат
+
+        Returns:
+            str: Ключ - хеш всех составляющих
+        """
+        parts = [name, os.path.abspath(file_name), file_fingerprint(file_name, self.with_hash), list(arguments),
+                 code_version(modules)]
+        return hashlib.blake2b(json.dumps(parts, ensure_ascii=False).encode('utf-8'), digest_size=16).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + entry_suffix)
+
+    def get(self, key):
+        """
+        Ищет запись
+
+        Args:
+            key (str): Ключ make_key
+
+        Returns:
+            bool: Найдена ли запись
+            object: Сохраненный результат или None
+        """
+        path = self.entry_path(key)
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return False, None
+        os.utime(path)
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value):
+        """
+        Сохраняет запись и вытесняет старые, если кеш превысил max_bytes
+
+        Args:
+            key (str): Ключ make_key
+            value (object): Результат, который можно сохранить через pickle
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.entry_path(key)
+        with open(path + '.tmp', 'wb') as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+        self.evict()
+
+    def entries(self):
+        """
+        Возвращает записи от давно не использованных к недавним
+
+        Returns:
+            list: Пары (путь, stat)
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(entry_suffix)]
+        entries = []
+        for path in paths:
+            try:
+                entries.append((path, os.stat(path)))
+            except FileNotFoundError:
+                pass
+        return sorted(entries, key=lambda entry: entry[1].st_mtime_ns)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+
+    def clear(self):
+        for path, _ in self.entries():
+            os.remove(path)
+
+    def call(self, name, file_name, function, arguments=(), modules=()):
+        """
+        Возвращает сохраненный результат или вычисляет и сохраняет его
+
+        Args:
+            name (str): Название вычисления
+            file_name (str): Файл с данными
+            function (function): Вычисление без аргументов
+            arguments (tuple): Параметры запроса, от которых зависит результат
+            modules (iterable): Модули, от кода которых зависит результат
+
+        Returns:
+            object: Результат function
+        """
+        key = self.make_key(name, file_name, arguments, modules)
+        found, value = self.get(key)
+        if not found:
+            value = function()
+            self.put(key, value)
+        return value
+
+    def report(self):
+        return 'Кеш результатов: попаданий {0}, промахов {1}'.format(self.hits, self.misses)
+
+
+class NoCache(ResultCache):
+    """Выключенный кеш: всегда вычисляет, но считает промахи"""
+    def call(self, name, file_name, function, arguments=(), modules=()):
+        self.misses += 1
+        return function()
+
+
+cache = None
+
+
+def get_cache():
+    """
+    Возвращает кеш процесса. VACANCY_RESULT_CACHE задает директорию, значение 0 выключает кеш,
+    VACANCY_RESULT_CACHE_SIZE - наибольший размер в байтах
+
+    Returns:
+        ResultCache: Кеш
+    """
+    global cache
+    if cache is None:
+        directory = os.environ.get(ENVIRONMENT_VARIABLE, default_directory)
+        max_bytes = int(os.environ.get(SIZE_VARIABLE, default_max_bytes))
+        cache = NoCache() if directory == '0' else ResultCache(directory, max_bytes)
+    return cache
+
+
+def cached_call(name, file_name, function, arguments=(), modules=()):
+    """Вызывает ResultCache.call кеша процесса"""
+    return get_cache().call(name, file_name, function, arguments, modules)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Состояние и очистка кеша результатов')
+    parser.add_argument('--clear', action='store_true', help='удалить все записи')
+    args = parser.parse_args()
+
+    result_cache = get_cache()
+    if args.clear:
+        result_cache.clear()
+    entries = result_cache.entries()
+    print('Записей: {0}, размер: {1:.1f} МБ из {2:.1f} МБ ({3})'.format(
+        len(entries), sum(stat.st_size for _, stat in entries) / 2 ** 20, result_cache.max_bytes / 2 ** 20,
+        result_cache.directory))
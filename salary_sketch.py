@@ -0,0 +1,330 @@
+import math
+import random
+
+# Потоковые квантили зарплат: KLL скетч (Karnin, Lang, Liberty) хранит O(k log(n / k)) значений
+# вместо всех зарплат, ошибка ранга при k = 200 - около 1%. Скетчи с одинаковым k сливаются,
+# поэтому воркеры пула считают скетч своего чанка, а основной процесс их объединяет.
+# Пока значений меньше емкости первого уровня, квантили точные
+default_k = 200
+# Во сколько раз уровень меньше следующего за ним
+level_decay = 2 / 3
+# Медиана и 90-й перцентиль
+default_quantiles = (0.5, 0.9)
+
+
+class KLLSketch:
+    """
+    Скетч распределения значений для приближенных квантилей
+
+    Attributes:
+        k (int): Емкость верхнего уровня, от нее зависит точность
+        levels (list): Уровни, значение уровня h заменяет 2 ** h исходных значений
+        count (int): Сколько значений добавлено
+        size (int): Сколько значений хранится
+        max_size (int): Суммарная емкость уровней, при ее достижении уровни сжимаются
+    """
+    def __init__(self, k=default_k, seed=0):
+        """
+        Инициализирует пустой объект KLLSketch
+
+        Args:
+            k (int): Емкость верхнего уровня
+            seed (int): Начальное значение генератора, скетч с тем же seed и входом дает те же квантили
+        """
+        self.k = k
+        self.random = random.Random(seed)
+        self.levels = []
+        self.count = 0
+        self.size = 0
+        self.max_size = 0
+        self.grow()
+
+    def __len__(self):
+        return self.count
+
+    def level_capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * level_decay ** depth)))
+
+    def grow(self):
+        self.levels.append([])
+        self.max_size = sum(self.level_capacity(level) for level in range(len(self.levels)))
+
+    def add(self, value):
+        """
+        Добавляет значение
+
+        Args:
+            value (float): Значение
+        """
+        self.levels[0].append(value)
+        self.count += 1
+        self.size += 1
+        if self.size >= self.max_size:
+            self.compress()
+
+    def update(self, values):
+        """
+        Добавляет много значений сразу: сжатие идет один раз на весь список
+
+        Args:
+            values (iterable): Значения
+        """
+        values = list(values)
+        self.levels[0].extend(values)
+        self.count += len(values)
+        self.size += len(values)
+        if self.size >= self.max_size:
+            self.compress()
+
+    def compress(self):
+        """Сжимает переполненные уровни, пока значения не поместятся в max_size"""
+        while self.size >= self.max_size:
+            for level in range(len(self.levels)):
+                if len(self.levels[level]) >= self.level_capacity(level):
+                    if level + 1 == len(self.levels):
+                        self.grow()
+                    self.compact(level)
+                    if self.size < self.max_size:
+                        break
+
+    def compact(self, level):
+        # из каждой пары соседних значений в следующий уровень уходит одно, со случайным сдвигом,
+        # вес значения удваивается; при нечетной длине наименьшее значение остается на уровне
+        items = self.levels[level]
+        items.sort()
+        odd = len(items) % 2
+        promoted = items[odd + self.random.getrandbits(1)::2]
+        self.levels[level + 1].extend(promoted)
+        self.levels[level] = items[:odd]
+        self.size -= len(items) - odd - len(promoted)
+
+    def merge(self, other):
+        """
+        Добавляет к скетчу значения другого скетча
+
+        Args:
+            other (KLLSketch): Скетч с тем же k
+        """
+        if other.k != self.k:
+            raise ValueError('Скетчи с разной точностью: k = {0} и k = {1}'.format(self.k, other.k))
+        while len(self.levels) < len(other.levels):
+            self.grow()
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.size += other.size
+        if self.size >= self.max_size:
+            self.compress()
+
+    def quantiles(self, fractions=default_quantiles):
+        """
+        Считает квантили: наименьшее значение, ранг которого не меньше fraction * count,
+        как numpy.quantile(method='inverted_cdf')
+
+        Args:
+            fractions (iterable): Доли от 0 до 1
+
+        Returns:
+            list: Квантили, None для пустого скетча
+
+        >>> sketch = KLLSketch()
+        >>> sketch.update(range(1, 11))
+        >>> sketch.quantiles()
+        [5, 9]
+        >>> sketch = KLLSketch(k=50)
+        >>> sketch.update(range(100000))
+        >>> [abs(value - fraction * 100000) < 2000 for value, fraction in zip(sketch.quantiles(), default_quantiles)]
+        [True, True]
+        >>> sketch.size < 500
+        True
+        """
+        fractions = list(fractions)
+        if not self.count:
+            return [None for _ in fractions]
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        result = []
+        for fraction in fractions:
+            target = fraction * self.count
+            rank = 0
+            for value, weight in weighted:
+                rank += weight
+                if rank >= target:
+                    break
+            result.append(value)
+        return result
+
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'levels': self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Восстанавливает скетч из to_dict, например из json состояния
+
+        Args:
+            data (dict): Результат to_dict
+
+        Returns:
+            KLLSketch: Скетч, генератор которого засеян количеством значений
+
+        >>> sketch = KLLSketch(k=20)
+        >>> sketch.update(range(1000))
+        >>> copy = KLLSketch.from_dict(sketch.to_dict())
+        >>> copy.count, copy.quantiles() == sketch.quantiles()
+        (1000, True)
+        """
+        sketch = cls(data['k'], data['count'])
+        sketch.levels = [list(items) for items in data['levels']]
+        sketch.count = data['count']
+        sketch.size = sum(len(items) for items in sketch.levels)
+        sketch.max_size = sum(sketch.level_capacity(level) for level in range(len(sketch.levels)))
+        return sketch
+
+
+class SketchGroups:
+    """
+    Скетчи по ключам: годам, городам
+
+    Attributes:
+        k (int): Точность скетчей
+        sketches (dict): Ключ -> KLLSketch в порядке первого появления ключа
+    """
+    def __init__(self, k=default_k):
+        self.k = k
+        self.sketches = {}
+
+    def __len__(self):
+        return len(self.sketches)
+
+    def get(self, key):
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = KLLSketch(self.k)
+        return sketch
+
+    def add(self, key, value):
+        self.get(key).add(value)
+
+    def merge(self, other):
+        """
+        Сливает скетчи другой группы с одноименными
+
+        Args:
+            other (SketchGroups): Скетчи, например, одного чанка
+
+        >>> first, second = SketchGroups(), SketchGroups()
+        >>> for year, salary in [(2021, 100), (2021, 300), (2022, 50)]:
+        ...     first.add(year, salary)
+        >>> second.add(2021, 200)
+        >>> first.merge(second)
+        >>> first.summary()
+        {2021: (200, 300), 2022: (50, 50)}
+        """
+        for key, sketch in other.sketches.items():
+            self.get(key).merge(sketch)
+
+    def summary(self, keys=None):
+        """
+        Считает медиану и 90-й перцентиль по ключам
+
+        Args:
+            keys (iterable or None): Ключи в нужном порядке, None - все
+
+        Returns:
+            dict: Ключ -> (медиана, 90-й перцентиль), округленные вниз, как средние в DataSet.average
+        """
+        keys = self.sketches if keys is None else [key for key in keys if key in self.sketches]
+        return dict([(key, summarize(self.sketches[key])) for key in keys])
+
+    def to_list(self):
+        return [[key, sketch.to_dict()] for key, sketch in self.sketches.items()]
+
+    @classmethod
+    def from_list(cls, items, k=default_k):
+        groups = cls(k)
+        groups.sketches = dict([(key, KLLSketch.from_dict(data)) for key, data in items])
+        return groups
+
+
+def summarize(sketch):
+    # пустой скетч дает нули, как средняя зарплата чанка без вакансий профессии
+    if not sketch.count:
+        return 0, 0
+    return tuple(int(value) for value in sketch.quantiles(default_quantiles))
+
+
+def collect_quantiles(years, names, cities, city_names):
+    """
+    Собирает медианы и 90-е перцентили в формате, который печатает DataSet.print_statistic
+
+    Args:
+        years (SketchGroups): Зарплаты по годам
+        names (SketchGroups): Зарплаты вакансий профессии по годам
+        cities (SketchGroups): Зарплаты по городам
+        city_names (iterable): Города, попавшие в статистику
+
+    Returns:
+        dict: 'years', 'names', 'cities' -> {ключ: (медиана, 90-й перцентиль)}
+    """
+    names = names.summary() if names else dict([(year, (0, 0)) for year in years.sketches])
+    return {'years': years.summary(), 'names': names, 'cities': cities.summary(city_names)}
+
+
+def collect_chunk_quantiles(raw_data):
+    """
+    Сливает скетчи зарплат, которые воркеры futures.py и multyprocessing.py вернули в результате чанка
+    шестым и седьмым элементами (после года, средних и количеств)
+
+    Args:
+        raw_data (list): Результаты get_data_from_chunk
+
+    Returns:
+        dict: 'years', 'names' -> {год: (медиана, 90-й перцентиль)} по всем вакансиям и по вакансиям профессии
+
+    >>> first, second, empty = KLLSketch(), KLLSketch(), KLLSketch()
+    >>> first.update([100, 200, 300])
+    >>> second.update([400])
+    >>> collect_chunk_quantiles([('2021', 200, 3, 0, 0, first, empty), ('2021', 400, 1, 400, 1, second, second)])
+    {'years': {'2021': (200, 400)}, 'names': {'2021': (400, 400)}}
+    """
+    years, names = SketchGroups(), SketchGroups()
+    for result in raw_data:
+        year, sketch, profession_sketch = result[0], result[5], result[6]
+        years.get(year).merge(sketch)
+        names.get(year).merge(profession_sketch)
+    return {'years': years.summary(), 'names': names.summary()}
+
+
+class SalaryQuantiles:
+    """
+    Скетчи зарплат для DataSet.get_statistic: по годам, по годам для профессии и по городам
+
+    Attributes:
+        years (SketchGroups): Год -> скетч
+        names (SketchGroups): Год -> скетч вакансий профессии
+        cities (SketchGroups): Город -> скетч
+    """
+    def __init__(self, years=None, names=None, cities=None):
+        self.years = SketchGroups() if years is None else years
+        self.names = SketchGroups() if names is None else names
+        self.cities = SketchGroups() if cities is None else cities
+
+    def add(self, year, area_name, salary, is_profession):
+        self.years.add(year, salary)
+        if is_profession:
+            self.names.add(year, salary)
+        self.cities.add(area_name, salary)
+
+    def result(self, city_names):
+        return collect_quantiles(self.years, self.names, self.cities, city_names)
+
+    def to_dict(self):
+        return {'years': self.years.to_list(), 'names': self.names.to_list(), 'cities': self.cities.to_list()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(SketchGroups.from_list(data[key]) for key in ('years', 'names', 'cities')))
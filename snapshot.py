@@ -0,0 +1,523 @@
+import csv
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+
+from categorical import categorical_columns
+from compressed_io import open_text
+from lab_5_2 import check_valid_file, csv_reader, get_cleaner
+from metrics import span
+
+# Формат снимка: MAGIC, длина заголовка (8 байт little-endian), json заголовок, затем буферы столбцов,
+# каждый выровнен по ALIGNMENT байт, чтобы numpy мог читать их прямо из mmap.
+# Первый буфер - по байту на строку: 1, если в исходной строке не было пустых ячеек
+MAGIC = b'VACSNAP1'
+ALIGNMENT = 64
+SUFFIX = '.snapshot'
+# Файлы, которые строятся рядом с csv (снимок, хранилище записей record_store) и не являются исходными данными
+derived_suffixes = (SUFFIX, '.records', '.heap', '.tmp')
+
+category_columns = set(categorical_columns)
+float_columns = {'salary_from', 'salary_to', 'salary'}
+datetime_columns = {'published_at'}
+
+missing_offset = -32768
+# строк в блоке, который iter_rows декодирует за раз: память не зависит от размера снимка
+block_rows = 1000
+
+
+def source_fingerprint(file_name, with_hash=True):
+    """
+    Снимает отпечаток исходного файла
+
+    Args:
+        file_name (str): Название файла
+        with_hash (bool): Считать ли хеш содержимого
+
+    Returns:
+        dict: Размер, время изменения и blake2b хеш содержимого
+    """
+    stat = os.stat(file_name)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_name, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        fingerprint['hash'] = digest.hexdigest()
+    return fingerprint
+
+
+def source_is_fresh(source, file_name, header_file=None):
+    """
+    Сравнивает сохраненный отпечаток с текущим файлом. Если размер и время изменения совпали, хеш не пересчитывается.
+    Если изменилось только время (например, после touch), а хеш совпал, новое время записывается в source
+    и в заголовок header_file, чтобы следующие открытия снова обходились без хеша
+
+    Args:
+        source (dict): Отпечаток, сохраненный source_fingerprint
+        file_name (str): Название исходного файла
+        header_file (str or None): Снимок или хранилище записей, в json заголовке которого хранится source
+
+    Returns:
+        bool: True, если файл не изменился
+    """
+    fingerprint = source_fingerprint(file_name, with_hash=False)
+    if fingerprint['size'] != source['size']:
+        return False
+    if fingerprint['mtime_ns'] == source['mtime_ns']:
+        return True
+    fingerprint = source_fingerprint(file_name)
+    if fingerprint['hash'] != source['hash']:
+        return False
+    source.update(fingerprint)
+    if header_file is not None:
+        update_source(header_file, source)
+    return True
+
+
+def update_source(header_file, source):
+    """
+    Переписывает отпечаток исходного файла в json заголовке снимка или хранилища записей на месте.
+    Оба формата начинаются с 8 байт MAGIC и 8 байт длины заголовка; новый заголовок дополняется пробелами
+    до прежней длины, а если не помещается, файл не меняется
+
+    Args:
+        header_file (str): Снимок или хранилище записей
+        source (dict): Новый отпечаток
+    """
+    with open(header_file, 'r+b') as file:
+        start = len(MAGIC) + 8
+        length = struct.unpack('<Q', file.read(start)[len(MAGIC):])[0]
+        meta = json.loads(file.read(length).decode('utf-8'))
+        meta['source'] = source
+        header_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        if len(header_bytes) <= length:
+            file.seek(start)
+            file.write(header_bytes.ljust(length))
+
+
+class CategoryColumn:
+    """Очищенные строки с малым числом различных значений: коды int32 и словарь значений"""
+    kind = 'category'
+
+    def __init__(self, name):
+        self.name = name
+        self.clean = get_cleaner(name)
+        self.vocabulary = {}
+        self.codes = array('i')
+
+    def append(self, cell):
+        cell = self.clean(cell)
+        if cell == '':
+            self.codes.append(-1)
+            return
+        code = self.vocabulary.get(cell)
+        if code is None:
+            code = self.vocabulary[cell] = len(self.vocabulary)
+        self.codes.append(code)
+
+    def describe(self):
+        return {'vocabulary': list(self.vocabulary)}
+
+    def buffers(self):
+        return [('codes', '<i4', self.codes)]
+
+
+class FloatColumn:
+    """Числа float64, пропуск хранится как NaN"""
+    kind = 'float'
+
+    def __init__(self, name):
+        self.name = name
+        self.values = array('d')
+
+    def append(self, cell):
+        self.values.append(float(cell) if cell != '' else float('nan'))
+
+    def describe(self):
+        return {}
+
+    def buffers(self):
+        return [('values', '<f8', self.values)]
+
+
+class DatetimeColumn:
+    """Дата публикации: секунды unix-времени int64 и смещение часового пояса в минутах int16"""
+    kind = 'datetime'
+
+    def __init__(self, name):
+        self.name = name
+        self.timestamps = array('q')
+        self.offsets = array('h')
+
+    def append(self, cell):
+        if cell == '':
+            self.timestamps.append(0)
+            self.offsets.append(missing_offset)
+            return
+        value = datetime.datetime.fromisoformat(cell)
+        self.timestamps.append(int(value.timestamp()))
+        self.offsets.append(int(value.utcoffset().total_seconds()) // 60)
+
+    def describe(self):
+        return {}
+
+    def buffers(self):
+        return [('timestamps', '<i8', self.timestamps), ('offsets', '<i2', self.offsets)]
+
+
+class TextColumn:
+    """
+    Очищенный произвольный текст: смещения int64 и куча utf-8 байт, которая на время сборки лежит во временном файле.
+    Каждое значение в куче завершается нулевым байтом, поэтому весь столбец декодируется одним decode и split
+    """
+    kind = 'text'
+
+    def __init__(self, name):
+        self.name = name
+        self.clean = get_cleaner(name)
+        self.offsets = array('q', [0])
+        self.heap = tempfile.TemporaryFile()
+
+    def append(self, cell):
+        data = self.clean(cell.replace('\0', '')).encode('utf-8') + b'\0'
+        self.heap.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def describe(self):
+        return {}
+
+    def buffers(self):
+        self.heap.seek(0)
+        return [('offsets', '<i8', self.offsets), ('heap', '|u1', self.heap)]
+
+
+def make_column(name):
+    if name in category_columns:
+        return CategoryColumn(name)
+    if name in float_columns:
+        return FloatColumn(name)
+    if name in datetime_columns:
+        return DatetimeColumn(name)
+    return TextColumn(name)
+
+
+def snapshot_name_for(file_name):
+    return file_name + SUFFIX
+
+
+def build_snapshot(file_name, snapshot_name=None):
+    """
+    Разбирает csv файл один раз и сохраняет очищенные типизированные столбцы в снимок
+
+    Args:
+        file_name (str): Название csv файла
+        snapshot_name (str or None): Название файла снимка, по умолчанию file_name + '.snapshot'
+
+    Returns:
+        str: Название файла снимка
+    """
+    snapshot_name = snapshot_name or snapshot_name_for(file_name)
+    fingerprint = source_fingerprint(file_name)
+    with open_text(file_name, encoding='utf-8-sig', newline='') as file, span('clean') as stage:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        columns = [make_column(name) for name in header]
+        complete = array('b')
+        for row in reader:
+            if len(row) != len(header):
+                continue
+            for column, cell in zip(columns, row):
+                column.append(cell)
+            complete.append('' not in row)
+        stage.rows_out = len(complete)
+
+    layout = []
+    description = {}
+    position = len(complete)
+    layout.append((0, complete))
+    for column in columns:
+        description[column.name] = dict(column.describe(), kind=column.kind, buffers={})
+        for buffer_name, dtype, data in column.buffers():
+            size = data.seek(0, os.SEEK_END) if hasattr(data, 'seek') else len(data) * data.itemsize
+            position += -position % ALIGNMENT
+            description[column.name]['buffers'][buffer_name] = [position, dtype, size]
+            layout.append((position, data))
+            position += size
+
+    header_bytes = json.dumps({'version': 1, 'source': fingerprint, 'rows': len(complete), 'header': header,
+                               'columns': description}, ensure_ascii=False).encode('utf-8')
+    data_start = len(MAGIC) + 8 + len(header_bytes)
+    data_start += -data_start % ALIGNMENT
+
+    temporary_name = snapshot_name + '.tmp'
+    with open(temporary_name, 'wb') as out:
+        out.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+        for position, data in layout:
+            out.write(b'\0' * (data_start + position - out.tell()))
+            if hasattr(data, 'seek'):
+                data.seek(0)
+                shutil.copyfileobj(data, out)
+            else:
+                out.write(data.tobytes() if sys.byteorder == 'little' else swapped(data))
+    os.replace(temporary_name, snapshot_name)
+    return snapshot_name
+
+
+def swapped(data):
+    data = array(data.typecode, data)
+    data.byteswap()
+    return data.tobytes()
+
+
+class Snapshot:
+    """
+    Снимок набора вакансий, открытый через mmap. Страницы файла делятся между процессами через кеш ОС
+
+    Attributes:
+        file_name (str): Название файла снимка
+        header (list): Заголовки исходного csv
+        rows (int): Количество строк
+        columns (dict): Описание столбцов из заголовка снимка
+    """
+    def __init__(self, file_name):
+        """
+        Открывает снимок
+
+        Args:
+            file_name (str): Название файла снимка
+        """
+        self.file_name = file_name
+        with open(file_name, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError('{0} не является снимком вакансий'.format(file_name))
+        header_length = struct.unpack_from('<Q', self.mmap, len(MAGIC))[0]
+        meta = json.loads(self.mmap[len(MAGIC) + 8:len(MAGIC) + 8 + header_length].decode('utf-8'))
+        self.data_start = len(MAGIC) + 8 + header_length
+        self.data_start += -self.data_start % ALIGNMENT
+        self.source = meta['source']
+        self.rows = meta['rows']
+        self.header = meta['header']
+        self.columns = meta['columns']
+        self.vocabularies = {}
+
+    def buffer(self, column, buffer_name):
+        """
+        Возвращает буфер столбца как numpy массив без копирования
+
+        Args:
+            column (str): Название столбца
+            buffer_name (str): Название буфера
+
+        Returns:
+            ndarray: Массив поверх mmap
+        """
+        import numpy as np
+
+        offset, dtype, size = self.columns[column]['buffers'][buffer_name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self.mmap, dtype=dtype, count=size // dtype.itemsize, offset=self.data_start + offset)
+
+    def raw_buffer(self, column, buffer_name):
+        offset, dtype, size = self.columns[column]['buffers'][buffer_name]
+        return memoryview(self.mmap)[self.data_start + offset:self.data_start + offset + size]
+
+    def is_fresh(self, file_name):
+        """
+        Проверяет, что снимок построен по текущей версии исходного файла
+
+        Args:
+            file_name (str): Название исходного csv файла
+
+        Returns:
+            bool: True, если снимок актуален
+        """
+        return source_is_fresh(self.source, file_name, self.file_name)
+
+    def column_strings(self, name, start=0, stop=None):
+        """
+        Восстанавливает значения столбца (или строк start:stop) в виде строк, пропуски - пустые строки
+
+        Args:
+            name (str): Название столбца
+            start (int): Первая строка
+            stop (int or None): Строка после последней, None - до конца
+
+        Returns:
+            list: Строки столбца
+        """
+        stop = self.rows if stop is None else stop
+        column = self.columns[name]
+        kind = column['kind']
+        if kind == 'category':
+            vocabulary = self.vocabularies.get(name)
+            if vocabulary is None:
+                vocabulary = self.vocabularies[name] = column['vocabulary'] + ['']
+            return [vocabulary[code] for code in self.raw_buffer(name, 'codes').cast('i')[start:stop]]
+        if kind == 'float':
+            return ['' if value != value else str(value)
+                    for value in self.raw_buffer(name, 'values').cast('d')[start:stop]]
+        if kind == 'datetime':
+            return [format_datetime(timestamp, offset) for timestamp, offset in
+                    zip(self.raw_buffer(name, 'timestamps').cast('q')[start:stop],
+                        self.raw_buffer(name, 'offsets').cast('h')[start:stop])]
+        offsets = self.raw_buffer(name, 'offsets').cast('q')
+        return str(self.raw_buffer(name, 'heap')[offsets[start]:offsets[stop]], 'utf-8').split('\0')[:-1]
+
+    def iter_rows(self, skip_missing=True):
+        """
+        Возвращает строки в порядке заголовка в виде списков очищенных строк
+
+        Args:
+            skip_missing (bool): Пропускать строки, в которых в исходном csv были пустые ячейки, как csv_reader
+
+        Returns:
+            iterator: Списки строк
+        """
+        complete = memoryview(self.mmap)[self.data_start:self.data_start + self.rows]
+        # столбцы декодируются блоками по block_rows строк, а не целиком
+        for start in range(0, self.rows, block_rows):
+            stop = min(start + block_rows, self.rows)
+            columns = [self.column_strings(name, start, stop) for name in self.header]
+            for is_complete, row in zip(complete[start:stop], zip(*columns)):
+                if is_complete or not skip_missing:
+                    yield list(row)
+            # прочитанные страницы mmap иначе остаются в RSS процесса до конца прохода; данные остаются
+            # в кеше ОС, и повторное чтение их не пересчитывает
+            if hasattr(mmap, 'MADV_DONTNEED'):
+                self.mmap.madvise(mmap.MADV_DONTNEED)
+
+    def iter_dicts(self, skip_missing=True):
+        """
+        Возвращает строки в виде словарей заголовок -> строка, как DataSet.csv_reader из lab_2_1_3
+
+        Args:
+            skip_missing (bool): Пропускать строки с пустыми значениями
+
+        Returns:
+            iterator: Словари
+        """
+        for row in self.iter_rows(skip_missing):
+            yield dict(zip(self.header, row))
+
+    def to_frame(self, columns=None):
+        """
+        Собирает DataFrame: категории через pd.Categorical.from_codes, числа - без копирования из mmap
+
+        Args:
+            columns (list or None): Нужные столбцы, по умолчанию все
+
+        Returns:
+            DataFrame: Вакансии
+        """
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for name in columns or self.header:
+            kind = self.columns[name]['kind']
+            if kind == 'category':
+                data[name] = pd.Categorical.from_codes(self.buffer(name, 'codes'), self.columns[name]['vocabulary'])
+            elif kind == 'float':
+                data[name] = self.buffer(name, 'values')
+            elif kind == 'datetime':
+                offsets = self.buffer(name, 'offsets').astype(np.int64)
+                local = (self.buffer(name, 'timestamps') + offsets * 60).astype('datetime64[s]')
+                unique_offsets, inverse = np.unique(offsets, return_inverse=True)
+                zones = np.array(['{0}{1:02}{2:02}'.format('+' if offset >= 0 else '-', abs(offset) // 60, abs(offset) % 60)
+                                  for offset in unique_offsets.tolist()])
+                strings = np.char.add(np.datetime_as_string(local), zones[inverse])
+                data[name] = pd.Series(strings, dtype=object).where(offsets != missing_offset)
+            else:
+                data[name] = pd.Series(self.column_strings(name), dtype=object).replace('', np.nan)
+        return pd.DataFrame(data)
+
+
+def format_datetime(timestamp, offset):
+    """
+    Превращает сохраненные секунды и смещение обратно в строку формата hh.ru
+
+    Args:
+        timestamp (int): Секунды unix-времени
+        offset (int): Смещение часового пояса в минутах
+
+    Returns:
+        str: Дата в формате '%Y-%m-%dT%H:%M:%S%z'
+
+    >>> format_datetime(1657004400, 180)
+    '2022-07-05T10:00:00+0300'
+    """
+    if offset == missing_offset:
+        return ''
+    zone = datetime.timezone(datetime.timedelta(minutes=offset))
+    return datetime.datetime.fromtimestamp(timestamp, zone).strftime('%Y-%m-%dT%H:%M:%S%z')
+
+
+def open_snapshot(file_name):
+    """
+    Общий загрузчик: открывает снимок csv файла, если он есть, и пересобирает его, если исходный файл изменился
+
+    Args:
+        file_name (str): Название исходного csv файла
+
+    Returns:
+        Snapshot or None: Снимок или None, если снимок для файла не строился
+    """
+    snapshot_name = snapshot_name_for(file_name)
+    if not os.path.exists(snapshot_name):
+        return None
+    snapshot = Snapshot(snapshot_name)
+    if not snapshot.is_fresh(file_name):
+        snapshot.mmap.close()
+        snapshot = Snapshot(build_snapshot(file_name, snapshot_name))
+    return snapshot
+
+
+def list_sources(directory):
+    """
+    Возвращает файлы директории с чанками без построенных рядом с ними снимков и хранилищ
+
+    Args:
+        directory (str): Название директории
+
+    Returns:
+        list: Названия файлов
+    """
+    return [file_name for file_name in os.listdir(directory) if not file_name.endswith(derived_suffixes)]
+
+
+def read_rows(file_name):
+    """
+    Читает вакансии для lab_5_2 из снимка или из csv
+
+    Args:
+        file_name (str): Название csv файла
+
+    Returns:
+        list: Заголовки
+        list: Строки без пропусков
+        bool: True, если строки уже очищены
+    """
+    snapshot = open_snapshot(file_name)
+    if snapshot is None:
+        titles, values = csv_reader(file_name)
+        return titles, values, False
+    if not snapshot.header:
+        check_valid_file([])
+    if snapshot.rows == 0:
+        check_valid_file([snapshot.header])
+    return snapshot.header, list(snapshot.iter_rows()), True
+
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or [input('Введите название файла: ')]:
+        print('Снимок сохранен: {0}'.format(build_snapshot(name)))
@@ -0,0 +1,349 @@
+import csv
+import datetime
+import os
+import sqlite3
+import sys
+
+from compressed_io import open_text
+from lab_5_2 import InputConnect, currency_to_rub, get_cleaner, get_vacancy_rates, rus_eng_title, work_experience_enum
+
+# Столбцы вакансии в порядке заголовка lab_5_2. Файлы с другим набором столбцов (vacancies_from_hh.csv, csv_chunks)
+# импортируются в ту же таблицу, отсутствующие столбцы остаются NULL
+columns = ['name', 'description', 'key_skills', 'experience_id', 'premium', 'employer_name',
+           'salary_from', 'salary_to', 'salary_gross', 'salary_currency', 'area_name', 'published_at']
+float_columns = {'salary_from', 'salary_to'}
+
+schema = '''
+CREATE TABLE IF NOT EXISTS vacancies (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    complete INTEGER NOT NULL,
+    name TEXT, description TEXT, key_skills TEXT, experience_id TEXT, premium TEXT, employer_name TEXT,
+    salary_from REAL, salary_to REAL, salary_gross TEXT, salary_currency TEXT, area_name TEXT,
+    published_at TEXT, published_ts INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5(
+    name, description, content='vacancies', content_rowid='id'
+);
+'''
+
+# Индексы создаются после загрузки: так импорт не перестраивает их на каждой вставке
+indexes = {
+    'vacancies_source': 'source, complete',
+    'vacancies_name': 'name',
+    'vacancies_area_name': 'area_name',
+    'vacancies_salary': 'salary_from, salary_to',
+    'vacancies_published_at': 'published_ts',
+    'vacancies_salary_currency': 'salary_currency',
+}
+
+# Настройки для быстрой загрузки: база пересобирается из csv, поэтому журнал и fsync не нужны
+load_pragmas = ['PRAGMA journal_mode = OFF', 'PRAGMA synchronous = OFF', 'PRAGMA temp_store = MEMORY',
+                'PRAGMA cache_size = -262144', 'PRAGMA locking_mode = EXCLUSIVE']
+read_pragmas = ['PRAGMA journal_mode = DELETE', 'PRAGMA synchronous = NORMAL', 'PRAGMA locking_mode = NORMAL']
+
+batch_size = 10000
+
+
+def make_record(source, header, row):
+    """
+    Превращает строку csv в кортеж значений для вставки. Текст очищается так же, как в lab_5_2
+
+    Args:
+        source (str): Имя исходного файла
+        header (list): Заголовки csv
+        row (list): Строка csv
+
+    Returns:
+        tuple: Значения в порядке столбцов таблицы (без id)
+
+    >>> make_record('a.csv', ['name', 'salary_from', 'published_at'], ['<b>Python</b>', '100.0', '2022-07-05T10:00:00+0300'])
+    ('a.csv', True, 'Python', None, None, None, None, None, 100.0, None, None, None, None, '2022-07-05T10:00:00+0300', 1657004400)
+    """
+    values = dict(zip(header, row))
+    record = [source, '' not in row]
+    for column in columns:
+        cell = values.get(column, '')
+        if cell == '':
+            record.append(None)
+        elif column in float_columns:
+            record.append(float(cell))
+        else:
+            record.append(get_cleaner(column)(cell))
+    published_at = record[-1]
+    record.append(int(datetime.datetime.fromisoformat(published_at).timestamp()) if published_at else None)
+    return tuple(record)
+
+
+class VacancyDatabase:
+    """
+    Вакансии в локальной базе SQLite: импорт csv и выполнение запросов InputConnect
+
+    Attributes:
+        db_name (str): Название файла базы
+        connection (sqlite3.Connection): Соединение с базой
+    """
+    def __init__(self, db_name='vacancies.db'):
+        """
+        Открывает (и при необходимости создает) базу
+
+        Args:
+            db_name (str): Название файла базы
+        """
+        self.db_name = db_name
+        self.connection = sqlite3.connect(db_name)
+        # курс на дату публикации для сортировки по зарплате, если курсы lab_5_2 не постоянные
+        self.connection.create_function('rub_rate', 2, lambda currency, published_at: get_vacancy_rates().rate(currency, published_at or ''),
+                                        deterministic=True)
+        self.connection.executescript(schema)
+
+    def import_csv(self, file_names):
+        """
+        Загружает csv файлы в базу. Ранее загруженные строки тех же файлов заменяются
+
+        Args:
+            file_names (list): Пути к csv файлам, источником строк считается имя файла без директории
+
+        Returns:
+            int: Количество загруженных строк
+        """
+        insert = 'INSERT INTO vacancies ({0}) VALUES ({1})'.format(
+            ', '.join(['source', 'complete', *columns, 'published_ts']), ', '.join('?' * (len(columns) + 3)))
+        for pragma in load_pragmas:
+            self.connection.execute(pragma)
+        for name in indexes:
+            self.connection.execute('DROP INDEX IF EXISTS {0}'.format(name))
+
+        rows = 0
+        with self.connection:
+            for file_name in file_names:
+                source = os.path.basename(file_name)
+                self.connection.execute('DELETE FROM vacancies WHERE source = ?', (source,))
+                with open_text(file_name, encoding='utf-8-sig', newline='') as file:
+                    reader = csv.reader(file)
+                    header = next(reader, [])
+                    batch = []
+                    for row in reader:
+                        if len(row) != len(header):
+                            continue
+                        batch.append(make_record(source, header, row))
+                        if len(batch) == batch_size:
+                            self.connection.executemany(insert, batch)
+                            rows += len(batch)
+                            batch = []
+                    self.connection.executemany(insert, batch)
+                    rows += len(batch)
+            for name, index_columns in indexes.items():
+                self.connection.execute('CREATE INDEX {0} ON vacancies ({1})'.format(name, index_columns))
+            self.connection.execute("INSERT INTO vacancies_fts(vacancies_fts) VALUES ('rebuild')")
+        self.connection.execute('ANALYZE')
+        for pragma in read_pragmas:
+            self.connection.execute(pragma)
+        return rows
+
+    def query(self, user_input, start=0, end=None):
+        """
+        Выполняет запрос InputConnect
+
+        Args:
+            user_input (InputConnect): Проверенный пользовательский ввод
+            start (int): Номер первой строки результата
+            end (int or None): Номер строки, на которой результат заканчивается
+
+        Returns:
+            list: Словари столбец -> значение в виде строк, как после clean_string
+        """
+        sql, parameters = translate_query(user_input, os.path.basename(user_input.file_name))
+        sql += ' LIMIT ? OFFSET ?'
+        parameters += [-1 if end is None else max(end - start, 0), start]
+        return [dict(zip(columns, ['' if value is None else str(value) for value in row]))
+                for row in self.connection.execute(sql, parameters)]
+
+    def count(self, user_input):
+        """
+        Считает вакансии, подходящие под запрос
+
+        Args:
+            user_input (InputConnect): Проверенный пользовательский ввод
+
+        Returns:
+            int: Количество вакансий
+        """
+        sql, parameters = translate_query(user_input, os.path.basename(user_input.file_name), with_order=False)
+        return self.connection.execute('SELECT COUNT(*) FROM ({0})'.format(sql), parameters).fetchone()[0]
+
+    def search(self, text, source=None, limit=20):
+        """
+        Полнотекстовый поиск по названию и описанию
+
+        Args:
+            text (str): Запрос в синтаксисе FTS5
+            source (str or None): Ограничить поиск одним файлом
+            limit (int): Максимальное количество результатов
+
+        Returns:
+            list: Пары (id, название) по убыванию релевантности
+        """
+        sql = 'SELECT v.id, v.name FROM vacancies_fts JOIN vacancies v ON v.id = vacancies_fts.rowid ' \
+              'WHERE vacancies_fts MATCH ?'
+        parameters = [text]
+        if source is not None:
+            sql += ' AND v.source = ?'
+            parameters.append(source)
+        return self.connection.execute(sql + ' ORDER BY rank LIMIT ?', parameters + [limit]).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+
+def fts_phrase(text):
+    """
+    Превращает строку в фразу FTS5 или возвращает None, если в строке нет слов
+
+    Args:
+        text (str): Строка
+
+    Returns:
+        str or None: Фраза в кавычках
+
+    >>> fts_phrase('Программист 1С')
+    '"Программист 1С"'
+    >>> fts_phrase('...') is None
+    True
+    """
+    if not any(symbol.isalnum() for symbol in text):
+        return None
+    return '"' + text.replace('"', '""') + '"'
+
+
+def case_expression(column, values):
+    """
+    Составляет выражение CASE, которое отображает значения столбца в числа
+
+    Args:
+        column (str): Столбец
+        values (dict): Значение -> число
+
+    Returns:
+        str: Выражение SQL
+
+    >>> case_expression('experience_id', {'noExperience': 0})
+    "CASE experience_id WHEN 'noExperience' THEN 0 END"
+    """
+    return 'CASE {0} {1} END'.format(column, ' '.join("WHEN '{0}' THEN {1}".format(key, value)
+                                                      for key, value in values.items()))
+
+
+# Ключи сортировки InputConnect.sort_vacancies в виде выражений SQL
+sort_expressions = {
+    'name': 'name',
+    'description': 'description',
+    'employer_name': 'employer_name',
+    'salary_currency': 'salary_currency',
+    'area_name': 'area_name',
+    'key_skills': "length(key_skills) - length(replace(key_skills, char(10), ''))",
+    'experience_id': case_expression('experience_id', work_experience_enum),
+    'salary': '(salary_from + salary_to) * {0} / 2'.format(
+        case_expression('salary_currency', currency_to_rub) if get_vacancy_rates().resolution == 'static'
+        else 'rub_rate(salary_currency, published_at)'),
+    'published_at': 'published_ts',
+}
+
+
+def translate_query(user_input, source, with_order=True):
+    """
+    Переводит фильтры и сортировку InputConnect в запрос SQL с теми же результатами, что и DataSet.generate_vacs_from_strs
+    и InputConnect.sort_vacancies
+
+    Args:
+        user_input (InputConnect): Проверенный пользовательский ввод
+        source (str): Имя файла, среди строк которого ищем
+        with_order (bool): Добавлять ли ORDER BY
+
+    Returns:
+        str: Запрос
+        list: Параметры запроса
+
+    >>> user_input = InputConnect()
+    >>> user_input.set_user_input('', 'Навыки: Git, Linux', 'Оклад', 'Да', '', '')
+    >>> sql, parameters = translate_query(user_input, 'vac.csv')
+    >>> sql.split(' WHERE ')[1].split(' ORDER BY ')[0]
+    'source = ? AND complete = 1 AND instr(char(10) || key_skills || char(10), char(10) || ? || char(10)) > 0 AND instr(char(10) || key_skills || char(10), char(10) || ? || char(10)) > 0'
+    >>> parameters
+    ['vac.csv', 'Git', 'Linux']
+    >>> sql.endswith('DESC, id')
+    True
+    """
+    conditions = ['source = ?', 'complete = 1']
+    parameters = [source]
+    for column, value in user_input.dict_for_exact_match.items():
+        if column == 'description' and fts_phrase(value) is not None:
+            # по описанию нет обычного индекса, поэтому кандидатов сначала ищем полнотекстовым индексом
+            conditions.append('id IN (SELECT rowid FROM vacancies_fts WHERE vacancies_fts MATCH ?)')
+            parameters.append('description : ' + fts_phrase(value))
+        conditions.append('{0} = ?'.format(column))
+        parameters.append(value)
+    for column, items in user_input.dict_for_items_match.items():
+        for item in items:
+            conditions.append('instr(char(10) || {0} || char(10), char(10) || ? || char(10)) > 0'.format(column))
+            parameters.append(item)
+    for column, value in user_input.dict_for_substring_match.items():
+        conditions.append('instr({0}, ?) > 0'.format(column))
+        parameters.append(value)
+    if user_input.salary_req is not None:
+        conditions.append('salary_from <= ? AND salary_to >= ?')
+        parameters += [user_input.salary_req, user_input.salary_req]
+
+    sql = 'SELECT {0} FROM vacancies WHERE {1}'.format(', '.join(columns), ' AND '.join(conditions))
+    if with_order:
+        # Сортировка в Python устойчива и при reverse=True, поэтому при равных ключах сохраняется порядок файла
+        key = rus_eng_title[user_input.column_title_for_sort] if user_input.column_title_for_sort else None
+        if key in sort_expressions:
+            sql += ' ORDER BY {0}{1}, id'.format(sort_expressions[key], ' DESC' if user_input.reversed_flag else '')
+        else:
+            sql += ' ORDER BY id'
+    return sql, parameters
+
+
+def sqlite_process(user_input, database):
+    """
+    Выполняет запрос InputConnect через базу и печатает таблицу, как InputConnect.standard_process
+
+    Args:
+        user_input (InputConnect): Проверенный пользовательский ввод
+        database (VacancyDatabase): База вакансий
+    """
+    from lab_5_2 import eng_rus_work_experience, formatter, get_header_table, get_page_table, make_range, make_vacancy
+
+    total = database.count(user_input)
+    if total == 0:
+        print('Ничего не найдено')
+        return
+    start, end = make_range(user_input.indexes, range(total))
+    page = [formatter(make_vacancy(row), eng_rus_work_experience) for row in database.query(user_input, start, end)]
+    if len(page) == 0:
+        # диапазон за пределами результата: печатаем только шапку таблицы, как get_vacancies_table
+        print(get_header_table(user_input.params))
+        return
+    print(get_page_table(page, start + 1, user_input.params))
+
+
+def main_sqlite():
+    """
+    Импортирует файлы в базу (python sqlite_store.py import база файл...)
+    или выполняет запрос с вопросами lab_5_2 (python sqlite_store.py query база)
+    """
+    command, db_name, *file_names = sys.argv[1:]
+    database = VacancyDatabase(db_name)
+    if command == 'import':
+        print('Загружено строк: {0}'.format(database.import_csv(file_names)))
+    elif command == 'query':
+        user_input = InputConnect()
+        user_input.read_user_input()
+        if user_input.full_check_error_not_found():
+            sqlite_process(user_input, database)
+    database.close()
+
+
+if __name__ == '__main__':
+    main_sqlite()
@@ -0,0 +1,421 @@
+import csv
+import json
+import queue
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from compressed_io import open_output
+from currency_rates import convert_salary, get_rates
+from dedup import Deduplicator
+
+# Потоковый конвейер вместо цепочки файлов 333.py -> 341.py -> 342.py/343.py:
+# страницы API скачиваются пулом потоков, конвертируются и агрегируются по мере поступления.
+# Этапы связаны ограниченными очередями: если агрегация отстает, конвертация блокируется на put,
+# а за ней и загрузка страниц, поэтому в памяти не больше queue_size страниц на очередь.
+# Промежуточные csv (vacancies_from_hh.csv, con_vac.csv) пишутся, только если заданы их имена.
+# API подменяется любой функцией fetch(url) -> dict, например MockVacancyAPI.fetch
+done = object()
+hh_head = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+converted_head = ['name', 'salary', 'area_name', 'published_at']
+# Окна выгрузки 333.py: сутки по 8 часов, по 20 страниц на окно
+hh_windows = [('2022-12-12T00:00:00', '2022-12-12T08:00:00'), ('2022-12-12T08:00:00', '2022-12-12T16:00:00'),
+              ('2022-12-12T16:00:00', '2022-12-13T00:00:00')]
+default_rates_file = 'currency_from_2003_to_2022.csv'
+
+
+def hh_urls(windows=hh_windows, pages=20):
+    return ['https://api.hh.ru/vacancies?specialization=1&per_page=100&page={0}&date_from={1}&date_to={2}'.format(
+        page, date_from, date_to) for date_from, date_to in windows for page in range(pages)]
+
+
+def fetch_json(url, timeout=30):
+    request = urllib.request.Request(url, headers={'User-Agent': 'vacancy-stream-pipeline'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+class MockVacancyAPI:
+    """
+    Подмена API hh.ru: страницы в формате /vacancies из синтетических вакансий vacancy_generator.py
+
+    Attributes:
+        pages (list): Списки вакансий по страницам
+        latency (float): Задержка ответа в секундах, как у сети
+    """
+    def __init__(self, pages=60, per_page=100, latency=0.0, overlap=5, seed=0):
+        """
+        Инициализирует объект MockVacancyAPI
+
+        Args:
+            pages (int): Количество страниц
+            per_page (int): Вакансий на странице
+            latency (float): Задержка ответа в секундах
+            overlap (int): Сколько последних вакансий страницы повторяется в начале следующей,
+                как на границах пересекающихся окон date_from/date_to
+            seed (int): Начальное значение генератора
+        """
+        from vacancy_generator import VacancyGenerator
+
+        self.latency = latency
+        generator = VacancyGenerator('full', seed)
+        rows = [row for batch in generator.batches(pages * (per_page - overlap) + overlap) for row in batch]
+        items = [self.make_item(index, row) for index, row in enumerate(rows)]
+        step = per_page - overlap
+        self.pages = [items[start:start + per_page] for start in range(0, step * pages, step)]
+
+    @staticmethod
+    def make_item(index, row):
+        name, _, _, _, _, employer, salary_from, salary_to, _, currency, area_name, published_at = row
+        salary = None
+        if currency:
+            salary = {'from': float(salary_from) if salary_from else None,
+                      'to': float(salary_to) if salary_to else None, 'currency': currency}
+        return {'id': str(index + 1), 'name': name, 'area': {'name': area_name}, 'published_at': published_at,
+                'salary': salary, 'employer': {'name': employer}}
+
+    def urls(self):
+        return ['mock://vacancies?page={0}'.format(page) for page in range(len(self.pages))]
+
+    def fetch(self, url):
+        if self.latency:
+            time.sleep(self.latency)
+        page = int(re.search(r'page=(\d+)', url).group(1))
+        return {'items': self.pages[page], 'page': page, 'pages': len(self.pages)}
+
+
+class StreamStatistic:
+    """
+    Агрегаты 342.py и 343.py, которые обновляются по одной вакансии
+
+    Attributes:
+        profession (str): Профессия в нижнем регистре
+        area (str or None): Регион для статистики профессии по годам, как в 343.py
+        years (dict): Год -> [вакансий, сумма зарплат, зарплат, вакансий профессии, сумма, зарплат профессии]
+        area_years (dict): Год -> [вакансий, сумма зарплат, зарплат] профессии в регионе
+        cities (dict): Город -> [вакансий, сумма зарплат, зарплат]
+        rows (int): Сколько вакансий добавлено
+    """
+    def __init__(self, profession, area=None):
+        self.profession = profession.lower()
+        self.area = area
+        self.years = {}
+        self.area_years = {}
+        self.cities = {}
+        self.rows = 0
+
+    def add(self, name, salary, area_name, published_at):
+        """
+        Добавляет сконвертированную вакансию
+
+        Args:
+            name (str): Название
+            salary (float or None): Зарплата в рублях, None - не сконвертирована
+            area_name (str): Город
+            published_at (str): Дата публикации
+        """
+        year = published_at[:4]
+        known = salary is not None
+        value = salary if known else 0.0
+        is_profession = self.profession in name.lower()
+        counters = self.years.get(year)
+        if counters is None:
+            counters = self.years[year] = [0, 0.0, 0, 0, 0.0, 0]
+        counters[0] += 1
+        counters[1] += value
+        counters[2] += known
+        if is_profession:
+            counters[3] += 1
+            counters[4] += value
+            counters[5] += known
+            if area_name == self.area:
+                area_counters = self.area_years.get(year)
+                if area_counters is None:
+                    area_counters = self.area_years[year] = [0, 0.0, 0]
+                area_counters[0] += 1
+                area_counters[1] += value
+                area_counters[2] += known
+        city = self.cities.get(area_name)
+        if city is None:
+            city = self.cities[area_name] = [0, 0.0, 0]
+        city[0] += 1
+        city[1] += value
+        city[2] += known
+        self.rows += 1
+
+    def by_year(self):
+        """
+        Возвращает статистику по годам в формате 342.Report.get_file_analytic
+
+        >>> statistic = StreamStatistic('Python')
+        >>> for row in [('Python dev', 100.0, 'Москва', '2022-01-01'), ('Java dev', 51.0, 'Пермь', '2022-02-01'),
+        ...             ('python', None, 'Москва', '2021-05-01')]:
+        ...     statistic.add(*row)
+        >>> statistic.by_year()
+        ({'2021': 0, '2022': 76}, {'2021': 1, '2022': 2}, {'2021': 0, '2022': 100}, {'2021': 1, '2022': 1})
+        """
+        salary, count, profession_salary, profession_count = {}, {}, {}, {}
+        for year in sorted(self.years):
+            rows, total, known, profession_rows, profession_total, profession_known = self.years[year]
+            salary[year] = round(total / known) if known else 0
+            count[year] = rows
+            profession_salary[year] = round(profession_total / profession_known) if profession_known else 0
+            profession_count[year] = profession_rows
+        return salary, count, profession_salary, profession_count
+
+    def for_area(self):
+        """Возвращает статистику профессии в регионе по годам в формате 343.Report.get_data_for_one"""
+        salary, count = {}, {}
+        for year in sorted(self.area_years):
+            rows, total, known = self.area_years[year]
+            salary[year] = round(total / known) if known else 0
+            count[year] = rows
+        return salary, count
+
+    def by_city(self, top=10, threshold=0.01):
+        """Возвращает статистику по городам в формате 343.Report.get_data_for_all_city"""
+        import numpy as np
+
+        from city_statistic import select_converted_cities
+
+        if not self.rows:
+            return {}, {}
+        counters = np.array(list(self.cities.values()), dtype=np.float64)
+        return select_converted_cities(list(self.cities), counters[:, 0].astype(np.int64), counters[:, 1],
+                                       counters[:, 2], self.rows, top, threshold)
+
+
+class StreamPipeline:
+    """
+    Конвейер загрузка -> конвертация -> агрегация на потоках с ограниченными очередями
+
+    Attributes:
+        statistic (StreamStatistic): Агрегаты
+        rates (CurrencyRates): Курсы для конвертации
+        deduplicator (Deduplicator): Отбрасывает вакансии, повторно пришедшие с пересекающихся страниц
+        pages (Queue): Скачанные страницы
+        rows (Queue): Сконвертированные вакансии пачками по странице
+        timings (dict): Отметки времени от запуска: first_page, last_page, report
+        blocked (dict): Этап -> секунд, проведенных в ожидании места в очереди (backpressure)
+    """
+    def __init__(self, profession, area=None, rates=None, queue_size=8, fetch_workers=4,
+                 raw_file=None, converted_file=None):
+        """
+        Инициализирует объект StreamPipeline
+
+        Args:
+            profession (str): Профессия
+            area (str or None): Регион для статистики профессии, как в 343.py
+            rates (CurrencyRates or None): Курсы, по умолчанию get_rates(default_rates_file)
+            queue_size (int): Емкость каждой очереди в страницах
+            fetch_workers (int): Потоков загрузки
+            raw_file (str or None): Записать вакансии как vacancies_from_hh.csv из 333.py
+            converted_file (str or None): Записать сконвертированные вакансии как con_vac.csv из 341.py
+        """
+        self.statistic = StreamStatistic(profession, area)
+        self.rates = rates if rates is not None else get_rates(default_rates_file)
+        self.deduplicator = Deduplicator()
+        self.fetch_workers = fetch_workers
+        self.raw_file = raw_file
+        self.converted_file = converted_file
+        self.pages = queue.Queue(queue_size)
+        self.rows = queue.Queue(queue_size)
+        self.failed = threading.Event()
+        self.error = None
+        self.start = None
+        self.page_count = 0
+        self.timings = {}
+        self.blocked = {'fetch': 0.0, 'convert': 0.0}
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def fail(self, error):
+        if self.error is None:
+            self.error = error
+        self.failed.set()
+
+    def put(self, target, item, stage):
+        try:
+            target.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+        # очередь полна: этап ждет, пока следующий разберет очередь
+        waiting = time.perf_counter()
+        while not self.failed.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.blocked[stage] += time.perf_counter() - waiting
+
+    def get(self, source):
+        while True:
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                if self.failed.is_set():
+                    return done
+
+    def fetch_page(self, fetch, url):
+        if self.failed.is_set():
+            return
+        try:
+            items = fetch(url)['items']
+        except Exception as error:
+            # ошибка отмечается сразу, а не после выхода из пула, чтобы оставшиеся в очереди страницы не скачивались
+            self.fail(error)
+            raise
+        self.put(self.pages, items, 'fetch')
+
+    def fetch_pages(self, urls, fetch):
+        try:
+            with ThreadPoolExecutor(self.fetch_workers) as executor:
+                for future in [executor.submit(self.fetch_page, fetch, url) for url in urls]:
+                    future.result()
+        except Exception as error:
+            self.fail(error)
+        finally:
+            self.put(self.pages, done, 'fetch')
+
+    def convert_pages(self):
+        raw_file = open_output(self.raw_file, encoding='utf-8', newline='') if self.raw_file else None
+        try:
+            raw_writer = None
+            if raw_file is not None:
+                raw_writer = csv.writer(raw_file)
+                raw_writer.writerow(hh_head)
+            while True:
+                items = self.get(self.pages)
+                if items is done:
+                    break
+                if not self.page_count:
+                    self.timings['first_page'] = self.elapsed()
+                self.page_count += 1
+                rows = []
+                for item in self.deduplicator.filter(items):
+                    salary = item['salary'] or {}
+                    row = [item['name'], salary.get('from'), salary.get('to'), salary.get('currency'),
+                           item['area']['name'], item['published_at']]
+                    if raw_writer is not None:
+                        raw_writer.writerow(row)
+                    rows.append([row[0], convert_salary(row[1], row[2], row[3], row[5], self.rates), row[4], row[5]])
+                self.put(self.rows, rows, 'convert')
+            self.timings['last_page'] = self.elapsed()
+        except Exception as error:
+            self.fail(error)
+        finally:
+            if raw_file is not None:
+                raw_file.close()
+            self.put(self.rows, done, 'convert')
+
+    def run(self, urls, fetch=fetch_json):
+        """
+        Скачивает страницы и агрегирует вакансии, пока загрузка еще идет
+
+        Args:
+            urls (list): Адреса страниц
+            fetch (function): Адрес -> ответ API со списком items
+
+        Returns:
+            StreamStatistic: Агрегаты
+        """
+        self.start = time.perf_counter()
+        stages = [threading.Thread(target=self.fetch_pages, args=(urls, fetch), name='fetch', daemon=True),
+                  threading.Thread(target=self.convert_pages, name='convert', daemon=True)]
+        for stage in stages:
+            stage.start()
+        converted_file = open_output(self.converted_file, encoding='utf-8', newline='') if self.converted_file else None
+        try:
+            converted_writer = None
+            if converted_file is not None:
+                converted_writer = csv.writer(converted_file)
+                converted_writer.writerow(converted_head)
+            add = self.statistic.add
+            while True:
+                rows = self.get(self.rows)
+                if rows is done:
+                    break
+                if converted_writer is not None:
+                    converted_writer.writerows(rows)
+                for row in rows:
+                    add(*row)
+        except BaseException as error:
+            self.fail(error)
+            raise
+        finally:
+            if converted_file is not None:
+                converted_file.close()
+            for stage in stages:
+                stage.join()
+            self.deduplicator.close()
+        if self.error is not None:
+            raise self.error
+        return self.statistic
+
+    def report(self, top=10, threshold=0.01):
+        """
+        Собирает отчет и фиксирует время от первой страницы до готового отчета
+
+        Returns:
+            dict: Статистики 342.py и 343.py
+        """
+        salary, count, profession_salary, profession_count = self.statistic.by_year()
+        area_salary, area_count = self.statistic.for_area()
+        salary_by_city, share_by_city = self.statistic.by_city(top, threshold)
+        self.timings['report'] = self.elapsed()
+        return {'salary': salary, 'count': count, 'profession_salary': profession_salary,
+                'profession_count': profession_count, 'area_salary': area_salary, 'area_count': area_count,
+                'salary_by_city': salary_by_city, 'share_by_city': share_by_city}
+
+    def describe(self):
+        timings = self.timings
+        first_page = timings.get('first_page', 0.0)
+        return ('Страниц: {0}, вакансий: {1}. {2}\n'
+                'Первая страница через {3:.3f} с, последняя через {4:.3f} с, отчет через {5:.3f} с после первой '
+                'страницы ({6:.3f} с всего)\n'
+                'Ожидание места в очереди: загрузка {7:.3f} с, конвертация {8:.3f} с').format(
+            self.page_count, self.statistic.rows, self.deduplicator.report(), first_page,
+            timings.get('last_page', 0.0), timings.get('report', 0.0) - first_page, timings.get('report', 0.0),
+            self.blocked['fetch'], self.blocked['convert'])
+
+
+def print_report(report, profession, area):
+    print('Динамика уровня зарплат по годам: {0}'.format(report['salary']))
+    print('Динамика количества вакансий по годам: {0}'.format(report['count']))
+    print('Динамика уровня зарплат по годам для выбранной профессии: {0}'.format(report['profession_salary']))
+    print('Динамика количества вакансий по годам для выбранной профессии: {0}'.format(report['profession_count']))
+    if area:
+        print('Уровень зарплат по годам для профессии {0} в регионе {1}: {2}'.format(profession, area, report['area_salary']))
+        print('Количество вакансий по годам для профессии {0} в регионе {1}: {2}'.format(profession, area, report['area_count']))
+    print('Уровень зарплат по городам (в порядке убывания): {0}'.format(report['salary_by_city']))
+    print('Доля вакансий по городам (в порядке убывания): {0}'.format(report['share_by_city']))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Потоковая выгрузка, конвертация и статистика вакансий без промежуточных файлов')
+    parser.add_argument('profession', help='название профессии')
+    parser.add_argument('--area', help='регион для статистики профессии по годам, как в 343.py')
+    parser.add_argument('--mock', type=int, metavar='PAGES', help='страниц синтетического API вместо hh.ru')
+    parser.add_argument('--latency', type=float, default=0.05, help='задержка ответа синтетического API, с')
+    parser.add_argument('--workers', type=int, default=4, help='потоков загрузки')
+    parser.add_argument('--queue-size', type=int, default=8, help='емкость очередей между этапами, в страницах')
+    parser.add_argument('--raw', metavar='CSV', help='записать выгрузку, как vacancies_from_hh.csv')
+    parser.add_argument('--converted', metavar='CSV', help='записать сконвертированные вакансии, как con_vac.csv')
+    args = parser.parse_args()
+
+    pipeline = StreamPipeline(args.profession, args.area, queue_size=args.queue_size, fetch_workers=args.workers,
+                              raw_file=args.raw, converted_file=args.converted)
+    if args.mock:
+        api = MockVacancyAPI(args.mock, latency=args.latency)
+        pipeline.run(api.urls(), api.fetch)
+    else:
+        pipeline.run(hh_urls())
+    print_report(pipeline.report(), args.profession, args.area)
+    print(pipeline.describe())
@@ -0,0 +1,335 @@
+import argparse
+import csv
+import datetime
+import itertools
+import random
+import time
+
+from compressed_io import open_output
+
+# Генератор синтетических вакансий для нагрузочных замеров. Распределения подобраны по vacancies_from_hh.csv
+# и чанкам: почти половина вакансий без зарплаты, у остальных часто только нижняя граница, рубли преобладают,
+# Москва и Санкт-Петербург - треть всех вакансий. Строки идут по годам по возрастанию, как в исходной выгрузке
+# (на это рассчитан chunker.py), внутри года - в случайном порядке. Один и тот же seed дает тот же файл
+schemas = {
+    # lab_5_2.py
+    'full': ['name', 'description', 'key_skills', 'experience_id', 'premium', 'employer_name', 'salary_from',
+             'salary_to', 'salary_gross', 'salary_currency', 'area_name', 'published_at'],
+    # lab_2_1_3.py, чанки и скрипты на pandas
+    'short': ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'],
+}
+
+batch_size = 10000
+
+# Валюта -> (вес, типичная нижняя граница в 2022 году, шаг округления)
+currencies = {
+    'RUR': (930, 65000, 1000), 'KZT': (22, 300000, 5000), 'BYR': (12, 1500, 100), 'USD': (10, 1500, 100),
+    'UAH': (8, 15000, 500), 'UZS': (4, 6000000, 100000), 'EUR': (3, 1500, 100), 'KGS': (2, 40000, 1000),
+    'AZN': (1, 1500, 100), 'GEL': (1, 2000, 100),
+}
+
+# (есть нижняя граница, есть верхняя граница) -> вес
+salary_bounds = {(False, False): 44, (True, True): 28, (True, False): 25, (False, True): 3}
+
+cities = {
+    'Москва': 885, 'Санкт-Петербург': 198, 'Новосибирск': 79, 'Казань': 64, 'Екатеринбург': 60, 'Самара': 57,
+    'Пермь': 49, 'Нижний Новгород': 47, 'Алматы': 44, 'Минск': 42, 'Воронеж': 41, 'Краснодар': 38, 'Уфа': 33,
+    'Челябинск': 31, 'Саратов': 31, 'Ростов-на-Дону': 31, 'Тюмень': 28, 'Ташкент': 28, 'Красноярск': 27,
+    'Чебоксары': 26, 'Ижевск': 26, 'Владивосток': 26, 'Омск': 24, 'Киев': 22, 'Томск': 21, 'Ярославль': 19,
+    'Астана': 18, 'Хабаровск': 17, 'Иркутск': 16, 'Барнаул': 15, 'Ульяновск': 14, 'Тула': 13, 'Рязань': 12,
+    'Калининград': 12, 'Бишкек': 10, 'Харьков': 10, 'Оренбург': 9, 'Пенза': 8, 'Липецк': 8, 'Киров': 7,
+    'Набережные Челны': 7, 'Сургут': 6, 'Великий Новгород': 5, 'Баку': 3, 'Тбилиси': 3,
+}
+
+# Год -> вес: число вакансий растет вместе с hh.ru
+years = {year: weight for year, weight in zip(range(2003, 2023), (
+    3, 5, 8, 12, 22, 175, 177, 291, 330, 360, 390, 380, 350, 370, 420, 470, 490, 520, 600, 183))}
+
+roles = {
+    'Программист': 60, 'Разработчик Python': 35, 'Java разработчик': 30, 'Frontend-разработчик': 30,
+    'Аналитик': 40, 'Бизнес-аналитик': 15, 'Системный аналитик': 20, 'Аналитик данных': 15,
+    'Системный администратор': 35, 'Тестировщик': 25, 'Инженер по тестированию': 10, 'Программист 1С': 40,
+    'Разработчик C++, Qt': 8, 'Web-программист': 20, 'DevOps-инженер': 12, 'Android разработчик': 10,
+    'iOS разработчик': 8, 'PHP-разработчик': 15, 'Data Scientist': 6, 'Специалист технической поддержки': 25,
+    'Менеджер проектов': 15, 'Менеджер "Ключевых клиентов"': 5, 'Инженер-программист': 20,
+    'Оператор ЧПУ': 5, 'SMM (СММ) специалист / Контент-менеджер': 8, 'Руководитель отдела разработки': 5,
+    'Golang developer': 6, 'React разработчик (middle/senior)': 6, 'Дизайнер интерфейсов': 8,
+}
+
+grades = {'': 60, 'Junior ': 8, 'Middle ': 6, 'Senior ': 6, 'Ведущий ': 6, 'Старший ': 4, 'Стажер ': 3,
+          'Главный ': 2, 'Младший ': 3, 'Lead ': 2}
+
+name_suffixes = {'': 85, ' (удаленно)': 6, ' / Team Lead': 2, ' (стажировка)': 2, ', гибкий график': 3,
+                 ' (вахта, почасовая)': 2}
+
+experiences = {'noExperience': 18, 'between1And3': 48, 'between3And6': 28, 'moreThan6': 6}
+
+skills = {
+    'SQL': 40, 'Git': 35, 'Python': 30, 'Linux': 25, 'JavaScript': 25, 'Java': 18, '1С: Предприятие 8': 20,
+    'PostgreSQL': 18, 'Docker': 15, 'HTML': 15, 'CSS': 15, 'React': 12, 'MS SQL': 10, 'Английский язык': 20,
+    'ООП': 12, 'C++': 10, 'C#': 10, 'PHP': 10, 'Работа в команде': 15, 'Django': 8, 'Kubernetes': 6, 'Kotlin': 5,
+    'Go': 5, 'Bash': 6, 'REST': 8, 'Jira': 8, 'Atlassian Confluence': 5, 'Анализ данных': 8, 'MS Excel': 12,
+    'Ведение переговоров': 6, 'Тестирование': 8, 'TCP/IP': 5, 'Active Directory': 4, 'Nginx': 4, 'Redis': 4,
+}
+
+company_forms = {'ООО': 60, 'АО': 10, 'ПАО': 5, 'ИП': 10, '': 15}
+company_syllables = ['Тех', 'Софт', 'Инфо', 'Систем', 'Дата', 'Лаб', 'Про', 'Сервис', 'Групп', 'Нет', 'Код', 'Трейд',
+                     'Альфа', 'Гео', 'Мед', 'Строй', 'Транс', 'Энерго', 'Смарт', 'Вектор', 'Логик', 'Сиб', 'Урал']
+
+description_phrases = {
+    'Обязанности': ['разработка и поддержка внутренних сервисов', 'участие в проектировании архитектуры',
+                    'написание автотестов', 'код-ревью', 'взаимодействие с аналитиками и заказчиками',
+                    'оптимизация запросов к базе данных', 'сопровождение пользователей',
+                    'ведение технической документации', 'настройка CI/CD', 'анализ требований'],
+    'Требования': ['опыт коммерческой разработки от года', 'знание SQL', 'умение разбираться в чужом коде',
+                   'высшее техническое образование', 'английский язык на уровне чтения документации',
+                   'опыт работы с Git', 'понимание принципов ООП', 'ответственность и внимательность'],
+    'Условия': ['оформление по ТК РФ', 'белая зарплата', 'ДМС после испытательного срока',
+                'гибкое начало рабочего дня', 'возможность удаленной работы', 'обучение за счет компании',
+                'современный офис рядом с метро', 'корпоративные мероприятия'],
+}
+
+description_pool_size = 4096
+employer_pool_size = 20000
+
+
+def cumulative(weights):
+    """
+    Возвращает значения и накопленные веса для random.choices
+
+    Args:
+        weights (dict): Значение -> вес
+
+    Returns:
+        tuple: Список значений и список накопленных весов
+
+    >>> cumulative({'a': 1, 'b': 3})
+    (['a', 'b'], [1, 4])
+    """
+    return list(weights), list(itertools.accumulate(weights.values()))
+
+
+def parse_count(text):
+    """
+    Разбирает количество строк с суффиксом K или M
+
+    Args:
+        text (str): Например, '500K' или '100M'
+
+    Returns:
+        int: Количество строк
+
+    >>> parse_count('1M'), parse_count('250k'), parse_count('1000')
+    (1000000, 250000, 1000)
+    """
+    multipliers = {'K': 10 ** 3, 'M': 10 ** 6}
+    text = text.strip().upper()
+    if text[-1:] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def split_by_weights(total, weights):
+    """
+    Делит количество строк по весам методом наибольших остатков, сумма частей равна total
+
+    Args:
+        total (int): Количество строк
+        weights (dict): Ключ -> вес
+
+    Returns:
+        dict: Ключ -> количество строк
+
+    >>> split_by_weights(10, {2021: 1, 2022: 2})
+    {2021: 3, 2022: 7}
+    """
+    weight_sum = sum(weights.values())
+    exact = {key: total * weight / weight_sum for key, weight in weights.items()}
+    counts = {key: int(value) for key, value in exact.items()}
+    rest = sorted(weights, key=lambda key: (counts[key] - exact[key], -weights[key]))
+    for key in rest[:total - sum(counts.values())]:
+        counts[key] += 1
+    return counts
+
+
+class VacancyGenerator:
+    """
+    Генерирует строки вакансий пачками
+
+    Attributes:
+        schema (list): Заголовки csv
+        rng (random.Random): Генератор случайных чисел, единственный источник случайности
+        descriptions (list): Заранее собранные html описания
+        employers (list): Названия работодателей, частота убывает по закону Ципфа
+    """
+    def __init__(self, schema='full', seed=0):
+        """
+        Инициализирует объект VacancyGenerator
+
+        Args:
+            schema (str): 'full' или 'short'
+            seed (int): Начальное значение генератора случайных чисел
+        """
+        self.schema = schemas[schema]
+        self.rng = random.Random(seed)
+        self.currencies = cumulative({name: weight for name, (weight, _, _) in currencies.items()})
+        self.salary_bounds = cumulative(salary_bounds)
+        self.cities = cumulative(cities)
+        self.roles = cumulative(roles)
+        self.grades = cumulative(grades)
+        self.name_suffixes = cumulative(name_suffixes)
+        self.experiences = cumulative(experiences)
+        self.skills = cumulative(skills)
+        self.descriptions = [self.make_description() for _ in range(description_pool_size)]
+        self.employers = self.make_employers()
+        self.employer_weights = list(itertools.accumulate(1 / rank for rank in range(1, employer_pool_size + 1)))
+        self.days = {}
+
+    def choices(self, table, k):
+        values, cum_weights = table
+        return self.rng.choices(values, cum_weights=cum_weights, k=k)
+
+    def make_description(self):
+        """
+        Собирает html описание: заголовки разделов, списки, лишние пробелы и переводы строк внутри поля
+        """
+        rng = self.rng
+        parts = ['<p>Мы - быстро растущая компания, ищем в команду {0}.</p>'.format(
+            rng.choice(['специалиста', 'коллегу', 'профессионала', 'разработчика']))]
+        for title, phrases in description_phrases.items():
+            items = rng.sample(phrases, rng.randint(2, 5))
+            tag = rng.choice(['strong', 'b'])
+            parts.append('<p><{0}>{1}:</{0}></p> <ul> {2} </ul>'.format(
+                tag, title, ' '.join('<li>{0};</li>'.format(item) for item in items)))
+        separator = rng.choice([' ', '  ', '\n', '\r\n', ' \n\n '])
+        return separator.join(parts)
+
+    def make_employers(self):
+        rng = self.rng
+        forms = self.choices(cumulative(company_forms), employer_pool_size)
+        employers = []
+        for form in forms:
+            name = ''.join(rng.sample(company_syllables, rng.randint(2, 3)))
+            employers.append('{0} «{1}»'.format(form, name) if form else name)
+        return employers
+
+    def format_date(self, year, day, second):
+        key = year, day
+        date = self.days.get(key)
+        if date is None:
+            offset = '+0400' if 2011 <= year <= 2013 else '+0300'
+            date = self.days[key] = ((datetime.date(year, 1, 1) + datetime.timedelta(days=day)).isoformat(), offset)
+        return '{0}T{1:02d}:{2:02d}:{3:02d}{4}'.format(date[0], second // 3600, second // 60 % 60, second % 60, date[1])
+
+    def make_salaries(self, year, count):
+        """
+        Генерирует границы зарплаты, признак gross и валюту. Пустые строки - отсутствующие значения
+
+        Args:
+            year (int): Год публикации, зарплаты прошлых лет ниже
+            count (int): Количество строк
+
+        Returns:
+            list: Кортежи (salary_from, salary_to, salary_gross, salary_currency)
+        """
+        rng = self.rng
+        inflation = 1.08 ** (year - 2022)
+        result = []
+        for (has_from, has_to), currency in zip(self.choices(self.salary_bounds, count),
+                                                self.choices(self.currencies, count)):
+            if not has_from and not has_to:
+                result.append(('', '', '', ''))
+                continue
+            _, median, step = currencies[currency]
+            low = max(step, round(rng.lognormvariate(0, 0.45) * median * inflation / step) * step)
+            high = max(low, round(low * rng.uniform(1.1, 2.2) / step) * step)
+            result.append((str(float(low)) if has_from else '', str(float(high)) if has_to else '',
+                           'True' if rng.random() < 0.35 else 'False', currency))
+        return result
+
+    def make_batch(self, year, count):
+        """
+        Генерирует пачку строк одного года
+
+        Args:
+            year (int): Год публикации
+            count (int): Количество строк
+
+        Returns:
+            list: Строки csv по схеме
+        """
+        rng = self.rng
+        names = [grade + role + suffix for grade, role, suffix in zip(
+            self.choices(self.grades, count), self.choices(self.roles, count), self.choices(self.name_suffixes, count))]
+        year_days = 366 if year % 4 == 0 else 365
+        dates = [self.format_date(year, rng.randrange(year_days), rng.randrange(86400)) for _ in range(count)]
+        salaries = self.make_salaries(year, count)
+        areas = self.choices(self.cities, count)
+        if len(self.schema) == len(schemas['short']):
+            return [[name, salary[0], salary[1], salary[3], area, date]
+                    for name, salary, area, date in zip(names, salaries, areas, dates)]
+
+        descriptions = rng.choices(self.descriptions, k=count)
+        key_skills = ['\n'.join(dict.fromkeys(self.choices(self.skills, rng.choice((0, 0, 2, 3, 4, 5, 6, 8)))))
+                      for _ in range(count)]
+        experience = self.choices(self.experiences, count)
+        premium = ['True' if rng.random() < 0.03 else 'False' for _ in range(count)]
+        employers = rng.choices(self.employers, cum_weights=self.employer_weights, k=count)
+        return [[name, description, skill, exp, prem, employer, salary[0], salary[1], salary[2], salary[3], area, date]
+                for name, description, skill, exp, prem, employer, salary, area, date in
+                zip(names, descriptions, key_skills, experience, premium, employers, salaries, areas, dates)]
+
+    def batches(self, rows):
+        """
+        Генерирует строки пачками по batch_size, годы по возрастанию
+
+        Args:
+            rows (int): Общее количество строк
+
+        Returns:
+            iterator: Списки строк csv
+        """
+        for year, count in split_by_weights(rows, years).items():
+            while count > 0:
+                size = min(count, batch_size)
+                yield self.make_batch(year, size)
+                count -= size
+
+
+def write_vacancies(file_name, rows, schema='full', seed=0):
+    """
+    Записывает синтетические вакансии в csv потоком, в памяти держится одна пачка строк.
+    Суффикс .gz, .bz2, .xz или .zst в названии файла включает сжатие
+
+    Args:
+        file_name (str): Название выходного файла
+        rows (int): Количество строк
+        schema (str): 'full' (как для lab_5_2) или 'short' (как для lab_2_1_3)
+        seed (int): Начальное значение генератора случайных чисел
+
+    Returns:
+        int: Количество записанных строк
+    """
+    generator = VacancyGenerator(schema, seed)
+    written = 0
+    with open_output(file_name, encoding='utf-8-sig', newline='') as file:
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(generator.schema)
+        for batch in generator.batches(rows):
+            writer.writerows(batch)
+            written += len(batch)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Генератор синтетических вакансий для нагрузочных замеров')
+    parser.add_argument('file_name', help='выходной csv файл, можно со сжатием: .gz, .bz2, .xz, .zst')
+    parser.add_argument('--rows', default='1M', help='количество строк, можно с суффиксом K или M')
+    parser.add_argument('--schema', choices=sorted(schemas), default='full')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = write_vacancies(args.file_name, parse_count(args.rows), args.schema, args.seed)
+    elapsed = time.perf_counter() - start
+    print('Записано строк: {0} за {1:.1f} с ({2:.0f} строк/с)'.format(count, elapsed, count / elapsed if elapsed else 0))
@@ -0,0 +1,268 @@
+import csv
+import hashlib
+import json
+import math
+import os
+import pickle
+import random
+
+from compressed_io import open_text
+from result_cache import file_fingerprint
+
+# Режим --sample: запрос считается по выборке вместо полного прохода по файлу.
+# Выборка строится одним проходом резервуарным алгоритмом - равномерно по всему файлу или отдельно
+# по каждому году (стратифицированно) - и сохраняется; пока файл не изменился, запросы читают только ее.
+# В выборку попадают строки без пропусков, как в lab_5_2 и lab_2_1_3.
+# Количества и средние оцениваются по формулам стратифицированной выборки с 95% доверительными интервалами
+ENVIRONMENT_VARIABLE = 'VACANCY_SAMPLE_DIR'
+
+default_directory = '.vacancy_samples'
+modes = ('uniform', 'stratified')
+# Равномерная выборка - строк всего, стратифицированная - строк на каждый год
+default_sizes = {'uniform': 5000, 'stratified': 500}
+z_95 = 1.96
+
+
+class Estimate:
+    """
+    Оценка с половиной ширины 95% доверительного интервала
+
+    Attributes:
+        value (float): Оценка
+        margin (float): Половина ширины интервала, 0 - значение точное
+        digits (int): Знаков после запятой при печати
+    """
+    def __init__(self, value, margin, digits=0):
+        self.value = value
+        self.margin = margin
+        self.digits = digits
+
+    def __repr__(self):
+        """
+        >>> Estimate(1234.6, 10.2), Estimate(0.12345, 0.01, 4)
+        (1235 ± 10, 0.1235 ± 0.01)
+        """
+        if self.digits == 0:
+            return '{0} ± {1}'.format(int(round(self.value)), int(round(self.margin)))
+        return '{0} ± {1}'.format(round(self.value, self.digits), round(self.margin, self.digits))
+
+
+class Sample:
+    """
+    Выборка строк csv файла
+
+    Attributes:
+        header (list): Заголовки
+        mode (str): 'uniform' или 'stratified'
+        size (int): Размер резервуара (на год для стратифицированной выборки)
+        strata (dict): Страта (год или '' для равномерной выборки) -> [строк в файле, строки выборки]
+        fingerprint (list): Отпечаток файла, по которому построена выборка
+    """
+    def __init__(self, header, mode, size, strata, fingerprint=None):
+        self.header = header
+        self.mode = mode
+        self.size = size
+        self.strata = strata
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return sum(len(rows) for _, rows in self.strata.values())
+
+    def population(self):
+        return sum(population for population, _ in self.strata.values())
+
+    def stratum_of(self, published_at):
+        return published_at[:4] if self.mode == 'stratified' else ''
+
+    def rows(self):
+        """
+        Возвращает строки выборки со стратой
+
+        Returns:
+            iterator: Пары (страта, строка)
+        """
+        for key, (_, rows) in self.strata.items():
+            for row in rows:
+                yield key, row
+
+    def estimate(self, matched):
+        """
+        Оценивает количество строк с условием в файле и среднее значение по ним
+
+        Args:
+            matched (dict): Страта -> значения (например, зарплаты) строк выборки, подходящих под условие
+
+        Returns:
+            Estimate: Количество строк в файле
+            Estimate or None: Среднее значение, None - подходящих строк в выборке нет
+
+        >>> sample = Sample(['published_at'], 'stratified', 2, {'2021': [2, ['a', 'b']], '2022': [100, ['c', 'd']]})
+        >>> sample.estimate({'2021': [10.0], '2022': [30.0, 50.0]})
+        (101 ± 0, 39.7 ± 19.2)
+        >>> sample.estimate({'2022': [30.0]})[0].value
+        50.0
+        """
+        count, total, variance = 0.0, 0.0, 0.0
+        for key, (population, rows) in self.strata.items():
+            values = matched.get(key, [])
+            if not rows:
+                continue
+            weight = population / len(rows)
+            count += weight * len(values)
+            total += weight * sum(values)
+            variance += stratum_variance(population, len(rows), len(values), len(values))
+        if not count:
+            return Estimate(0, z_95 * math.sqrt(variance)), None
+        mean = total / count
+        mean_variance = 0.0
+        for key, (population, rows) in self.strata.items():
+            values = matched.get(key, [])
+            if rows and values:
+                # линеаризация отношения: отклонения от общего среднего у подходящих строк, нули у остальных
+                deviations = [value - mean for value in values]
+                mean_variance += stratum_variance(population, len(rows), sum(deviations),
+                                                  sum(deviation * deviation for deviation in deviations))
+        margin = z_95 * math.sqrt(mean_variance) / count
+        return Estimate(count, z_95 * math.sqrt(variance)), Estimate(mean, margin, 1 if abs(mean) < 100 else 0)
+
+    def save(self, file_name):
+        os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+        with open(file_name + '.tmp', 'wb') as file:
+            pickle.dump(self.__dict__, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(file_name + '.tmp', file_name)
+
+    @classmethod
+    def load(cls, file_name):
+        with open(file_name, 'rb') as file:
+            sample = cls.__new__(cls)
+            sample.__dict__.update(pickle.load(file))
+            return sample
+
+
+def add_matched(groups, group, stratum, value):
+    """
+    Запоминает значение подходящей строки выборки для Sample.estimate по группам
+
+    Args:
+        groups (dict): Группа -> страта -> значения
+        group (object): Группа, например год или город
+        stratum (str): Страта строки
+        value (float): Значение, например зарплата
+    """
+    strata = groups.get(group)
+    if strata is None:
+        strata = groups[group] = {}
+    values = strata.get(stratum)
+    if values is None:
+        values = strata[stratum] = []
+    values.append(value)
+
+
+def estimate_groups(sample, groups):
+    """
+    Оценивает количество и среднее для каждой группы
+
+    Args:
+        sample (Sample): Выборка
+        groups (dict): Группа -> страта -> значения, как собирает add_matched
+
+    Returns:
+        dict: Группа -> (Estimate количества, Estimate среднего)
+    """
+    return dict([(group, sample.estimate(matched)) for group, matched in groups.items()])
+
+
+def stratum_variance(population, size, total, squares):
+    """
+    Дисперсия оценки суммы по одной страте с поправкой на конечность совокупности
+
+    Args:
+        population (int): Строк в страте файла
+        size (int): Строк страты в выборке
+        total (float): Сумма значений подходящих строк (для количества - их число)
+        squares (float): Сумма квадратов значений подходящих строк
+
+    Returns:
+        float: Дисперсия, 0 - страта попала в выборку целиком
+    """
+    if size < 2 or size >= population:
+        return 0.0
+    sample_variance = max(0.0, (squares - total * total / size) / (size - 1))
+    return population * population * (1 - size / population) * sample_variance / size
+
+
+def build_sample(file_name, mode='stratified', size=None, seed=0):
+    """
+    Строит выборку одним проходом по файлу: резервуар на весь файл или на каждый год
+
+    Args:
+        file_name (str): Название csv файла
+        mode (str): 'uniform' или 'stratified'
+        size (int or None): Размер резервуара, по умолчанию из default_sizes
+        seed (int): Начальное значение генератора
+
+    Returns:
+        Sample: Выборка
+    """
+    size = size or default_sizes[mode]
+    rng = random.Random(seed)
+    strata = {}
+    fingerprint = file_fingerprint(file_name)
+    with open_text(file_name, encoding='utf-8-sig', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        date_index = header.index('published_at') if mode == 'stratified' else None
+        for row in reader:
+            if len(row) != len(header) or '' in row:
+                continue
+            key = row[date_index][:4] if date_index is not None else ''
+            stratum = strata.get(key)
+            if stratum is None:
+                stratum = strata[key] = [0, []]
+            stratum[0] += 1
+            if len(stratum[1]) < size:
+                stratum[1].append(row)
+            else:
+                index = rng.randrange(stratum[0])
+                if index < size:
+                    stratum[1][index] = row
+    return Sample(header, mode, size, dict(sorted(strata.items())), fingerprint)
+
+
+def sample_path(file_name, mode, size, directory):
+    key = json.dumps([os.path.abspath(file_name), mode, size])
+    return os.path.join(directory, hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest() + '.pickle')
+
+
+def get_sample(file_name, mode='stratified', size=None):
+    """
+    Возвращает сохраненную выборку файла или строит и сохраняет новую, если файл изменился.
+    Директория выборок задается переменной VACANCY_SAMPLE_DIR
+
+    Args:
+        file_name (str): Название csv файла
+        mode (str): 'uniform' или 'stratified'
+        size (int or None): Размер резервуара
+
+    Returns:
+        Sample: Выборка
+        bool: True, если выборка взята из сохраненной
+    """
+    size = size or default_sizes[mode]
+    path = sample_path(file_name, mode, size, os.environ.get(ENVIRONMENT_VARIABLE, default_directory))
+    if os.path.exists(path):
+        try:
+            sample = Sample.load(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            sample = None
+        if sample is not None and sample.fingerprint == file_fingerprint(file_name):
+            return sample, True
+    sample = build_sample(file_name, mode, size)
+    sample.save(path)
+    return sample, False
+
+
+def describe(sample, reused):
+    return 'Оценка по {0} выборке: {1} из {2} строк{3}, 95% доверительные интервалы'.format(
+        'стратифицированной по годам' if sample.mode == 'stratified' else 'равномерной', len(sample),
+        sample.population(), ', сохраненной ранее' if reused else '')
@@ -0,0 +1,375 @@
+import hashlib
+import math
+from collections import Counter
+
+# Ограниченные по памяти счетчики объема для многогигабайтных выгрузок: HyperLogLog оценивает
+# количество различных работодателей, Space-Saving держит самых частых работодателей и города.
+# Оба сливаются без потери гарантий, поэтому воркеры пула считают их по своему чанку,
+# а основной процесс объединяет результаты
+default_precision = 12
+# Для каждого города отдельный HyperLogLog: 1 КБ и ошибка около 3%
+city_precision = 10
+default_capacity = 100
+# Сколько строк копится в Counter перед добавлением в Space-Saving
+flush_rows = 10000
+
+
+def hash_value(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HyperLogLog:
+    """
+    Оценка количества различных значений, относительная ошибка около 1.04 / sqrt(2 ** precision)
+
+    Attributes:
+        precision (int): Число бит хеша на номер регистра
+        registers (bytearray): Наибольший ранг первой единицы для каждого регистра
+    """
+    def __init__(self, precision=default_precision):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        """
+        Добавляет значение
+
+        Args:
+            value (str): Значение, например название работодателя
+        """
+        hashed = hash_value(value)
+        rest_bits = 64 - self.precision
+        index = hashed >> rest_bits
+        rank = rest_bits - (hashed & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        """
+        Добавляет значения одной операцией numpy по регистрам, хешируются только различные значения
+
+        Args:
+            values (iterable): Значения
+        """
+        import numpy as np
+
+        hashes = np.fromiter((hash_value(value) for value in set(values)), dtype=np.uint64)
+        if not hashes.size:
+            return
+        rest_bits = 64 - self.precision
+        indexes = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        # длина остатка в битах через frexp: float64 хранит точно только целые короче 53 бит,
+        # а при city_precision = 10 остаток длиной 54 бита, поэтому старшие и младшие 32 бита считаются отдельно
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        high = np.frexp((rest >> np.uint64(32)).astype(np.float64))[1]
+        low = np.frexp((rest & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+        ranks = (rest_bits + 1 - np.where(high > 0, high + 32, low)).astype(np.uint8)
+        np.maximum.at(np.frombuffer(self.registers, dtype=np.uint8), indexes, ranks)
+
+    def merge(self, other):
+        """
+        Объединяет с другим счетчиком той же точности
+
+        Args:
+            other (HyperLogLog): Счетчик, например, другого чанка
+        """
+        if other.precision != self.precision:
+            raise ValueError('Счетчики с разной точностью: {0} и {1}'.format(self.precision, other.precision))
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        """
+        Оценивает количество различных значений
+
+        Returns:
+            int: Оценка
+
+        >>> counter = HyperLogLog()
+        >>> counter.update(str(number) for number in range(50000))
+        >>> abs(counter.count() - 50000) < 2500
+        True
+        >>> other = HyperLogLog()
+        >>> for number in range(40000, 60000):
+        ...     other.add(str(number))
+        >>> counter.merge(other)
+        >>> abs(counter.count() - 60000) < 3000
+        True
+        >>> HyperLogLog().count()
+        0
+        """
+        size = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / size) * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # на малых количествах точнее подсчет пустых регистров
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': self.registers.hex()}
+
+    @classmethod
+    def from_dict(cls, data):
+        counter = cls(data['precision'])
+        counter.registers = bytearray.fromhex(data['registers'])
+        return counter
+
+
+class SpaceSaving:
+    """
+    Самые частые значения (алгоритм Space-Saving): хранится не больше capacity счетчиков,
+    завышение счетчика не больше наименьшего счетчика
+
+    Attributes:
+        capacity (int): Сколько значений хранить
+        counters (dict): Значение -> [количество, наибольшее завышение]
+    """
+    def __init__(self, capacity=default_capacity):
+        self.capacity = capacity
+        self.counters = {}
+
+    def add(self, item, count=1):
+        """
+        Добавляет значение count раз. Если места нет, значение занимает счетчик наименее частого
+
+        Args:
+            item (str): Значение
+            count (int): Сколько раз оно встретилось
+        """
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [count, 0]
+        else:
+            evicted = min(self.counters, key=lambda key: self.counters[key][0])
+            smallest = self.counters.pop(evicted)[0]
+            self.counters[item] = [smallest + count, smallest]
+
+    def update(self, counts):
+        """
+        Добавляет уже подсчитанные значения, от частых к редким
+
+        Args:
+            counts (dict): Значение -> количество, например Counter или Series.value_counts()
+        """
+        for item, count in sorted(counts.items(), key=lambda pair: pair[1], reverse=True):
+            self.add(item, int(count))
+
+    def min_count(self):
+        # значение, которого нет среди заполненных счетчиков, могло встретиться не больше этого числа раз
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counters.values())
+
+    def merge(self, other):
+        """
+        Объединяет с другим счетчиком: количества складываются, отсутствующее значение получает
+        наименьший счетчик другой стороны, затем остаются capacity наибольших
+
+        Args:
+            other (SpaceSaving): Счетчик, например, другого чанка
+
+        >>> first, second = SpaceSaving(2), SpaceSaving(2)
+        >>> first.update({'Москва': 5, 'Пермь': 2})
+        >>> second.update({'Москва': 3, 'Казань': 4})
+        >>> first.merge(second)
+        >>> first.top()
+        [('Москва', 8), ('Казань', 6)]
+        """
+        self_min, other_min = self.min_count(), other.min_count()
+        merged = {}
+        for item in list(self.counters) + [item for item in other.counters if item not in self.counters]:
+            count, error = self.counters.get(item, [self_min, self_min])
+            other_count, other_error = other.counters.get(item, [other_min, other_min])
+            merged[item] = [count + other_count, error + other_error]
+        self.counters = dict(sorted(merged.items(), key=lambda pair: pair[1][0], reverse=True)[:self.capacity])
+
+    def top(self, number=10):
+        """
+        Возвращает самые частые значения
+
+        Args:
+            number (int): Сколько значений вернуть
+
+        Returns:
+            list: Пары (значение, количество) по убыванию количества, количество - оценка сверху
+        """
+        items = sorted(self.counters.items(), key=lambda pair: pair[1][0], reverse=True)[:number]
+        return [(item, count) for item, (count, _) in items]
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'counters': list(self.counters.items())}
+
+    @classmethod
+    def from_dict(cls, data):
+        counter = cls(data['capacity'])
+        counter.counters = dict(data['counters'])
+        return counter
+
+
+class VolumeStatistic:
+    """
+    Объем выгрузки: различные работодатели всего и по городам, самые частые работодатели и города
+
+    Attributes:
+        rows (int): Количество вакансий
+        employers (HyperLogLog): Различные работодатели
+        city_employers (dict): Город -> HyperLogLog работодателей города
+        top_employers (SpaceSaving): Самые частые работодатели
+        top_cities (SpaceSaving): Города с наибольшим числом вакансий
+        pending_employers (Counter): Работодатели строк, еще не добавленных в top_employers
+        pending_cities (Counter): То же для городов
+    """
+    def __init__(self, capacity=default_capacity):
+        self.rows = 0
+        self.employers = HyperLogLog()
+        self.city_employers = {}
+        self.top_employers = SpaceSaving(capacity)
+        self.top_cities = SpaceSaving(capacity)
+        self.pending_employers = Counter()
+        self.pending_cities = Counter()
+        self.pending_rows = 0
+
+    def city_counter(self, area_name):
+        counter = self.city_employers.get(area_name)
+        if counter is None:
+            counter = self.city_employers[area_name] = HyperLogLog(city_precision)
+        return counter
+
+    def add(self, area_name, employer_name=None):
+        """
+        Добавляет вакансию
+
+        Args:
+            area_name (str): Город
+            employer_name (str or None): Работодатель, None или пустая строка - неизвестен
+        """
+        self.rows += 1
+        if area_name:
+            self.pending_cities[area_name] += 1
+        if employer_name:
+            self.employers.add(employer_name)
+            if area_name:
+                self.city_counter(area_name).add(employer_name)
+            self.pending_employers[employer_name] += 1
+        self.pending_rows += 1
+        if self.pending_rows >= flush_rows:
+            self.flush()
+
+    def add_frame(self, data):
+        """
+        Добавляет вакансии DataFrame одним проходом по различным значениям
+
+        Args:
+            data (DataFrame): Вакансии со столбцом area_name и, если есть, employer_name
+        """
+        self.rows += data.shape[0]
+        self.top_cities.update(data['area_name'].value_counts())
+        if 'employer_name' not in data.columns:
+            return
+        known = data[data['employer_name'].notna() & (data['employer_name'] != '')]
+        self.employers.update(known['employer_name'])
+        self.top_employers.update(known['employer_name'].value_counts())
+        for area_name, employers in known.groupby('area_name', sort=False)['employer_name']:
+            self.city_counter(area_name).update(employers)
+
+    def flush(self):
+        self.top_employers.update(self.pending_employers)
+        self.top_cities.update(self.pending_cities)
+        self.pending_employers.clear()
+        self.pending_cities.clear()
+        self.pending_rows = 0
+
+    def merge(self, other):
+        """
+        Объединяет со статистикой другого чанка
+
+        Args:
+            other (VolumeStatistic): Статистика чанка
+        """
+        self.flush()
+        other.flush()
+        self.rows += other.rows
+        self.employers.merge(other.employers)
+        for area_name, counter in other.city_employers.items():
+            self.city_counter(area_name).merge(counter)
+        self.top_employers.merge(other.top_employers)
+        self.top_cities.merge(other.top_cities)
+
+    def result(self, top=10):
+        """
+        Собирает результат для печати
+
+        Args:
+            top (int): Сколько работодателей и городов оставить
+
+        Returns:
+            dict: 'employers' - различных работодателей (None, если в данных нет работодателей),
+                'employers_by_city' - то же для самых частых городов, 'top_employers', 'top_cities' -
+                значение -> количество вакансий
+
+        >>> volume = VolumeStatistic()
+        >>> for area_name, employer_name in [('Москва', 'Яндекс'), ('Москва', 'Сбер'), ('Пермь', 'Сбер')]:
+        ...     volume.add(area_name, employer_name)
+        >>> volume.result()
+        {'employers': 2, 'employers_by_city': {'Москва': 2, 'Пермь': 1}, 'top_employers': {'Сбер': 2, 'Яндекс': 1}, 'top_cities': {'Москва': 2, 'Пермь': 1}}
+        """
+        self.flush()
+        top_cities = dict(self.top_cities.top(top))
+        if not self.city_employers:
+            return {'employers': None, 'employers_by_city': {}, 'top_employers': {}, 'top_cities': top_cities}
+        return {'employers': self.employers.count(),
+                'employers_by_city': dict([(area_name, self.city_employers[area_name].count())
+                                           for area_name in top_cities if area_name in self.city_employers]),
+                'top_employers': dict(self.top_employers.top(top)), 'top_cities': top_cities}
+
+    def to_dict(self):
+        self.flush()
+        return {'rows': self.rows, 'employers': self.employers.to_dict(),
+                'city_employers': [[area_name, counter.to_dict()] for area_name, counter in self.city_employers.items()],
+                'top_employers': self.top_employers.to_dict(), 'top_cities': self.top_cities.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        volume = cls(data['top_cities']['capacity'])
+        volume.rows = data['rows']
+        volume.employers = HyperLogLog.from_dict(data['employers'])
+        volume.city_employers = dict([(area_name, HyperLogLog.from_dict(counter))
+                                      for area_name, counter in data['city_employers']])
+        volume.top_employers = SpaceSaving.from_dict(data['top_employers'])
+        volume.top_cities = SpaceSaving.from_dict(data['top_cities'])
+        return volume
+
+
+def collect_chunk_volumes(raw_data):
+    """
+    Сливает счетчики объема, которые воркеры futures.py и multyprocessing.py вернули последним
+    элементом результата чанка
+
+    Args:
+        raw_data (list): Результаты get_data_from_chunk, год - первый элемент
+
+    Returns:
+        dict: VolumeStatistic.result по всем чанкам и 'employers_by_year' - различные работодатели по годам
+    """
+    total, years = VolumeStatistic(), {}
+    for result in raw_data:
+        year, volume = result[0], result[-1]
+        if volume.city_employers:
+            if year not in years:
+                years[year] = HyperLogLog()
+            years[year].merge(volume.employers)
+        total.merge(volume)
+    return dict(total.result(), employers_by_year=dict([(year, counter.count()) for year, counter in years.items()]))
+
+
+def print_volume_statistic(volume):
+    if volume['employers'] is None:
+        print('Различных работодателей: нет столбца employer_name')
+    else:
+        print('Различных работодателей: {0}'.format(volume['employers']))
+    print('Различных работодателей по годам: {0}'.format(volume['employers_by_year']))
+    print('Различных работодателей в самых частых городах: {0}'.format(volume['employers_by_city']))
+    print('Самые частые работодатели: {0}'.format(volume['top_employers']))
+    print('Города с наибольшим числом вакансий: {0}'.format(volume['top_cities']))